@@ -0,0 +1,8 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import sys
+
+from pynvjitlink.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Runs a single link sent by a LinkJob in the parent process. The job is read
+# from stdin and its outcome written to stdout, both pickled.
+
+import pickle
+import sys
+
+from pynvjitlink import _nvjitlinklib
+from pynvjitlink.api import _complete_link
+
+
+def main():
+    options, inputs, output = pickle.load(sys.stdin.buffer)
+
+    handle = _nvjitlinklib.create(*options)
+    try:
+        for input_type, data, name in inputs:
+            _nvjitlinklib.add_data(handle, input_type, data, name)
+        outcome = _complete_link(handle, output)
+    finally:
+        _nvjitlinklib.destroy(handle)
+
+    pickle.dump(outcome, sys.stdout.buffer, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+if __name__ == "__main__":
+    main()
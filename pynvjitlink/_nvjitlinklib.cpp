@@ -1,5 +1,5 @@
 /*
- * Copyright (c) 2023-2024, NVIDIA CORPORATION.
+ * Copyright (c) 2023-2025, NVIDIA CORPORATION.
  *
  * Licensed under the Apache License, Version 2.0 (the "License");
  * you may not use this file except in compliance with the License.
@@ -17,6 +17,7 @@
 #define PY_SSIZE_T_CLEAN
 #include "nvJitLink.h"
 #include <Python.h>
+#include <cstring>
 #include <new>
 
 static const char *nvJitLinkGetErrorEnum(nvJitLinkResult error) {
@@ -166,20 +167,96 @@ static PyObject *destroy(PyObject *self, PyObject *args) {
   Py_RETURN_NONE;
 }
 
+// nvJitLink reads PTX up to a terminating null byte rather than by its size.
+// Bytes and bytearrays always have one after their end, as does the UTF-8 of
+// a str, so PTX in them, or in a view of the end of them, can be used in place.
+// So can a view of part of any other buffer that is followed by a null byte
+// within it, such as PTX in a mapped archive.
+static bool is_null_terminated(PyObject *obj, const char *data,
+                               Py_ssize_t size) {
+  if (PyUnicode_Check(obj))
+    return true;
+  if (size > 0 && data[size - 1] == '\0')
+    return true;
+  if (PyMemoryView_Check(obj))
+    obj = PyMemoryView_GET_BASE(obj);
+  if (obj == nullptr)
+    return false;
+  if (PyBytes_Check(obj))
+    return data + size == PyBytes_AS_STRING(obj) + PyBytes_GET_SIZE(obj);
+  if (PyByteArray_Check(obj))
+    return data + size ==
+           PyByteArray_AS_STRING(obj) + PyByteArray_GET_SIZE(obj);
+
+  Py_buffer whole;
+  if (PyObject_GetBuffer(obj, &whole, PyBUF_SIMPLE) != 0) {
+    PyErr_Clear();
+    return false;
+  }
+  const char *start = static_cast<const char *>(whole.buf);
+  bool terminated =
+      data >= start && data + size < start + whole.len && data[size] == '\0';
+  PyBuffer_Release(&whole);
+  return terminated;
+}
+
 static PyObject *add_data(PyObject *self, PyObject *args) {
   nvJitLinkHandle *jitlink;
   nvJitLinkInputType input_type;
-  Py_buffer buf;
+  PyObject *obj;
   const char *name;
 
-  if (!PyArg_ParseTuple(args, "Kiy*s", &jitlink, &input_type, &buf, &name)) {
+  if (!PyArg_ParseTuple(args, "KiOs", &jitlink, &input_type, &obj, &name)) {
     return nullptr;
   }
 
-  const void *data = buf.buf;
-  size_t size = buf.len;
-  nvJitLinkResult res =
-      nvJitLinkAddData(*jitlink, input_type, data, size, name);
+  // Inputs are used in place: a str through the UTF-8 representation cached
+  // in the object, and anything else through its buffer, which must be
+  // C-contiguous. nvJitLink copies the data it is given, so the input only
+  // has to stay alive for this call.
+  Py_buffer buf;
+  const char *data;
+  Py_ssize_t size;
+  bool release = false;
+  if (PyUnicode_Check(obj)) {
+    data = PyUnicode_AsUTF8AndSize(obj, &size);
+    if (data == nullptr)
+      return nullptr;
+  } else {
+    if (PyObject_GetBuffer(obj, &buf, PyBUF_C_CONTIGUOUS) != 0)
+      return nullptr;
+    data = static_cast<const char *>(buf.buf);
+    size = buf.len;
+    release = true;
+  }
+
+  // Other PTX has to be copied to terminate it
+  char *terminated = nullptr;
+  if (input_type == NVJITLINK_INPUT_PTX &&
+      !is_null_terminated(obj, data, size)) {
+    try {
+      terminated = new char[size + 1];
+    } catch (const std::bad_alloc &) {
+      PyErr_NoMemory();
+      if (release)
+        PyBuffer_Release(&buf);
+      return nullptr;
+    }
+    memcpy(terminated, data, size);
+    terminated[size] = '\0';
+    data = terminated;
+  }
+
+  // The data is only read, so other threads may run while it is added.
+  nvJitLinkResult res;
+  Py_BEGIN_ALLOW_THREADS;
+  res = nvJitLinkAddData(*jitlink, input_type, data, size, name);
+  Py_END_ALLOW_THREADS;
+
+  bool copied = terminated != nullptr;
+  delete[] terminated;
+  if (release)
+    PyBuffer_Release(&buf);
 
   if (res != NVJITLINK_SUCCESS) {
     set_exception(PyExc_RuntimeError, "%s error when calling nvJitLinkAddData",
@@ -187,7 +264,7 @@ static PyObject *add_data(PyObject *self, PyObject *args) {
     return nullptr;
   }
 
-  Py_RETURN_NONE;
+  return PyBool_FromLong(copied);
 }
 
 static PyObject *add_file(PyObject *self, PyObject *args) {
@@ -200,7 +277,13 @@ static PyObject *complete(PyObject *self, PyObject *args) {
   if (!PyArg_ParseTuple(args, "K", &jitlink))
     return nullptr;
 
-  nvJitLinkResult res = nvJitLinkComplete(*jitlink);
+  // Completing a link (particularly with LTO) can take a long time, and does
+  // not touch any Python objects, so other threads are allowed to run while
+  // it is in progress.
+  nvJitLinkResult res;
+  Py_BEGIN_ALLOW_THREADS;
+  res = nvJitLinkComplete(*jitlink);
+  Py_END_ALLOW_THREADS;
 
   if (res != NVJITLINK_SUCCESS) {
     set_exception(PyExc_RuntimeError, "%s error when calling nvJitLinkComplete",
@@ -343,7 +426,8 @@ static PyMethodDef ext_methods[] = {
     {"destroy", (PyCFunction)destroy, METH_VARARGS,
      "Given a handle, destroy an nvJitLink object"},
     {"add_data", (PyCFunction)add_data, METH_VARARGS,
-     "Add data to the link for the given handle"},
+     "Add data to the link for the given handle, returning whether it was "
+     "copied"},
     {"add_file", (PyCFunction)add_file, METH_VARARGS,
      "Add a file to the link for the given handle"},
     {"complete", (PyCFunction)complete, METH_VARARGS,
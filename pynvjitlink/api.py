@@ -1,9 +1,32 @@
-# Copyright (c) 2023-2024, NVIDIA CORPORATION.
+# Copyright (c) 2023-2025, NVIDIA CORPORATION.
 
+import concurrent.futures
+import os
+import pickle
+import re
+import subprocess
+import sys
+import threading
+import time
 import weakref
+from contextlib import contextmanager
 from enum import Enum
 
-from pynvjitlink import _nvjitlinklib
+from pynvjitlink import _nvjitlinklib, metrics
+from pynvjitlink.cache import (
+    DirectoryBackend,
+    HTTPBackend,
+    LinkResultCache,
+    NegativeCache,
+    SingleFlight,
+    input_bytes,
+    input_size,
+    link_fingerprint,
+)
+from pynvjitlink.capabilities import get_capabilities
+from pynvjitlink.capture import LinkRecorder
+from pynvjitlink.infolog import parse_info_log
+from pynvjitlink.options import _SPEED_UP_OPTIONS, LinkOptions
 
 
 class InputType(Enum):
@@ -24,8 +47,427 @@ class NvJitLinkError(RuntimeError):
     pass
 
 
+class NvJitLinkTimeoutError(NvJitLinkError):
+    pass
+
+
+# Rough model of the peak memory used by nvJitLink to complete a link, in terms
+# of the total size of its inputs. LTO links optimize and generate code for the
+# whole program at once, and use far more memory per input byte.
+_LINK_MEMORY_BASE = 64 * 1024**2
+_LINK_MEMORY_PER_INPUT_BYTE = 4
+_LTO_LINK_MEMORY_PER_INPUT_BYTE = 32
+
+
+def estimate_link_memory(options, input_size):
+    """Estimate the peak memory in bytes needed to complete a link with the
+    given options and total input size."""
+    if "-lto" in options:
+        per_byte = _LTO_LINK_MEMORY_PER_INPUT_BYTE
+    else:
+        per_byte = _LINK_MEMORY_PER_INPUT_BYTE
+    return _LINK_MEMORY_BASE + per_byte * input_size
+
+
+def _remaining(deadline):
+    # The seconds left before a deadline taken from time.monotonic(), or None
+    # when there is no deadline
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+class LinkMemoryLimiter:
+    """Admits links so that their total estimated memory use stays within a
+    budget.
+
+    Links that do not fit in the remaining budget queue until enough running
+    links have finished, and are admitted in the order they arrived. A link
+    whose cost exceeds the whole budget is admitted once nothing else is
+    running, so that it can still make progress. A budget of ``None`` admits
+    every link immediately.
+    """
+
+    def __init__(self, budget=None):
+        self._cv = threading.Condition()
+        self._budget = budget
+        self._in_use = 0
+        self._running = 0
+        self._queue = []
+        self._admitted = 0
+        self._queued = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def budget(self):
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget):
+        with self._cv:
+            self._budget = budget
+            self._cv.notify_all()
+
+    def _fits(self, cost):
+        return (
+            self._budget is None
+            or self._running == 0
+            or self._in_use + cost <= self._budget
+        )
+
+    @contextmanager
+    def admit(self, cost, timeout=None):
+        """Context manager that waits until a link of the given cost can run,
+        and releases its share of the budget on exit. ``TimeoutError`` is
+        raised if the link can't run within ``timeout`` seconds."""
+        start = time.perf_counter()
+        ticket = object()
+        with self._cv:
+            self._queue.append(ticket)
+            waited = self._queue[0] is not ticket or not self._fits(cost)
+            if not self._cv.wait_for(
+                lambda: self._queue[0] is ticket and self._fits(cost), timeout
+            ):
+                self._queue.remove(ticket)
+                # Links queued behind this one may be able to run now
+                self._cv.notify_all()
+                raise TimeoutError(f"Link was not admitted within {timeout}s")
+            self._queue.pop(0)
+            self._in_use += cost
+            self._running += 1
+
+            wait_time = time.perf_counter() - start
+            self._admitted += 1
+            self._queued += waited
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+            # The next link in the queue may fit as well
+            self._cv.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._cv:
+                self._in_use -= cost
+                self._running -= 1
+                self._cv.notify_all()
+
+    def stats(self):
+        """Return a dict of statistics about admitted and waiting links."""
+        with self._cv:
+            return {
+                "budget": self._budget,
+                "in_use": self._in_use,
+                "running": self._running,
+                "waiting": len(self._queue),
+                "admitted": self._admitted,
+                "queued": self._queued,
+                "total_wait_time": self._total_wait_time,
+                "max_wait_time": self._max_wait_time,
+            }
+
+
+def _budget_from_environment():
+    budget = os.environ.get("PYNVJITLINK_LINK_MEMORY_BUDGET")
+    return int(budget) if budget else None
+
+
+# Process-wide limiter for all links. The budget is unlimited unless it is set
+# with the PYNVJITLINK_LINK_MEMORY_BUDGET environment variable or
+# set_link_memory_budget().
+link_memory_limiter = LinkMemoryLimiter(_budget_from_environment())
+
+
+def set_link_memory_budget(budget):
+    """Set the budget in bytes for the estimated memory use of concurrently
+    running links. ``None`` removes the limit."""
+    link_memory_limiter.budget = budget
+
+
+_OUTPUTS = {
+    "cubin": _nvjitlinklib.get_linked_cubin,
+    "ptx": _nvjitlinklib.get_linked_ptx,
+}
+
+
+def _complete_link(handle, output):
+    """Complete the link for a handle, returning a tuple of the linked output,
+    the info log, and for a failed link, a tuple of the error message and the
+    error log."""
+    # nvJitLink errors are returned rather than raised, so that every caller
+    # sharing the link can raise its own exception.
+    try:
+        _nvjitlinklib.complete(handle)
+        result = _OUTPUTS[output](handle)
+        error = None
+    except RuntimeError as e:
+        result = None
+        error = (str(e), _nvjitlinklib.get_error_log(handle))
+    return result, _nvjitlinklib.get_info_log(handle), error
+
+
+class LinkJob:
+    """A link running in a separate worker process.
+
+    Unlike a link completed in-process, the job can be waited on with a
+    timeout, and cancelled by killing its worker.
+    """
+
+    def __init__(self, options, inputs, output="cubin"):
+        # The inputs are sent to the worker as bytes, because it cannot share
+        # memory with this process.
+        job = (
+            tuple(options),
+            [(t.value, bytes(input_bytes(data)), name) for t, data, name in inputs],
+            output,
+        )
+
+        # Make sure the worker imports the same pynvjitlink as this process
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        pythonpath = os.environ.get("PYTHONPATH")
+        if pythonpath:
+            pythonpath = os.pathsep.join((package_root, pythonpath))
+        else:
+            pythonpath = package_root
+        env = dict(os.environ, PYTHONPATH=pythonpath)
+
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "pynvjitlink._link_worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        self._cancelled = False
+        self._outcome = None
+        self._failure = None
+        self._done = threading.Event()
+        self._info_log = None
+        self._error_log = None
+
+        payload = pickle.dumps(job, protocol=pickle.HIGHEST_PROTOCOL)
+        threading.Thread(target=self._communicate, args=(payload,), daemon=True).start()
+
+    def _communicate(self, payload):
+        try:
+            stdout, stderr = self._process.communicate(payload)
+            if self._cancelled:
+                self._failure = "Link was cancelled"
+            elif self._process.returncode != 0:
+                self._failure = (
+                    f"Link worker exited with code {self._process.returncode}\n"
+                    f"{stderr.decode(errors='replace')}"
+                )
+            else:
+                self._outcome = pickle.loads(stdout)
+        except Exception as e:
+            self._failure = f"Link worker failed: {e}"
+
+        self._done.set()
+
+    def done(self):
+        """Return whether the job has finished, failed or been cancelled."""
+        return self._done.is_set()
+
+    def cancel(self):
+        """Kill the worker running the link, if it is still running."""
+        if not self._done.is_set():
+            self._cancelled = True
+            self._process.kill()
+
+    def _wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise NvJitLinkTimeoutError(f"Link did not complete within {timeout}s")
+        if self._failure is not None:
+            raise NvJitLinkError(self._failure)
+        return self._outcome
+
+    def result(self, timeout=None):
+        """Wait up to ``timeout`` seconds for the link, and return its output.
+
+        Raises NvJitLinkTimeoutError if the link has not completed in time; the
+        job keeps running until it completes or is cancelled.
+        """
+        result, self._info_log, error = self._wait(timeout)
+        if error is not None:
+            message, self._error_log = error
+            raise NvJitLinkError(f"{message}\n{self.error_log}")
+        return result
+
+    @property
+    def info_log(self):
+        return self._info_log
+
+    @property
+    def error_log(self):
+        return self._error_log
+
+
+# Identical links that are in flight at the same time (for example, many
+# threads requesting the same kernel at once) can be coalesced so that only one
+# of them runs, and the others share its result.
+_in_flight_links = SingleFlight()
+
+
+def _coalesce_links_from_environment():
+    return os.environ.get("PYNVJITLINK_COALESCE_LINKS", "0") not in ("", "0")
+
+
+# Whether identical concurrent links are coalesced. Finding identical links
+# means fingerprinting every link, so links are not coalesced unless it is
+# enabled with the PYNVJITLINK_COALESCE_LINKS environment variable or
+# set_link_coalescing().
+_coalesce_links = _coalesce_links_from_environment()
+
+
+def set_link_coalescing(enabled):
+    """Set whether identical links in flight at the same time are coalesced
+    into one link."""
+    global _coalesce_links
+    _coalesce_links = enabled
+
+
+def _negative_cache_ttl_from_environment():
+    ttl = os.environ.get("PYNVJITLINK_NEGATIVE_CACHE_TTL")
+    return float(ttl) if ttl else 0
+
+
+# Links that failed recently, so that retries of a link that can't succeed fail
+# immediately. Disabled unless a TTL is set with the
+# PYNVJITLINK_NEGATIVE_CACHE_TTL environment variable or
+# set_negative_cache_ttl().
+_failed_links = NegativeCache(_negative_cache_ttl_from_environment())
+
+
+# Errors that a link fails with whatever else is running. Unresolved and
+# duplicate symbols are reported as NVJITLINK_ERROR_INTERNAL, which is also
+# reported for failures that may not happen again, such as running out of
+# memory, so they are recognized by their messages in the error log.
+_DETERMINISTIC_ERRORS = frozenset(
+    (
+        "NVJITLINK_ERROR_UNRECOGNIZED_OPTION",
+        "NVJITLINK_ERROR_MISSING_ARCH",
+        "NVJITLINK_ERROR_INVALID_INPUT",
+        "NVJITLINK_ERROR_PTX_COMPILE",
+        "NVJITLINK_ERROR_NVVM_COMPILE",
+    )
+)
+_SYMBOL_ERROR = re.compile(
+    r"^error\s*: (Undefined reference|Multiple definition)", re.MULTILINE
+)
+
+
+def _is_deterministic_failure(error):
+    message, error_log = error
+    code = message.partition(" ")[0]
+    if code in _DETERMINISTIC_ERRORS:
+        return True
+    return code == "NVJITLINK_ERROR_INTERNAL" and bool(
+        _SYMBOL_ERROR.search(error_log or "")
+    )
+
+
+def set_negative_cache_ttl(ttl):
+    """Set how many seconds link failures are remembered for. A TTL of 0
+    disables the negative cache and forgets all remembered failures."""
+    _failed_links.ttl = ttl
+    if ttl <= 0:
+        _failed_links.clear()
+
+
+def _link_cache_from_environment():
+    # PYNVJITLINK_CACHE_COMPRESSION is a codec name, optionally followed by a
+    # level, e.g. "zstd:9"
+    codec, _, level = os.environ.get("PYNVJITLINK_CACHE_COMPRESSION", "zlib").partition(
+        ":"
+    )
+    level = int(level) if level else None
+
+    url = os.environ.get("PYNVJITLINK_CACHE_URL")
+    if url:
+        return LinkResultCache(HTTPBackend(url), codec, level)
+    path = os.environ.get("PYNVJITLINK_CACHE_DIR")
+    if path:
+        return LinkResultCache(DirectoryBackend(path), codec, level)
+    return None
+
+
+# Cache of successful link results, shared by all links in the process. There
+# is no cache unless one is configured with the PYNVJITLINK_CACHE_URL or
+# PYNVJITLINK_CACHE_DIR environment variables, or set_link_cache(). Entries
+# are compressed as set by PYNVJITLINK_CACHE_COMPRESSION (zlib by default).
+_link_cache = _link_cache_from_environment()
+
+
+def set_link_cache(cache):
+    """Set the LinkResultCache used by all links, or ``None`` for no cache."""
+    global _link_cache
+    _link_cache = cache
+
+
+def get_link_cache():
+    return _link_cache
+
+
+def _link_recorder_from_environment():
+    path = os.environ.get("PYNVJITLINK_CAPTURE_DIR")
+    return LinkRecorder(path) if path else None
+
+
+# Records the links run in the process to a capture directory, for replaying
+# later. Links are not recorded unless a directory is given by the
+# PYNVJITLINK_CAPTURE_DIR environment variable or set_link_recorder().
+_link_recorder = _link_recorder_from_environment()
+
+
+def set_link_recorder(recorder):
+    """Set the LinkRecorder that records the links that are run, or ``None``
+    to stop recording them. Links whose results are read from the link result
+    cache are not run, so they are not recorded."""
+    global _link_recorder
+    _link_recorder = recorder
+
+
+# Listeners called after every successful link in the process
+_link_listeners = []
+
+
+def add_link_listener(listener):
+    """Call ``listener(linker, usage)`` after each successful link, including
+    links whose results come from the link result cache. ``usage`` is the
+    resource usage of the linked functions, as returned by the
+    ``resource_usage`` property of the linker."""
+    _link_listeners.append(listener)
+
+
+def remove_link_listener(listener):
+    _link_listeners.remove(listener)
+
+
+def _notify_link_listeners(linker):
+    listeners = tuple(_link_listeners)
+    if listeners:
+        usage = linker.resource_usage
+        for listener in listeners:
+            listener(linker, usage)
+
+
 class NvJitLinker:
-    def __init__(self, *options):
+    def __init__(self, *options, kernels_used=(), variables_used=()):
+        if len(options) == 1 and isinstance(options[0], LinkOptions):
+            options = options[0].supported().as_options()
+        # Naming the kernels and variables that are used lets an LTO link
+        # drop the rest of the code before optimizing it, if nvJitLink
+        # supports it
+        for option, names in (
+            ("kernels_used", kernels_used),
+            ("variables_used", variables_used),
+        ):
+            probe, _ = _SPEED_UP_OPTIONS[option]
+            if names and get_capabilities().supports_option(probe):
+                flag = probe.partition("=")[0]
+                options += tuple(f"{flag}={name}" for name in names)
         try:
             self.handle = _nvjitlinklib.create(*options)
         except RuntimeError as e:
@@ -33,9 +475,17 @@ class NvJitLinker:
 
         weakref.finalize(self, _nvjitlinklib.destroy, self.handle)
 
+        self._options = options
+        # Inputs are kept for fingerprinting, capturing and running the link
+        # in a worker, and released once the link is done
+        self._inputs = []
+        # Digests of inputs known in advance, for fingerprinting
+        self._digests = []
         self._info_log = None
         self._error_log = None
         self._complete = False
+        # Time spent adding inputs, for link captures
+        self._add_time = 0.0
 
     @property
     def info_log(self):
@@ -45,10 +495,37 @@ class NvJitLinker:
     def error_log(self):
         return self._error_log
 
-    def add_data(self, input_type, data, name):
-        if self._complete:
+    @property
+    def resource_usage(self):
+        """The registers, spills and memory used by each function of the
+        linked output, parsed from the info log. They are only reported for
+        links with the ``-verbose`` option."""
+        if self._info_log is None:
+            return {}
+        return parse_info_log(self._info_log)
+
+    def add_data(self, input_type, data, name, digest=None):
+        """Add an input, which is either a str (added as UTF-8) or any
+        C-contiguous buffer, such as bytes, a bytearray, a memoryview of a
+        mmap, or a NumPy array.
+
+        The linker keeps its inputs until the link is complete, to fingerprint,
+        capture or run the link in a worker. Read-only buffers are kept as
+        views, which stop them from being resized or closed until then, and
+        writable buffers are copied when they are added."""
+        if self._inputs is None:
             raise NvJitLinkError("Cannot add data to already-completeted link")
 
+        if not isinstance(data, str):
+            view = memoryview(data)
+            # Kept inputs have to match what nvJitLink linked, so a buffer that
+            # could be changed after it is added is linked from a copy
+            if view.readonly or not view.c_contiguous:
+                data = view
+            else:
+                data = view.tobytes()
+
+        start = time.perf_counter()
         try:
             _nvjitlinklib.add_data(self.handle, input_type.value, data, name)
         except RuntimeError as e:
@@ -56,6 +533,10 @@ class NvJitLinker:
             self._error_log = _nvjitlinklib.get_error_log(self.handle)
             raise NvJitLinkError(f"{e}\n{self.error_log}")
 
+        self._add_time += time.perf_counter() - start
+        self._inputs.append((input_type, data, name))
+        self._digests.append(digest)
+
     def add_cubin(self, cubin, name=None):
         name = name or "unnamed-cubin"
         self.add_data(InputType.CUBIN, cubin, name)
@@ -79,24 +560,158 @@ class NvJitLinker:
     def add_library(self, library, name=None):
         self.add_data(InputType.LIBRARY, library, name)
 
-    def get_linked_cubin(self):
-        try:
-            _nvjitlinklib.complete(self.handle)
-            self._complete = True
-            return _nvjitlinklib.get_linked_cubin(self.handle)
-        except RuntimeError as e:
-            self._error_log = _nvjitlinklib.get_error_log(self.handle)
-            raise NvJitLinkError(f"{e}\n{self.error_log}")
-        finally:
-            self._info_log = _nvjitlinklib.get_info_log(self.handle)
+    def add_link_library(self, library, names=None):
+        """Add the inputs of a LinkLibrary, or only those with the given
+        names, in the order they appear in the library."""
+        members = library if names is None else [library[name] for name in names]
+        for member in members:
+            self.add_data(member.input_type, member.data, member.name, member.digest)
+
+    def fingerprint(self, output="cubin"):
+        """A fingerprint of the options and inputs of this link, identifying
+        its result. The inputs of a link are released once it is done, so it
+        can't be fingerprinted after that."""
+        if self._inputs is None:
+            raise NvJitLinkError("Cannot fingerprint an already-completed link")
+        return link_fingerprint(self._options, self._inputs, output, self._digests)
+
+    def submit(self, output="cubin"):
+        """Start linking the inputs added so far in a worker process, returning
+        a LinkJob for the ``"cubin"`` or ``"ptx"`` output."""
+        if self._inputs is None:
+            raise NvJitLinkError("Cannot submit an already-completed link")
+        return LinkJob(self._options, self._inputs, output)
+
+    def _run_link(self, output, deadline):
+        size = sum(input_size(data) for _, data, _ in self._inputs)
+        cost = estimate_link_memory(self._options, size)
+
+        with (
+            link_memory_limiter.admit(cost, _remaining(deadline)),
+            metrics.measure_link(self._options, self._inputs) as record,
+        ):
+            start = time.perf_counter()
+            if deadline is None:
+                outcome = _complete_link(self.handle, output)
+            else:
+                # A link in this process can't be interrupted, so when it is
+                # bounded by a timeout it runs in a worker that can be killed.
+                job = self.submit(output)
+                try:
+                    outcome = job._wait(_remaining(deadline))
+                except NvJitLinkTimeoutError:
+                    job.cancel()
+                    raise
+            record(output, outcome)
+
+            recorder = _link_recorder
+            if recorder is not None:
+                recorder.record(
+                    self._options,
+                    self._inputs,
+                    self._digests,
+                    output,
+                    outcome,
+                    self._add_time,
+                    time.perf_counter() - start,
+                )
+            return outcome
+
+    def _release_inputs(self):
+        self._inputs = None
+        self._digests = None
+
+    def _link(self, output, timeout):
+        if self._inputs is None:
+            raise NvJitLinkError("Cannot complete an already-completed link")
 
-    def get_linked_ptx(self):
+        # The timeout covers the whole call, including waits for other links
+        deadline = None if timeout is None else time.monotonic() + timeout
         try:
-            _nvjitlinklib.complete(self.handle)
-            self._complete = True
-            return _nvjitlinklib.get_linked_ptx(self.handle)
-        except RuntimeError as e:
-            self._error_log = _nvjitlinklib.get_error_log(self.handle)
-            raise NvJitLinkError(f"{e}\n{self.error_log}")
-        finally:
-            self._info_log = _nvjitlinklib.get_info_log(self.handle)
+            return self._link_by(output, deadline)
+        except (TimeoutError, concurrent.futures.TimeoutError, NvJitLinkTimeoutError):
+            raise NvJitLinkTimeoutError(
+                f"Link did not complete within {timeout}s"
+            ) from None
+
+    def _link_by(self, output, deadline):
+        cache = _link_cache
+        coalesce = _coalesce_links
+        remember_failures = _failed_links.ttl > 0
+        # Fingerprinting hashes every input, so it is only done for links
+        # whose fingerprint is used
+        key = None
+        if cache is not None or coalesce or remember_failures:
+            key = self.fingerprint(output)
+
+        if remember_failures:
+            failure = _failed_links.get(key)
+            if failure is not None:
+                self._release_inputs()
+                _, self._info_log, (message, self._error_log) = failure
+                raise NvJitLinkError(f"{message}\n{self.error_log}")
+
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.link_cache_hits.inc()
+                result, self._info_log = cached
+                self._complete = True
+                self._release_inputs()
+                _notify_link_listeners(self)
+                return result
+
+        def run():
+            if cache is None:
+                outcome = self._run_link(output, deadline)
+            else:
+                with cache.lock(key, _remaining(deadline)):
+                    # The link may have been completed elsewhere while waiting
+                    # for the lock
+                    cached = cache.lookup(key)
+                    if cached is not None:
+                        metrics.link_cache_hits.inc()
+                        return (*cached, None)
+                    metrics.link_cache_misses.inc()
+                    outcome = self._run_link(output, deadline)
+                    if outcome[2] is None:
+                        cache.put(key, outcome[0], outcome[1])
+
+            # Only errors reported by nvJitLink itself that will happen again
+            # are remembered - not timeouts, failed workers or errors that may
+            # be transient.
+            error = outcome[2]
+            if (
+                error is not None
+                and remember_failures
+                and _is_deterministic_failure(error)
+            ):
+                _failed_links.put(key, outcome)
+            return outcome
+
+        if coalesce:
+            (result, self._info_log, error), leader = _in_flight_links.do(
+                key, run, _remaining(deadline)
+            )
+            if not leader:
+                metrics.links_coalesced.inc()
+        else:
+            result, self._info_log, error = run()
+
+        # The link is done with, whether it succeeded or not. Links that timed
+        # out keep their inputs, so that they can be retried.
+        self._release_inputs()
+
+        if error is not None:
+            message, self._error_log = error
+            raise NvJitLinkError(f"{message}\n{self.error_log}")
+
+        self._complete = True
+        _notify_link_listeners(self)
+        return result
+
+    def get_linked_cubin(self, timeout=None):
+        return self._link("cubin", timeout)
+
+    def get_linked_ptx(self, timeout=None):
+        return self._link("ptx", timeout)
@@ -0,0 +1,151 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# A container for many link inputs in one file, which can be memory-mapped and
+# added to links without reading or copying its inputs.
+#
+# An archive starts with a header and an index of its inputs, followed by the
+# data of each input. The data of each input starts on a page boundary. The
+# data of a PTX input is followed by a null byte outside of its size, because
+# nvJitLink reads PTX up to one; LinkLibrary copies PTX that isn't, as in
+# archives written before this was done.
+#
+# Header:  magic (8s), version (H), reserved (H), input count (I), index size (Q)
+# Entry:   input type (B), reserved (x), arch (H), name size (I), offset (Q),
+#          size (Q), SHA-256 digest of the data (32s), then the UTF-8 name
+#
+# The arch is the SM version an input was built for, e.g. 80, or 0 if it is
+# not specific to one. All integers are little-endian.
+
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+from pynvjitlink.api import InputType, NvJitLinkError
+
+ARCHIVE_EXTENSION = ".pnjl"
+
+_MAGIC = b"PNJLPACK"
+_VERSION = 1
+_ALIGNMENT = 4096
+
+_HEADER = struct.Struct("<8sHHIQ")
+_ENTRY = struct.Struct("<BxHIQQ32s")
+
+ArchiveEntry = namedtuple(
+    "ArchiveEntry", ["name", "input_type", "arch", "offset", "size", "digest"]
+)
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _terminator(member):
+    return b"\0" if member.input_type is InputType.PTX else b""
+
+
+def write_archive(path, members):
+    """Write link inputs to an archive.
+
+    ``members`` is an iterable of inputs with ``name``, ``input_type``,
+    ``data``, ``digest`` and ``arch`` attributes, such as a LinkLibrary. The
+    archive is written to a temporary file and renamed into place.
+    """
+    members = list(members)
+
+    index = []
+    offset = _align(
+        _HEADER.size + sum(_ENTRY.size + len(m.name.encode()) for m in members)
+    )
+    for member in members:
+        name = member.name.encode()
+        size = memoryview(member.data).nbytes
+        entry = _ENTRY.pack(
+            member.input_type.value,
+            member.arch or 0,
+            len(name),
+            offset,
+            size,
+            member.digest,
+        )
+        index.append(entry + name)
+        offset = _align(offset + size + len(_terminator(member)))
+    index = b"".join(index)
+
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(members), len(index)))
+            f.write(index)
+            for member in members:
+                f.seek(_align(f.tell()))
+                f.write(member.data)
+                f.write(_terminator(member))
+            # Pad the last input, so that the file size covers every page
+            f.truncate(_align(f.tell()))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _invalid(path, reason):
+    return NvJitLinkError(f"{path} is not a valid pynvjitlink archive: {reason}")
+
+
+def read_archive_index(path):
+    """Map an archive into memory and read its index.
+
+    Returns a tuple of a read-only memoryview of the archive and a list of
+    ArchiveEntry tuples in the order the inputs were written.
+    """
+    path = os.fspath(path)
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise _invalid(path, "too short")
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except OSError as e:
+        raise NvJitLinkError(f"Cannot load {path}: {e}")
+
+    magic, version, _, count, index_size = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise _invalid(path, "bad magic number")
+    if version != _VERSION:
+        raise _invalid(path, f"unsupported version {version}")
+    index_end = _HEADER.size + index_size
+    if index_end > data.nbytes:
+        raise _invalid(path, "truncated index")
+
+    entries = []
+    position = _HEADER.size
+    for _ in range(count):
+        if position + _ENTRY.size > index_end:
+            raise _invalid(path, "truncated index")
+        input_type, arch, name_size, offset, size, digest = _ENTRY.unpack_from(
+            data, position
+        )
+        position += _ENTRY.size
+        if position + name_size > index_end:
+            raise _invalid(path, "truncated index")
+        try:
+            name = str(data[position : position + name_size], "utf-8")
+        except UnicodeDecodeError:
+            raise _invalid(path, "input name is not UTF-8")
+        position += name_size
+        try:
+            input_type = InputType(input_type)
+        except ValueError:
+            raise _invalid(path, f"{name} has unknown input type {input_type}")
+        if offset < index_end or offset + size > data.nbytes:
+            raise _invalid(path, f"{name} is out of bounds")
+        entries.append(
+            ArchiveEntry(name, input_type, arch or None, offset, size, digest)
+        )
+
+    return data, entries
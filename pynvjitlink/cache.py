@@ -0,0 +1,667 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import contextlib
+import hashlib
+import http.client
+import itertools
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pynvjitlink import _nvjitlinklib
+
+
+def input_size(data):
+    """Return the size in bytes of a link input's data, which is either a str
+    (linked as UTF-8) or a C-contiguous buffer."""
+    if isinstance(data, str):
+        # PTX is ASCII, whose size doesn't need an encoded copy to find
+        return len(data) if data.isascii() else len(data.encode())
+    return memoryview(data).nbytes
+
+
+def input_bytes(data):
+    """Return a link input's data as a bytes-like object of its bytes."""
+    if isinstance(data, str):
+        return data.encode()
+    return memoryview(data).cast("B")
+
+
+# The number of characters of a str input encoded at a time when it is hashed
+_STR_CHUNK_SIZE = 1 << 20
+
+
+def input_chunks(data):
+    """Yield a link input's data as bytes-like objects, without encoding the
+    whole of a str at once."""
+    if isinstance(data, str):
+        # Code points are encoded independently, so chunks can split anywhere
+        for i in range(0, len(data), _STR_CHUNK_SIZE):
+            yield data[i : i + _STR_CHUNK_SIZE].encode()
+    else:
+        yield memoryview(data).cast("B")
+
+
+def input_digest(data):
+    """Return the digest of a link input's data used by link_fingerprint."""
+    h = hashlib.sha256()
+    for chunk in input_chunks(data):
+        h.update(chunk)
+    return h.digest()
+
+
+# Options that change how a link is run, but not its output, so they don't
+# contribute to fingerprints. The same link on hosts with different numbers of
+# CPUs then shares its cache entries.
+_OUTPUT_NEUTRAL_OPTIONS = ("-split-compile=",)
+
+
+def link_fingerprint(options, inputs, output="cubin", digests=None):
+    """Compute a fingerprint identifying the result of a link.
+
+    ``options`` is the sequence of nvJitLink option strings, and ``inputs`` an
+    iterable of ``(input_type, data, name)`` tuples in the order they are
+    added to the link. Input names only appear in log messages, so they do not
+    contribute to the fingerprint, nor do options that only change how the
+    link is run, such as ``-split-compile``. The nvJitLink version is
+    included, because a different version may produce a different result from
+    the same link.
+
+    ``digests`` optionally gives the input_digest() of each input, or
+    ``None`` for inputs whose digest should be computed.
+    """
+    h = hashlib.sha256()
+    h.update(repr(_nvjitlinklib.nvjitlink_version()).encode())
+    h.update(output.encode())
+    h.update(b"\0")
+    for option in options:
+        if option.startswith(_OUTPUT_NEUTRAL_OPTIONS):
+            continue
+        h.update(option.encode())
+        h.update(b"\0")
+    if digests is None:
+        digests = itertools.repeat(None)
+    for (input_type, data, _), digest in zip(inputs, digests):
+        if digest is None:
+            digest = input_digest(data)
+        h.update(f"{input_type.value}:{input_size(data)}:".encode())
+        h.update(digest)
+    return h.hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+
+    While a call for a key is in flight, further calls for the same key wait
+    for it to finish and share its result (or its exception) instead of
+    running the work again. Once a call finishes, the key is forgotten, so the
+    next call for it runs the work afresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=None):
+        """Call ``fn()``, or wait for an in-flight call with the same key.
+
+        Returns a tuple of the result and whether this call ran ``fn``. A
+        ``timeout`` only limits how long to wait for another call; if it
+        expires, ``concurrent.futures.TimeoutError`` is raised.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(timeout), False
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        """Return the number of keys with a call in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+class NegativeCache:
+    """Remembers failed links for a limited time.
+
+    A link with the same fingerprint as one that failed recently fails the
+    same way, so its failure can be reported again without repeating the
+    link. Entries expire ``ttl`` seconds after they are stored, and the least
+    recently used entries are evicted beyond ``maxsize``. A ``ttl`` of 0
+    disables the cache.
+    """
+
+    def __init__(self, ttl=0, maxsize=1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+    def get(self, key):
+        """Return the failure stored for a key, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry, failure = entry
+            if time.monotonic() >= expiry:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return failure
+
+    def put(self, key, failure):
+        """Store the failure of the link with the given key."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, failure)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_KEY_RE = re.compile("^[0-9a-f]{16,128}$")
+
+
+def _check_key(key):
+    # Keys are used in paths and URLs, so only fingerprints are accepted
+    if not _KEY_RE.match(key):
+        raise ValueError(f"Invalid cache key {key!r}")
+
+
+class CacheBackend:
+    """Storage for the link result cache.
+
+    Backends store opaque bytes values by key. They should treat failures to
+    read or write an entry as a miss rather than raising, because the cache is
+    only an optimization.
+    """
+
+    def get(self, key):
+        """Return the value stored for a key, or ``None``."""
+        raise NotImplementedError
+
+    def put(self, key, value):
+        """Store a value for a key, replacing any existing value."""
+        raise NotImplementedError
+
+    def contains(self, key):
+        return self.get(key) is not None
+
+    def lock(self, key, timeout=None):
+        """Return a context manager that holds a lock on a key.
+
+        Holders of the lock are the only writers of the key, so a link holding
+        it can check the cache again, and links of the same key elsewhere wait
+        for its result instead of repeating it. ``TimeoutError`` is raised if
+        the lock can't be taken within ``timeout`` seconds. By default no lock
+        is taken.
+        """
+        return contextlib.nullcontext()
+
+
+class MemoryBackend(CacheBackend):
+    """Stores entries in a dict in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = bytes(value)
+
+
+class DirectoryBackend(CacheBackend):
+    """Stores each entry as a file in a local directory.
+
+    Entries are written to a temporary file and renamed into place, so readers
+    never see a partially-written entry.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _path(self, key):
+        _check_key(key)
+        return os.path.join(self.path, key[:2], key[2:])
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def contains(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, value):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(value)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+
+# Seconds between attempts to take a lock file that another host holds
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class SharedDirectoryBackend(DirectoryBackend):
+    """Stores entries in a directory shared between hosts, such as a network
+    filesystem.
+
+    In addition to the atomic writes of DirectoryBackend, a POSIX lock file per
+    key ensures only one host links and writes each entry, while the others
+    wait for it and read the result.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        # lockf() locks are held by the process, so threads of this process
+        # also take a lock per key, kept with the number of threads using it
+        self._thread_locks_lock = threading.Lock()
+        self._thread_locks = {}
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._thread_lock(key, timeout):
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            with self._file_lock(key, timeout):
+                yield
+
+    @contextlib.contextmanager
+    def _thread_lock(self, key, timeout):
+        with self._thread_locks_lock:
+            entry = self._thread_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            if not entry[0].acquire(timeout=-1 if timeout is None else timeout):
+                raise TimeoutError(f"Lock on {key} was not taken within {timeout}s")
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            with self._thread_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._thread_locks[key]
+
+    @contextlib.contextmanager
+    def _file_lock(self, key, timeout):
+        import fcntl
+
+        lock_path = self._path(key) + ".lock"
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "a+b") as f:
+            # lockf() locks are honored by NFS, unlike flock() locks
+            if timeout is None:
+                fcntl.lockf(f, fcntl.LOCK_EX)
+            else:
+                # lockf() can't wait with a timeout, so the lock is polled
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except OSError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(
+                                f"Lock on {key} was not taken within {timeout}s"
+                            ) from None
+                        time.sleep(_LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                fcntl.lockf(f, fcntl.LOCK_UN)
+
+
+class HTTPBackend(CacheBackend):
+    """Stores entries in a key-value store over HTTP.
+
+    Entries are read with ``GET <url>/<key>`` and written with
+    ``PUT <url>/<key>``; a 404 response to a ``GET`` is a miss. CacheServer is
+    a reference implementation of the server.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, key, method, data=None):
+        _check_key(key)
+        request = urllib.request.Request(f"{self.url}/{key}", data=data, method=method)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    # Failures to reach the server and invalid or truncated responses
+    _ERRORS = (OSError, urllib.error.URLError, http.client.HTTPException)
+
+    def get(self, key):
+        try:
+            with self._request(key, "GET") as response:
+                return response.read()
+        except self._ERRORS:
+            return None
+
+    def put(self, key, value):
+        try:
+            with self._request(key, "PUT", bytes(value)):
+                pass
+        except self._ERRORS:
+            pass
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    def _key(self):
+        key = self.path.lstrip("/")
+        if not _KEY_RE.match(key):
+            self.send_error(400, "Invalid cache key")
+            return None
+        return key
+
+    def do_GET(self):
+        key = self._key()
+        if key is None:
+            return
+        value = self.server.backend.get(key)
+        if value is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(value)))
+        self.end_headers()
+        self.wfile.write(value)
+
+    def do_PUT(self):
+        key = self._key()
+        if key is None:
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.backend.put(key, self.rfile.read(length))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CacheServer:
+    """An HTTP key-value server for HTTPBackend clients, storing its entries
+    in another backend (in memory by default).
+
+    This is a reference implementation and a stand-in for a production store
+    in tests; it runs in a background thread of this process.
+    """
+
+    def __init__(self, backend=None, host="127.0.0.1", port=0):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._server = ThreadingHTTPServer((host, port), _CacheRequestHandler)
+        self._server.backend = self.backend
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _ZlibCodec:
+    default_level = 1
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class _ZstdCodec:
+    default_level = 3
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class _NoCodec:
+    default_level = 0
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+# Codecs by name, with the IDs they are recorded as in cache entries
+_CODECS = {"none": (0, _NoCodec), "zlib": (1, _ZlibCodec), "zstd": (2, _ZstdCodec)}
+_CODEC_IDS = {codec_id: name for name, (codec_id, _) in _CODECS.items()}
+
+
+def _make_codec(name, level=None):
+    if name not in _CODECS:
+        raise ValueError(f"Unknown compression codec {name!r}")
+    if name == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    codec_class = _CODECS[name][1]
+    return codec_class(codec_class.default_level if level is None else level)
+
+
+# A cache entry is a header followed by the linked output and the info log,
+# compressed together with the codec recorded in the header
+_ENTRY_MAGIC = b"PNJL"
+_ENTRY_VERSION = 2
+_ENTRY_HEADER = struct.Struct("<4sBB2xQQ")
+
+
+class LinkResultCache:
+    """Caches the outputs of successful links in a backend, keyed by the
+    fingerprints of the links.
+
+    Entries are compressed with ``codec`` (``"zlib"``, ``"zstd"`` if the
+    zstandard package is installed, or ``"none"``) at the given level, or the
+    codec's default level. Entries written with any codec can be read.
+    """
+
+    def __init__(self, backend, codec="zlib", level=None):
+        self.backend = backend
+        self.codec = codec
+        self._codec = _make_codec(codec, level)
+        self._codec_id = _CODECS[codec][0]
+        self._decoders = {self._codec_id: self._codec}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored_bytes = 0
+        self.compressed_bytes = 0
+        self.decode_time = 0.0
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, key):
+        """Return a tuple of the output and info log of the link with the
+        given key, or ``None``, without counting it as a hit or a miss."""
+        entry = self.backend.get(key)
+        return None if entry is None else self._unpack(entry)
+
+    def get(self, key):
+        """Return a tuple of the output and info log of the link with the
+        given key, or ``None``."""
+        result = self.lookup(key)
+        self._count(result is not None)
+        return result
+
+    def put(self, key, output, info_log):
+        self.backend.put(key, self._pack(output, info_log))
+
+    def contains(self, key):
+        return self.backend.contains(key)
+
+    def lock(self, key, timeout=None):
+        return self.backend.lock(key, timeout)
+
+    def _pack(self, output, info_log):
+        info_log = info_log.encode()
+        data = b"".join((output, info_log))
+        payload = self._codec.compress(data)
+        with self._lock:
+            self.stored_bytes += len(data)
+            self.compressed_bytes += len(payload)
+        header = _ENTRY_HEADER.pack(
+            _ENTRY_MAGIC, _ENTRY_VERSION, self._codec_id, len(output), len(info_log)
+        )
+        return b"".join((header, payload))
+
+    def _decoder(self, codec_id):
+        decoder = self._decoders.get(codec_id)
+        if decoder is None:
+            name = _CODEC_IDS.get(codec_id)
+            try:
+                decoder = _make_codec(name)
+            except ValueError:
+                return None
+            self._decoders[codec_id] = decoder
+        return decoder
+
+    def _unpack(self, entry):
+        # Entries that are corrupt, from another version of pynvjitlink, or
+        # compressed with a codec that is not available are treated as misses.
+        entry = memoryview(entry)
+        if len(entry) < _ENTRY_HEADER.size:
+            return None
+        magic, version, codec_id, output_size, log_size = _ENTRY_HEADER.unpack_from(
+            entry
+        )
+        if magic != _ENTRY_MAGIC or version != _ENTRY_VERSION:
+            return None
+        decoder = self._decoder(codec_id)
+        if decoder is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            data = decoder.decompress(entry[_ENTRY_HEADER.size :])
+        except Exception:
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.decode_time += elapsed
+
+        if len(data) != output_size + log_size:
+            return None
+        try:
+            info_log = str(data[output_size:], "utf-8")
+        except UnicodeDecodeError:
+            return None
+        return bytes(data[:output_size]), info_log
+
+    def stats(self):
+        """Return counts of hits and misses, the total size of the entries
+        stored before and after compression and their ratio, and the total
+        time spent decompressing entries in seconds."""
+        with self._lock:
+            ratio = (
+                self.stored_bytes / self.compressed_bytes
+                if self.compressed_bytes
+                else 1.0
+            )
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored_bytes": self.stored_bytes,
+                "compressed_bytes": self.compressed_bytes,
+                "compression_ratio": ratio,
+                "decode_time": self.decode_time,
+            }
@@ -0,0 +1,147 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import json
+import os
+import tempfile
+import threading
+
+from pynvjitlink import _nvjitlinklib
+
+# Options are probed with an architecture every supported nvJitLink knows
+_PROBE_ARCH = "-arch=sm_80"
+
+# Architectures probed by supported_archs()
+KNOWN_ARCHS = (
+    "sm_50",
+    "sm_52",
+    "sm_53",
+    "sm_60",
+    "sm_61",
+    "sm_62",
+    "sm_70",
+    "sm_72",
+    "sm_75",
+    "sm_80",
+    "sm_86",
+    "sm_87",
+    "sm_89",
+    "sm_90",
+    "sm_90a",
+    "sm_100",
+    "sm_100a",
+    "sm_101",
+    "sm_103",
+    "sm_110",
+    "sm_120",
+    "sm_121",
+)
+
+
+def _probe(*options):
+    # Creating a link checks its options without needing any inputs
+    try:
+        handle = _nvjitlinklib.create(*options)
+    except RuntimeError:
+        return False
+    _nvjitlinklib.destroy(handle)
+    return True
+
+
+class Capabilities:
+    """The options and architectures supported by an nvJitLink version.
+
+    Each option or architecture is probed by creating (and destroying) a link
+    with it the first time it is asked about, and the answer is remembered.
+    If ``path`` is given, answers are saved there as they are found.
+    """
+
+    def __init__(self, version, options=None, archs=None, path=None):
+        self.version = version
+        self.path = path
+        self._lock = threading.Lock()
+        self._options = dict(options or {})
+        self._archs = dict(archs or {})
+
+    def _lookup(self, known, key, probe):
+        with self._lock:
+            supported = known.get(key)
+        if supported is None:
+            supported = probe()
+            with self._lock:
+                known[key] = supported
+                if self.path is not None:
+                    self._save()
+        return supported
+
+    def supports_option(self, option):
+        """Whether nvJitLink accepts an option, such as ``"-split-compile=4"``.
+
+        Options are only checked when a link is created, so an option with an
+        invalid value that is only rejected when the link completes is
+        reported as supported."""
+        return self._lookup(self._options, option, lambda: _probe(_PROBE_ARCH, option))
+
+    def supports_arch(self, arch):
+        """Whether nvJitLink can link for an architecture, such as
+        ``"sm_90a"``."""
+        return self._lookup(self._archs, arch, lambda: _probe(f"-arch={arch}"))
+
+    def supported_archs(self):
+        """Return the architectures in KNOWN_ARCHS that nvJitLink supports."""
+        return [arch for arch in KNOWN_ARCHS if self.supports_arch(arch)]
+
+    def _save(self):
+        state = {
+            "version": list(self.version),
+            "options": self._options,
+            "archs": self._archs,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        except OSError:
+            # The file only saves probing again, so it's fine not to have one
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.unlink(tmp_path)
+
+    @classmethod
+    def load(cls, path, version):
+        """Return the Capabilities saved at ``path`` for an nvJitLink version,
+        or empty Capabilities that will be saved there if the file is missing
+        or is for another version."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            if tuple(state["version"]) == tuple(version):
+                return cls(version, state["options"], state["archs"], path)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return cls(version, path=path)
+
+
+_capabilities = None
+_capabilities_lock = threading.Lock()
+
+
+def get_capabilities():
+    """Return the Capabilities of the installed nvJitLink, shared by the whole
+    process. If the PYNVJITLINK_CAPABILITIES_FILE environment variable names a
+    file, probe results are saved there and reused by later processes that
+    use the same version of nvJitLink."""
+    global _capabilities
+    with _capabilities_lock:
+        if _capabilities is None:
+            version = _nvjitlinklib.nvjitlink_version()
+            path = os.environ.get("PYNVJITLINK_CAPABILITIES_FILE")
+            if path:
+                _capabilities = Capabilities.load(path, version)
+            else:
+                _capabilities = Capabilities(version)
+        return _capabilities
@@ -0,0 +1,127 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Capturing the links run by a process to a directory, so that they can be
+# replayed later (see pynvjitlink.driver.replay_captures) to reproduce and
+# benchmark them away from the application that produced their inputs.
+#
+# A capture directory holds a JSON file for each link in jobs/, and the inputs
+# of the links in inputs/, named by their SHA-256 digests so that inputs
+# shared by several links (such as libraries) are only stored once.
+
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from pynvjitlink import _nvjitlinklib
+from pynvjitlink.cache import input_bytes, input_digest
+
+CapturedLink = namedtuple(
+    "CapturedLink",
+    [
+        "path",
+        "version",
+        "options",
+        "inputs",
+        "output",
+        "add_time",
+        "link_time",
+        "error",
+    ],
+)
+
+
+def _write_file(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LinkRecorder:
+    """Writes each link it is given to a capture directory.
+
+    Links are recorded with their options, inputs, output type, the version
+    of nvJitLink, how long adding the inputs and completing the link took,
+    and the error message of a failed link. Failing to write a capture does
+    not fail the link.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def _job_id(self):
+        with self._lock:
+            number = next(self._ids)
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{number:06d}"
+
+    def record(self, options, inputs, digests, output, outcome, add_time, link_time):
+        """Record a link of ``(input_type, data, name)`` inputs, whose
+        digests are given where they are known, and its outcome as returned
+        by _complete_link()."""
+        job = {
+            "version": list(_nvjitlinklib.nvjitlink_version()),
+            "options": list(options),
+            "inputs": [],
+            "output": output,
+            "add_time": add_time,
+            "link_time": link_time,
+            "error": None if outcome[2] is None else outcome[2][0],
+        }
+        try:
+            for (input_type, data, name), digest in zip(inputs, digests):
+                digest = (digest or input_digest(data)).hex()
+                path = os.path.join(self.path, "inputs", digest)
+                if not os.path.exists(path):
+                    _write_file(path, input_bytes(data))
+                job["inputs"].append(
+                    {"type": input_type.value, "name": name, "digest": digest}
+                )
+            path = os.path.join(self.path, "jobs", f"{self._job_id()}.json")
+            _write_file(path, json.dumps(job, indent=1).encode())
+        except OSError:
+            pass
+
+
+def load_captures(path):
+    """Return the links captured in a directory as CapturedLink tuples, in
+    the order they were recorded.
+
+    ``inputs`` is a list of ``(input_type, input_path, name)`` tuples, where
+    ``input_type`` is the value of the InputType of the input.
+    """
+    jobs = os.path.join(path, "jobs")
+    captures = []
+    for filename in sorted(os.listdir(jobs)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(jobs, filename)) as f:
+            job = json.load(f)
+        inputs = [
+            (item["type"], os.path.join(path, "inputs", item["digest"]), item["name"])
+            for item in job["inputs"]
+        ]
+        captures.append(
+            CapturedLink(
+                os.path.join(jobs, filename),
+                tuple(job["version"]),
+                job["options"],
+                inputs,
+                job["output"],
+                job["add_time"],
+                job["link_time"],
+                job["error"],
+            )
+        )
+    return captures
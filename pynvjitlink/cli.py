@@ -0,0 +1,294 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import argparse
+import os
+import sys
+
+from pynvjitlink.api import get_link_cache, nvjitlink_version, set_link_cache
+from pynvjitlink.cache import DirectoryBackend, LinkResultCache
+from pynvjitlink.driver import (
+    LinkSpec,
+    _arch_option,
+    _load_input,
+    load_manifest,
+    replay_captures,
+    run_links,
+    warm_link_cache,
+)
+from pynvjitlink.options import LinkOptions
+from pynvjitlink.tuning import DEFAULT_MAX_REGISTERS, tune_max_registers
+
+
+def _print_error(spec, error):
+    print(f"pynvjitlink: error: {spec}: {error}", file=sys.stderr)
+
+
+def _load_manifest(path):
+    # A manifest that can't be read is reported like a failed link
+    try:
+        return load_manifest(path)
+    except Exception as e:
+        _print_error(path, e)
+        return None
+
+
+def _link_command(args):
+    if args.manifest is not None:
+        if args.inputs or args.output:
+            print(
+                "pynvjitlink: error: inputs and --output can't be used with "
+                "--manifest",
+                file=sys.stderr,
+            )
+            return 2
+        specs = _load_manifest(args.manifest)
+        if specs is None:
+            return 1
+    else:
+        if not args.inputs or args.output is None:
+            print(
+                "pynvjitlink: error: inputs and --output are required",
+                file=sys.stderr,
+            )
+            return 2
+        options = list(args.option)
+        if args.arch is not None:
+            options.insert(0, _arch_option(args.arch))
+        if args.lto:
+            options.append("-lto")
+        specs = [LinkSpec(options, args.inputs, args.output)]
+
+    def report(spec, outcome, error):
+        if error is not None:
+            _print_error(spec, error)
+        elif args.verbose and outcome[1]:
+            print(f"{spec}:\n{outcome[1]}")
+
+    errors = run_links(specs, args.jobs, report)
+    return 1 if any(errors) else 0
+
+
+def _warm_command(args):
+    if get_link_cache() is None:
+        print(
+            "pynvjitlink: error: a link result cache is required (--cache-dir, "
+            "$PYNVJITLINK_CACHE_DIR or $PYNVJITLINK_CACHE_URL)",
+            file=sys.stderr,
+        )
+        return 2
+
+    def report(spec, status, error):
+        if error is not None:
+            _print_error(spec, error)
+        elif args.verbose:
+            print(f"{spec}: {status}")
+
+    specs = _load_manifest(args.manifest)
+    if specs is None:
+        return 1
+    results = warm_link_cache(specs, args.jobs, report)
+    statuses = [status for status, _ in results]
+    print(
+        f"{len(specs)} links: {statuses.count('present')} already cached, "
+        f"{statuses.count('linked')} linked, {statuses.count('failed')} failed"
+    )
+    return 1 if "failed" in statuses else 0
+
+
+def _format_change(before, after):
+    if before <= 0:
+        return "-"
+    return f"{(after - before) / before:+.1%}"
+
+
+def _replay_command(args):
+    version = nvjitlink_version()
+    regressions = 0
+
+    def report(result):
+        nonlocal regressions
+        capture = result.capture
+        name = os.path.splitext(os.path.basename(capture.path))[0]
+        if result.error is not None and capture.error is None:
+            regressions += 1
+            _print_error(name, result.error)
+            return
+        before = capture.add_time + capture.link_time
+        after = result.add_time + result.link_time
+        status = "" if capture.error is None else " (failed)"
+        print(
+            f"{name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms "
+            f"({_format_change(before, after)}){status}"
+        )
+
+    results = replay_captures(args.capture_dir, args.jobs, args.repeat, report)
+    before = sum(r.capture.add_time + r.capture.link_time for r in results)
+    after = sum(r.add_time + r.link_time for r in results)
+    print(
+        f"{len(results)} links: {before:.3f} s -> {after:.3f} s "
+        f"({_format_change(before, after)})"
+    )
+    versions = {r.capture.version for r in results} - {version}
+    if versions:
+        captured = ", ".join(".".join(map(str, v)) for v in sorted(versions))
+        print(
+            f"Links were captured with nvJitLink {captured}; replayed with "
+            f"{'.'.join(map(str, version))}"
+        )
+    return 1 if regressions else 0
+
+
+def _max_registers(value):
+    return tuple(None if limit == "-" else int(limit) for limit in value.split(","))
+
+
+def _tune_command(args):
+    try:
+        options = LinkOptions(args.arch, lto=args.lto, extra=args.option)
+        inputs = [member for path in args.inputs for member in _load_input(path)]
+        report = tune_max_registers(
+            options,
+            inputs,
+            args.kernel,
+            args.max_registers,
+            args.optimization_level or (None,),
+            args.block_size,
+            args.jobs,
+        )
+    except Exception as e:
+        _print_error(", ".join(args.inputs), e)
+        return 1
+
+    print(f"{report.kernel} (sm_{report.arch}, {report.block_size} threads):")
+    print(report.table())
+    if args.output is not None:
+        with open(args.output, "wb") as f:
+            f.write(report.cubin)
+    return 0
+
+
+def _add_common_arguments(parser):
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of links to run at once (default: the number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory of the link result cache (default: $PYNVJITLINK_CACHE_DIR)",
+    )
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m pynvjitlink", description="Link CUDA code with nvJitLink."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    link = subparsers.add_parser(
+        "link",
+        help="link input files",
+        description="Link input files, or run the links in a manifest. Input "
+        "types are inferred from their extensions (.cubin, .ptx, .ltoir, "
+        ".fatbin, .o, .a, or .pnjl for archives).",
+    )
+    link.add_argument("inputs", nargs="*", help="files to link")
+    link.add_argument("-o", "--output", help="output file (.cubin or .ptx)")
+    link.add_argument("--arch", help="target architecture, e.g. sm_80")
+    link.add_argument("--lto", action="store_true", help="link time optimization")
+    link.add_argument(
+        "-X",
+        "--option",
+        action="append",
+        default=[],
+        help="nvJitLink option, e.g. --option=-ftz=true (repeatable)",
+    )
+    link.add_argument("--manifest", help="JSON manifest of links to run")
+    link.add_argument("-v", "--verbose", action="store_true", help="print info logs")
+    _add_common_arguments(link)
+    link.set_defaults(run=_link_command)
+
+    warm = subparsers.add_parser(
+        "warm",
+        help="link a manifest into the cache",
+        description="Run the links in a manifest that are not already in the "
+        "link result cache, storing their results in the cache.",
+    )
+    warm.add_argument("manifest", help="JSON manifest of links to run")
+    warm.add_argument(
+        "-v", "--verbose", action="store_true", help="print the status of each link"
+    )
+    _add_common_arguments(warm)
+    warm.set_defaults(run=_warm_command)
+
+    replay = subparsers.add_parser(
+        "replay",
+        help="replay captured links",
+        description="Run the links captured in a directory (with "
+        "$PYNVJITLINK_CAPTURE_DIR) again, and compare how long they take with "
+        "how long they took when they were captured.",
+    )
+    replay.add_argument("capture_dir", help="directory of captured links")
+    replay.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of links to replay at once (default: 1)",
+    )
+    replay.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="run each link this many times, keeping the fastest (default: 1)",
+    )
+    replay.set_defaults(run=_replay_command, cache_dir=None)
+
+    tune = subparsers.add_parser(
+        "tune",
+        help="choose the register limit of a kernel",
+        description="Link input files with several register limits (and "
+        "optimization levels), and rank the results by spills and estimated "
+        "occupancy.",
+    )
+    tune.add_argument("inputs", nargs="+", help="files to link")
+    tune.add_argument("--arch", required=True, help="target architecture, e.g. sm_80")
+    tune.add_argument("--lto", action="store_true", help="link time optimization")
+    tune.add_argument("--kernel", help="kernel to tune, if the link has several")
+    tune.add_argument(
+        "--max-registers",
+        type=_max_registers,
+        default=DEFAULT_MAX_REGISTERS,
+        help="comma-separated register limits to try, - for no limit",
+    )
+    tune.add_argument(
+        "-O",
+        "--optimization-level",
+        type=int,
+        action="append",
+        help="optimization level to try (repeatable)",
+    )
+    tune.add_argument(
+        "--block-size", type=int, help="threads per block to estimate occupancy for"
+    )
+    tune.add_argument(
+        "-X",
+        "--option",
+        action="append",
+        default=[],
+        help="nvJitLink option, e.g. --option=-ftz=1 (repeatable)",
+    )
+    tune.add_argument("-o", "--output", help="write the best cubin to this file")
+    _add_common_arguments(tune)
+    tune.set_defaults(run=_tune_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.cache_dir is not None:
+        set_link_cache(LinkResultCache(DirectoryBackend(args.cache_dir)))
+    return args.run(args)
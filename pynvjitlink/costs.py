@@ -0,0 +1,137 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Attributing the time and bytes spent linking Numba kernels to the kernels
+# and to the code they link, to find which kernels and libraries are the most
+# expensive to link.
+
+import threading
+from collections import deque, namedtuple
+
+# The kind of inputs compiled by NVRTC before they are linked
+NVRTC = "cu"
+
+# A step in adding an input to a link: compiling CUDA C/C++ source with NVRTC
+# (kind "cu", whose size is the size of the source) or adding an input of
+# another kind to the linker
+InputCost = namedtuple("InputCost", ["kind", "name", "size", "time"])
+
+# The cost of an input summed over every link that added it
+InputSummary = namedtuple("InputSummary", ["kind", "name", "links", "size", "time"])
+
+
+class LinkCost:
+    """The time spent on each step of linking a kernel with PatchedLinker,
+    and the size of its inputs and output."""
+
+    def __init__(self, kernel, cc, lto):
+        self.kernel = kernel
+        self.cc = cc
+        self.lto = lto
+        self.inputs = []
+        self.complete_time = 0.0
+        self.output_size = 0
+        self.failed = False
+
+    @property
+    def nvrtc_time(self):
+        return sum(i.time for i in self.inputs if i.kind == NVRTC)
+
+    @property
+    def add_time(self):
+        return sum(i.time for i in self.inputs if i.kind != NVRTC)
+
+    @property
+    def total_time(self):
+        return self.nvrtc_time + self.add_time + self.complete_time
+
+    @property
+    def input_size(self):
+        return sum(i.size for i in self.inputs if i.kind != NVRTC)
+
+    def __repr__(self):
+        return (
+            f"<LinkCost {self.kernel} sm_{self.cc[0]}{self.cc[1]}: "
+            f"{self.total_time * 1000:.1f} ms, {len(self.inputs)} inputs>"
+        )
+
+
+class LinkCostReport:
+    """Collects the LinkCosts of the kernels linked by PatchedLinker, keeping
+    the most recent ``maxlen`` of them."""
+
+    def __init__(self, maxlen=10000):
+        self._lock = threading.Lock()
+        self._links = deque(maxlen=maxlen)
+
+    def record(self, cost):
+        with self._lock:
+            self._links.append(cost)
+
+    def clear(self):
+        with self._lock:
+            self._links.clear()
+
+    @property
+    def links(self):
+        with self._lock:
+            return list(self._links)
+
+    def slowest(self, n=10):
+        """Return the ``n`` links that took the longest, slowest first."""
+        return sorted(self.links, key=lambda c: c.total_time, reverse=True)[:n]
+
+    def _input_summaries(self):
+        summaries = {}
+        for cost in self.links:
+            for item in cost.inputs:
+                key = item.kind, item.name
+                links, size, time = summaries.get(key, (0, 0, 0.0))
+                summaries[key] = links + 1, size + item.size, time + item.time
+        return [InputSummary(*key, *value) for key, value in summaries.items()]
+
+    def largest_inputs(self, n=10):
+        """Return InputSummary tuples for the ``n`` inputs of which the most
+        bytes were linked, over all the links that added them."""
+        summaries = self._input_summaries()
+        return sorted(summaries, key=lambda s: s.size, reverse=True)[:n]
+
+    def slowest_inputs(self, n=10):
+        """Return InputSummary tuples for the ``n`` inputs that took the
+        longest to compile and add, over all the links that added them."""
+        summaries = self._input_summaries()
+        return sorted(summaries, key=lambda s: s.time, reverse=True)[:n]
+
+    def split(self):
+        """Return the total time in seconds spent compiling with NVRTC,
+        adding inputs, and completing links, as a dict."""
+        links = self.links
+        return {
+            "nvrtc": sum(c.nvrtc_time for c in links),
+            "add": sum(c.add_time for c in links),
+            "complete": sum(c.complete_time for c in links),
+        }
+
+    def format(self, n=10):
+        """Return a text summary of the time split, the slowest links and
+        the largest inputs."""
+        split = self.split()
+        lines = [
+            f"{len(self.links)} links: "
+            + ", ".join(f"{step} {time:.3f} s" for step, time in split.items()),
+            "",
+            "Slowest links:",
+        ]
+        for cost in self.slowest(n):
+            lines.append(
+                f"  {cost.total_time * 1000:9.1f} ms  {cost.kernel} "
+                f"(nvrtc {cost.nvrtc_time * 1000:.1f} ms, "
+                f"add {cost.add_time * 1000:.1f} ms, "
+                f"complete {cost.complete_time * 1000:.1f} ms)"
+            )
+        lines += ["", "Largest inputs:"]
+        for summary in self.largest_inputs(n):
+            lines.append(
+                f"  {summary.size:12d} B  {summary.name} ({summary.kind}, "
+                f"{summary.links} links, {summary.time * 1000:.1f} ms)"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,243 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Reading the resource usage of the functions in a cubin from its ELF
+# sections, without loading it on a device.
+#
+# Each function has a .text.<name> section, the top byte of whose sh_info is
+# its register count. Its static shared memory is the size of its
+# .nv.shared.<name> section. Other properties are attributes ("EIATTRs") in
+# the .nv.info section, keyed by symbol, and in the .nv.info.<name> section of
+# each function. An attribute is a format byte, an attribute byte, and then:
+#
+#   format 1: two bytes of padding
+#   format 2: a byte value and a byte of padding
+#   format 3: a two-byte value
+#   format 4: a two-byte size and that many bytes of value
+
+import struct
+from collections import namedtuple
+
+from pynvjitlink.api import NvJitLinkError
+
+_ELF_HEADER = struct.Struct("<16sHHIQQQIHHHHHH")
+_SECTION = struct.Struct("<IIQQQQIIQQ")
+_SYMBOL = struct.Struct("<IBBHQQ")
+_ATTRIBUTE = struct.Struct("<BBH")
+
+_ELFCLASS64 = 2
+_EM_CUDA = 190
+_SHT_SYMTAB = 2
+_STT_FUNC = 2
+_STO_CUDA_ENTRY = 0x10
+
+# From ABI version 8 (sm_100 onwards) the SM is in the second byte of e_flags
+_ABI_VERSION_V2 = 8
+
+_EIFMT_SVAL = 4
+_EIATTR_MAX_THREADS = 0x05
+_EIATTR_REQNTID = 0x10
+_EIATTR_FRAME_SIZE = 0x11
+_EIATTR_CBANK_PARAM_SIZE = 0x19
+_EIATTR_MAX_STACK_SIZE = 0x23
+_EIATTR_REGCOUNT = 0x2F
+
+FunctionInfo = namedtuple(
+    "FunctionInfo",
+    [
+        "name",
+        "kernel",
+        "size",
+        "registers",
+        "shared_memory",
+        "local_memory",
+        "stack_size",
+        "param_size",
+        "max_threads",
+    ],
+)
+
+
+class CubinInfo:
+    """The target architecture and functions of a cubin."""
+
+    def __init__(self, arch, functions):
+        self.arch = arch
+        self.functions = functions
+
+    @property
+    def kernels(self):
+        return [f for f in self.functions if f.kernel]
+
+    @property
+    def device_functions(self):
+        return [f for f in self.functions if not f.kernel]
+
+    def __getitem__(self, name):
+        for function in self.functions:
+            if function.name == name:
+                return function
+        raise KeyError(name)
+
+    def __repr__(self):
+        return (
+            f"<CubinInfo sm_{self.arch}: {len(self.kernels)} kernels, "
+            f"{len(self.device_functions)} device functions>"
+        )
+
+
+def _string(table, offset):
+    # Reads a null-terminated string from a string table section
+    end = offset
+    while end < len(table) and table[end]:
+        end += 1
+    if end >= len(table):
+        raise NvJitLinkError("Corrupt cubin: name out of bounds")
+    try:
+        return bytes(table[offset:end]).decode()
+    except UnicodeDecodeError:
+        raise NvJitLinkError("Corrupt cubin: name is not UTF-8")
+
+
+def _attributes(data):
+    # Yields (attribute, value) for the attributes in a .nv.info section
+    offset = 0
+    while offset + _ATTRIBUTE.size <= len(data):
+        fmt, attribute, value = _ATTRIBUTE.unpack_from(data, offset)
+        offset += _ATTRIBUTE.size
+        if fmt == _EIFMT_SVAL:
+            if offset + value > len(data):
+                raise NvJitLinkError("Corrupt cubin: attribute out of bounds")
+            yield attribute, data[offset : offset + value]
+            offset += value
+        else:
+            yield attribute, value
+
+
+def _unpack_value(fmt, value):
+    # Attributes with a struct value are only valid with a long enough one
+    if not isinstance(value, memoryview) or len(value) < struct.calcsize(fmt):
+        raise NvJitLinkError("Corrupt cubin: invalid attribute value")
+    return struct.unpack_from(fmt, value)
+
+
+def _threads(value):
+    x, y, z = _unpack_value("<III", value)
+    return x * y * z
+
+
+def read_cubin(data):
+    """Read the architecture and the resources used by each function of a
+    cubin, such as one returned by NvJitLinker.get_linked_cubin().
+
+    Returns a CubinInfo, with a FunctionInfo tuple for each function. Its
+    ``kernel`` field is whether the function is a kernel rather than a device
+    function and ``size`` is the size of its code. ``shared_memory`` is its
+    static shared memory in bytes, including any reserved by the system (1KB
+    per block from sm_90 on, in linked cubins). ``local_memory`` is the size
+    of its stack frame per thread, which holds local arrays and spilled
+    registers, and ``stack_size`` the most stack used by the device functions
+    it calls. ``param_size`` and ``max_threads`` (the maximum threads per
+    block given by launch bounds or ``.maxntid``) are ``None`` for device
+    functions, and ``max_threads`` also for kernels without launch bounds.
+
+    The cubin is parsed in place, without copying it.
+    """
+    data = memoryview(data).cast("B")
+    if len(data) < _ELF_HEADER.size or bytes(data[:4]) != b"\x7fELF":
+        raise NvJitLinkError("Not a cubin: not an ELF file")
+    ident, _, machine, _, _, _, shoff, flags, *_, shnum, shstrndx = (
+        _ELF_HEADER.unpack_from(data)
+    )
+    if ident[4] != _ELFCLASS64 or machine != _EM_CUDA:
+        raise NvJitLinkError("Not a cubin: not a 64-bit CUDA ELF file")
+    if shoff + shnum * _SECTION.size > len(data):
+        raise NvJitLinkError("Truncated cubin")
+
+    if ident[8] >= _ABI_VERSION_V2:
+        arch = (flags >> 8) & 0xFF
+    else:
+        arch = flags & 0xFF
+
+    sections = [
+        _SECTION.unpack_from(data, shoff + i * _SECTION.size) for i in range(shnum)
+    ]
+
+    def contents(section):
+        offset, size = section[4], section[5]
+        if offset + size > len(data):
+            raise NvJitLinkError("Truncated cubin")
+        return data[offset : offset + size]
+
+    def linked_section(index):
+        if index >= len(sections):
+            raise NvJitLinkError(f"Corrupt cubin: invalid section index {index}")
+        return contents(sections[index])
+
+    names = linked_section(shstrndx)
+    sections_by_name = {}
+    symtab = None
+    for section in sections:
+        name = _string(names, section[0])
+        sections_by_name[name] = section
+        if section[1] == _SHT_SYMTAB:
+            symtab = section
+    if symtab is None:
+        raise NvJitLinkError("Cubin has no symbol table")
+
+    # Attributes in .nv.info are keyed by symbol index
+    per_symbol = {}
+    if ".nv.info" in sections_by_name:
+        for attribute, value in _attributes(contents(sections_by_name[".nv.info"])):
+            if attribute in (
+                _EIATTR_REGCOUNT,
+                _EIATTR_FRAME_SIZE,
+                _EIATTR_MAX_STACK_SIZE,
+            ):
+                symbol, amount = _unpack_value("<II", value)
+                per_symbol[symbol, attribute] = amount
+
+    strtab = linked_section(symtab[6])
+    symbols = contents(symtab)
+    functions = []
+    for index in range(len(symbols) // _SYMBOL.size):
+        name_offset, info, other, shndx, _, size = _SYMBOL.unpack_from(
+            symbols, index * _SYMBOL.size
+        )
+        if info & 0xF != _STT_FUNC:
+            continue
+        name = _string(strtab, name_offset)
+        kernel = bool(other & _STO_CUDA_ENTRY)
+
+        registers = per_symbol.get((index, _EIATTR_REGCOUNT))
+        if registers is None and shndx < len(sections):
+            registers = sections[shndx][7] >> 24
+
+        shared = sections_by_name.get(f".nv.shared.{name}")
+        param_size = max_threads = None
+        if kernel:
+            param_size = 0
+            info_section = sections_by_name.get(f".nv.info.{name}")
+            attributes = _attributes(contents(info_section)) if info_section else ()
+            for attribute, value in attributes:
+                if attribute == _EIATTR_CBANK_PARAM_SIZE:
+                    param_size = value
+                elif attribute == _EIATTR_MAX_THREADS:
+                    max_threads = _threads(value)
+                elif attribute == _EIATTR_REQNTID and max_threads is None:
+                    max_threads = _threads(value)
+
+        functions.append(
+            FunctionInfo(
+                name,
+                kernel,
+                size,
+                registers,
+                shared[5] if shared is not None else 0,
+                per_symbol.get((index, _EIATTR_FRAME_SIZE), 0),
+                per_symbol.get((index, _EIATTR_MAX_STACK_SIZE), 0),
+                param_size,
+                max_threads,
+            )
+        )
+
+    return CubinInfo(arch, functions)
@@ -0,0 +1,300 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pynvjitlink.api import (
+    InputType,
+    NvJitLinker,
+    NvJitLinkError,
+    _complete_link,
+    get_link_cache,
+)
+from pynvjitlink.archive import ARCHIVE_EXTENSION
+from pynvjitlink.capture import load_captures
+from pynvjitlink.library import LinkLibrary
+
+
+class LinkSpec:
+    """A link of input files to an output file.
+
+    Inputs are paths to files, whose types are inferred from their extensions,
+    or to archives, all of whose inputs are linked. The output is PTX if
+    ``output_type`` is ``"ptx"``, or if it is not given and the output path
+    ends in ``.ptx``; otherwise it is a cubin. If ``output`` is ``None`` the
+    result of the link is not written anywhere.
+    """
+
+    def __init__(self, options, inputs, output=None, output_type=None):
+        self.options = list(options)
+        self.inputs = [os.fspath(path) for path in inputs]
+        self.output = None if output is None else os.fspath(output)
+        if output_type is None:
+            if self.output is not None and self.output.endswith(".ptx"):
+                output_type = "ptx"
+            else:
+                output_type = "cubin"
+        self.output_type = output_type
+
+    def __repr__(self):
+        return f"<LinkSpec {' '.join(self.options)} {self.inputs} -> {self.output}>"
+
+    def __str__(self):
+        return self.output or ", ".join(self.inputs)
+
+
+def _arch_name(arch):
+    arch = str(arch)
+    if not arch.startswith(("sm_", "compute_", "lto_")):
+        arch = f"sm_{arch}"
+    return arch
+
+
+def _arch_option(arch):
+    return f"-arch={_arch_name(arch)}"
+
+
+def load_manifest(path):
+    """Read a list of LinkSpecs from a JSON manifest.
+
+    The manifest is a list of jobs, or an object with a ``"jobs"`` list. Each
+    job is an object with ``"inputs"`` (a list of paths), and optionally
+    ``"options"`` (a list of nvJitLink options), ``"arch"`` (e.g. ``"sm_80"``
+    or ``80``), ``"output"`` (a path) and ``"output_type"``. Relative paths are
+    relative to the directory of the manifest.
+
+    A job may give a list of ``"archs"`` instead of one ``"arch"``, to link
+    its inputs for each of them. Its output path must then contain
+    ``{arch}``, which is replaced by the name of each arch.
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, dict):
+        manifest = manifest["jobs"]
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return os.path.join(directory, os.path.expanduser(p))
+
+    specs = []
+    for job in manifest:
+        inputs = [resolve(p) for p in job["inputs"]]
+        output = job.get("output")
+        if "archs" in job:
+            archs = [_arch_name(arch) for arch in job["archs"]]
+            if output is not None and len(archs) > 1 and "{arch}" not in output:
+                raise ValueError(
+                    f"Output {output} of a job for several archs must contain {{arch}}"
+                )
+        elif "arch" in job:
+            archs = [_arch_name(job["arch"])]
+        else:
+            archs = [None]
+
+        for arch in archs:
+            options = list(job.get("options", ()))
+            if arch is not None:
+                options.insert(0, f"-arch={arch}")
+            spec_output = output
+            if output is not None:
+                spec_output = resolve(output.replace("{arch}", arch or ""))
+            specs.append(LinkSpec(options, inputs, spec_output, job.get("output_type")))
+    return specs
+
+
+def _load_input(path):
+    if path.endswith(ARCHIVE_EXTENSION):
+        return list(LinkLibrary.from_archive(path))
+    return [LinkLibrary().add_file(path)]
+
+
+class _InputLoader:
+    # Loads each input file once, however many links use it, so that the
+    # files are only mapped and digested once.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            future = self._loaded.get(path)
+            loader = future is None
+            if loader:
+                future = self._loaded[path] = Future()
+        if loader:
+            try:
+                future.set_result(_load_input(path))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def _make_linker(spec, loader):
+    linker = NvJitLinker(*spec.options)
+    for path in spec.inputs:
+        linker.add_link_library(loader.load(path))
+    return linker
+
+
+def run_link(spec, loader=None):
+    """Run a link, writing its output to the output path of the spec.
+
+    Returns a tuple of the linked output and the info log. Links are completed
+    through the link result cache, if one is configured.
+    """
+    if loader is None:
+        loader = _InputLoader()
+
+    linker = _make_linker(spec, loader)
+    if spec.output_type == "ptx":
+        result = linker.get_linked_ptx()
+    else:
+        result = linker.get_linked_cubin()
+
+    if spec.output is not None:
+        directory = os.path.dirname(spec.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(spec.output, "wb") as f:
+            f.write(result)
+
+    return result, linker.info_log
+
+
+def run_concurrently(fn, items, jobs=None, scheduler=None, priority=None):
+    """Call ``fn`` with each item in up to ``jobs`` threads (by default, one
+    per CPU), or in a LinkScheduler with a priority class, returning a list of
+    the results in order.
+
+    Each call runs in a single thread, so a link that ``fn`` creates can be
+    completed by it, as nvJitLink requires.
+    """
+    if scheduler is not None:
+        return scheduler.map(fn, items, priority)
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        return list(executor.map(fn, items))
+
+
+def run_links(specs, jobs=None, callback=None, scheduler=None, priority=None):
+    """Run links concurrently in up to ``jobs`` threads (by default, one per
+    CPU), or in a LinkScheduler with a priority class.
+
+    Returns a list with the exception raised by each link, or ``None`` if it
+    succeeded, in the order of the specs. If given, ``callback(spec, outcome,
+    error)`` is called from the worker thread as each link finishes, where
+    ``outcome`` is the return value of run_link().
+    """
+    loader = _InputLoader()
+
+    def run(spec):
+        try:
+            outcome = run_link(spec, loader)
+        except Exception as e:
+            outcome, error = None, e
+        else:
+            error = None
+        if callback is not None:
+            callback(spec, outcome, error)
+        return error
+
+    return run_concurrently(run, specs, jobs, scheduler, priority)
+
+
+def warm_link_cache(specs, jobs=None, callback=None, scheduler=None, priority=None):
+    """Link specs concurrently into the link result cache, so that later
+    links of the same inputs and options are read from the cache.
+
+    Links whose results are already in the cache are not run again. Returns a
+    list with a tuple of the status of each spec (``"present"``, ``"linked"``
+    or ``"failed"``) and the exception of a failed link, or ``None``. Output
+    paths of the specs are ignored. If given, ``callback(spec, status,
+    error)`` is called as each link finishes. Warming the cache in a
+    LinkScheduler with a low priority class keeps it from delaying other
+    links.
+    """
+    cache = get_link_cache()
+    if cache is None:
+        raise NvJitLinkError("No link result cache is configured")
+    loader = _InputLoader()
+
+    def run(spec):
+        error = None
+        try:
+            linker = _make_linker(spec, loader)
+            if cache.contains(linker.fingerprint(spec.output_type)):
+                status = "present"
+            elif spec.output_type == "ptx":
+                linker.get_linked_ptx()
+                status = "linked"
+            else:
+                linker.get_linked_cubin()
+                status = "linked"
+        except Exception as e:
+            status, error = "failed", e
+        if callback is not None:
+            callback(spec, status, error)
+        return status, error
+
+    return run_concurrently(run, specs, jobs, scheduler, priority)
+
+
+ReplayResult = namedtuple("ReplayResult", ["capture", "add_time", "link_time", "error"])
+
+
+def replay_capture(capture):
+    """Run a CapturedLink again, returning a ReplayResult with the time taken
+    to add its inputs and complete it, and the error message if it failed.
+
+    The link is run directly in nvJitLink, bypassing the link result cache,
+    so that it is always timed.
+    """
+    inputs = []
+    for input_type, path, name in capture.inputs:
+        with open(path, "rb") as f:
+            inputs.append((InputType(input_type), f.read(), name))
+
+    add_time = link_time = 0.0
+    error = None
+    try:
+        linker = NvJitLinker(*capture.options)
+        start = time.perf_counter()
+        for input_type, data, name in inputs:
+            linker.add_data(input_type, data, name)
+        add_time = time.perf_counter() - start
+        start = time.perf_counter()
+        _, _, failure = _complete_link(linker.handle, capture.output)
+        link_time = time.perf_counter() - start
+        if failure is not None:
+            error = failure[0]
+    except NvJitLinkError as e:
+        error = str(e)
+    return ReplayResult(capture, add_time, link_time, error)
+
+
+def replay_captures(path, jobs=1, repeat=1, callback=None):
+    """Replay the links captured in a directory, in up to ``jobs`` threads
+    (by default one, so that links don't compete for CPUs and their timings
+    are comparable to the captured ones).
+
+    Each link is run ``repeat`` times, and the fastest run is kept. Returns a
+    list of ReplayResult tuples in the order the links were captured. If
+    given, ``callback(result)`` is called as each link finishes.
+    """
+    if repeat < 1:
+        raise ValueError(f"Invalid repeat count {repeat}")
+
+    def run(capture):
+        results = [replay_capture(capture) for _ in range(repeat)]
+        result = min(results, key=lambda r: r.add_time + r.link_time)
+        if callback is not None:
+            callback(result)
+        return result
+
+    return run_concurrently(run, load_captures(path), jobs)
@@ -0,0 +1,185 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Reading and writing fatbins: containers of cubins and PTX for several
+# architectures, from which the driver (or nvJitLink) picks the best code for
+# the device it loads them on.
+#
+# A fatbin is a header followed by entries. Each entry has a header and its
+# payload, which is padded so that the next entry is 8-byte aligned.
+#
+# Header:  magic (I), version (H), header size (H), size of the entries (Q)
+# Entry:   kind (H), version (H), header size (I), payload size (Q),
+#          compressed size (I), address size (I), code minor version (H),
+#          code major version (H), arch (I), name offset (I), name size (I),
+#          flags (Q), reserved (Q), uncompressed size (Q)
+#
+# PTX entries extend the entry header with the offset (I) and size (I) of the
+# ptxas options to JIT compile them with, followed by the options, padded to
+# 8 bytes. The code version of a PTX entry is its PTX ISA version; cubin
+# entries use version 1.7. All integers are little-endian.
+
+import re
+import struct
+from collections import namedtuple
+
+from pynvjitlink.api import NvJitLinkError
+
+_MAGIC = 0xBA55ED50
+_VERSION = 1
+_HEADER = struct.Struct("<IHHQ")
+_ENTRY = struct.Struct("<HHIQIIHHIIIQQQ")
+_ENTRY_VERSION = 0x0101
+_PTX_OPTIONS = struct.Struct("<II")
+
+_KIND_PTX = 1
+_KIND_CUBIN = 2
+_KINDS = {_KIND_PTX: "ptx", _KIND_CUBIN: "cubin"}
+
+_FLAG_64BIT = 0x1
+_FLAG_DEBUG = 0x2
+_FLAG_LINUX = 0x10
+_FLAG_COMPRESSED = 0x2000
+
+_CUBIN_CODE_VERSION = (1, 7)
+_PTX_VERSION_RE = re.compile(rb"^\s*\.version\s+(\d+)\.(\d+)", re.MULTILINE)
+
+FatbinEntry = namedtuple(
+    "FatbinEntry", ["kind", "arch", "code_version", "compressed", "data"]
+)
+
+
+def _sm_version(arch):
+    # Accepts 80, "80", "sm_80", "compute_80" or (8, 0)
+    if isinstance(arch, tuple):
+        return arch[0] * 10 + arch[1]
+    if isinstance(arch, str):
+        arch = arch.rsplit("_", 1)[-1]
+        # Architecture-specific variants such as sm_90a share the base SM
+        arch = arch.rstrip("af")
+    try:
+        return int(arch)
+    except ValueError:
+        raise NvJitLinkError(f"Invalid architecture {arch!r}")
+
+
+def _ptx_version(ptx):
+    match = _PTX_VERSION_RE.search(ptx)
+    if match is None:
+        raise NvJitLinkError("PTX has no .version directive")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _entry(kind, arch, data):
+    if kind == _KIND_PTX:
+        if isinstance(data, str):
+            data = data.encode()
+        data = bytes(data).rstrip(b"\0")
+        major, minor = _ptx_version(data)
+        # PTX is loaded as a NUL-terminated string
+        data += b"\0"
+        # No ptxas options, which still take 8 bytes of padding
+        options_offset = _ENTRY.size + _PTX_OPTIONS.size
+        extension = _PTX_OPTIONS.pack(options_offset, 0) + bytes(8)
+        address_size = 64
+    else:
+        data = bytes(data)
+        if data[:4] != b"\x7fELF":
+            raise NvJitLinkError(f"Cubin for sm_{arch} is not an ELF file")
+        major, minor = _CUBIN_CODE_VERSION
+        extension = b""
+        address_size = 0
+
+    padding = -len(data) % 8
+    header = _ENTRY.pack(
+        kind,
+        _ENTRY_VERSION,
+        _ENTRY.size + len(extension),
+        len(data) + padding,
+        0,
+        address_size,
+        minor,
+        major,
+        arch,
+        0,
+        0,
+        _FLAG_64BIT | _FLAG_LINUX,
+        0,
+        0,
+    )
+    return b"".join((header, extension, data, bytes(padding)))
+
+
+def make_fatbin(cubins, ptx=None):
+    """Create a fatbin from a mapping of architectures to cubins, and
+    optionally a mapping of architectures to PTX.
+
+    Architectures may be given as SM versions (``80``), names (``"sm_80"``)
+    or compute capabilities (``(8, 0)``). Including PTX lets the driver JIT
+    compile code for devices newer than any of the cubins.
+    """
+    entries = [_entry(_KIND_CUBIN, _sm_version(a), c) for a, c in cubins.items()]
+    if ptx is not None:
+        entries.extend(_entry(_KIND_PTX, _sm_version(a), p) for a, p in ptx.items())
+    if not entries:
+        raise NvJitLinkError("A fatbin needs at least one cubin or PTX")
+
+    entries = b"".join(entries)
+    header = _HEADER.pack(_MAGIC, _VERSION, _HEADER.size, len(entries))
+    return header + entries
+
+
+def write_fatbin(path, cubins, ptx=None):
+    """Write a fatbin created by make_fatbin() to a file."""
+    with open(path, "wb") as f:
+        f.write(make_fatbin(cubins, ptx))
+
+
+def read_fatbin(data):
+    """Read the entries of a fatbin.
+
+    Returns a list of FatbinEntry tuples, with the kind (``"cubin"`` or
+    ``"ptx"``), SM version, code version and payload of each entry. Payloads
+    of compressed entries are returned as they are stored. Fatbins produced
+    by ``nvcc -fatbin`` may contain several of these containers back to back,
+    which are all read.
+    """
+    data = memoryview(data).cast("B")
+    entries = []
+    offset = 0
+    while offset < len(data):
+        if offset + _HEADER.size > len(data):
+            raise NvJitLinkError("Truncated fatbin header")
+        magic, version, header_size, size = _HEADER.unpack_from(data, offset)
+        if magic != _MAGIC:
+            raise NvJitLinkError("Not a fatbin: bad magic number")
+        if version != _VERSION:
+            raise NvJitLinkError(f"Unsupported fatbin version {version}")
+        position = offset + header_size
+        end = position + size
+        if end > len(data):
+            raise NvJitLinkError("Truncated fatbin")
+
+        while position < end:
+            if position + _ENTRY.size > end:
+                raise NvJitLinkError("Truncated fatbin entry")
+            fields = _ENTRY.unpack_from(data, position)
+            kind, _, entry_header_size, payload_size = fields[:4]
+            minor, major, arch = fields[6:9]
+            flags = fields[11]
+            start = position + entry_header_size
+            if start + payload_size > end:
+                raise NvJitLinkError("Truncated fatbin entry")
+            payload = bytes(data[start : start + payload_size])
+            compressed = bool(flags & _FLAG_COMPRESSED)
+            if kind == _KIND_PTX and not compressed:
+                payload = payload.rstrip(b"\0")
+            entries.append(
+                FatbinEntry(
+                    _KINDS.get(kind, kind), arch, (major, minor), compressed, payload
+                )
+            )
+            position = start + payload_size
+
+        offset = end
+
+    return entries
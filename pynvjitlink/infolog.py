@@ -0,0 +1,120 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Parsing the resource usage of each function from the info log of a link with
+# the -verbose option. ptxas reports on each function it compiles:
+#
+#   ptxas info    : Compiling entry function 'k' for 'sm_80'
+#   ptxas info    : Function properties for k
+#   ptxas         .     8 bytes stack frame, 4 bytes spill stores, 4 bytes ...
+#   ptxas info    : Used 32 registers, used 1 barriers, 256 bytes smem, ...
+#   ptxas info    : Compile time = 1.640 ms
+#
+# and the linker then summarizes the kernels in the linked output:
+#
+#   info    : Function properties for 'k':
+#   info    : used 32 registers, used 1 barriers, 8 stack, 256 bytes smem, ...
+
+import re
+from collections import namedtuple
+
+FunctionUsage = namedtuple(
+    "FunctionUsage",
+    [
+        "name",
+        "kernel",
+        "arch",
+        "registers",
+        "barriers",
+        "stack_frame",
+        "spill_stores",
+        "spill_loads",
+        "shared_memory",
+        "local_memory",
+        "constant_memory",
+        "compile_time",
+    ],
+)
+
+_ENTRY = re.compile(r"Compiling entry function '([^']+)' for '(\w+)'")
+_PROPERTIES = re.compile(r"Function properties for (?:'([^']+)'|(\S+?)):?$")
+_FRAME = re.compile(
+    r"(\d+) bytes stack frame, (\d+) bytes spill stores, (\d+) bytes spill loads"
+)
+_REGISTERS = re.compile(r"\b[Uu]sed (\d+) registers")
+_BARRIERS = re.compile(r"\bused (\d+) barriers")
+_STACK = re.compile(r"\b(\d+) stack\b")
+_SHARED = re.compile(r"\b(\d+) bytes smem")
+_LOCAL = re.compile(r"\b(\d+) bytes lmem")
+_CONSTANT = re.compile(r"\b(\d+) bytes cmem\[(\d+)\]")
+_COMPILE_TIME = re.compile(r"Compile time = ([\d.]+) ms")
+
+
+def _new_usage(name):
+    usage = dict.fromkeys(FunctionUsage._fields)
+    usage.update(name=name, kernel=False, constant_memory={})
+    return usage
+
+
+def parse_info_log(info_log):
+    """Parse the resource usage of each function from an info log.
+
+    Returns a dict mapping function names to FunctionUsage tuples, in the
+    order the functions appear in the log. Fields that the log doesn't report
+    for a function are ``None``; ``arch`` is the SM ptxas compiled it for
+    (e.g. ``"sm_80"``), ``constant_memory`` is a dict of the bytes used in
+    each constant bank, and ``compile_time`` is in seconds. Nothing is
+    reported unless the link used the ``-verbose`` option.
+    """
+    functions = {}
+    current = None
+
+    def function(name):
+        if name not in functions:
+            functions[name] = _new_usage(name)
+        return functions[name]
+
+    for line in info_log.rstrip("\0").splitlines():
+        line = line.strip()
+        match = _ENTRY.search(line)
+        if match:
+            current = function(match.group(1))
+            current.update(kernel=True, arch=match.group(2))
+            continue
+        match = _PROPERTIES.search(line)
+        if match:
+            current = function(match.group(1) or match.group(2))
+            continue
+        if current is None:
+            continue
+
+        match = _FRAME.search(line)
+        if match:
+            frame, stores, loads = map(int, match.groups())
+            current.update(stack_frame=frame, spill_stores=stores, spill_loads=loads)
+            continue
+        match = _COMPILE_TIME.search(line)
+        if match:
+            current["compile_time"] = float(match.group(1)) / 1000
+            continue
+
+        match = _REGISTERS.search(line)
+        if match is None:
+            continue
+        current["registers"] = int(match.group(1))
+        match = _BARRIERS.search(line)
+        if match:
+            current["barriers"] = int(match.group(1))
+            # Barrier counts are only reported for kernels
+            current["kernel"] = True
+        match = _STACK.search(line)
+        if match and current["stack_frame"] is None:
+            current["stack_frame"] = int(match.group(1))
+        match = _SHARED.search(line)
+        current["shared_memory"] = int(match.group(1)) if match else 0
+        match = _LOCAL.search(line)
+        if match:
+            current["local_memory"] = int(match.group(1))
+        for size, bank in _CONSTANT.findall(line):
+            current["constant_memory"][int(bank)] = int(size)
+
+    return {name: FunctionUsage(**usage) for name, usage in functions.items()}
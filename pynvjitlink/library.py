@@ -0,0 +1,237 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import hashlib
+import mmap
+import os
+
+from pynvjitlink.api import InputType, NvJitLinkError
+from pynvjitlink.archive import read_archive_index, write_archive
+from pynvjitlink.cache import input_digest
+
+# Input types by file extension, for inputs added without an explicit type
+_INPUT_TYPES_BY_EXTENSION = {
+    ".cubin": InputType.CUBIN,
+    ".ptx": InputType.PTX,
+    ".ltoir": InputType.LTOIR,
+    ".fatbin": InputType.FATBIN,
+    ".o": InputType.OBJECT,
+    ".a": InputType.LIBRARY,
+    ".lib": InputType.LIBRARY,
+}
+
+# The magic numbers that inputs of each type start with
+_MAGIC = {
+    InputType.CUBIN: b"\x7fELF",
+    InputType.LTOIR: b"\xed\x43\x4e\x7f",
+    InputType.FATBIN: b"\x50\xed\x55\xba",
+    InputType.OBJECT: b"\x7fELF",
+    InputType.LIBRARY: b"!<arch>\n",
+}
+
+
+def guess_input_type(path):
+    """Return the InputType of a file from its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        return _INPUT_TYPES_BY_EXTENSION[extension]
+    except KeyError:
+        raise NvJitLinkError(f"Don't know how to link {path}")
+
+
+def validate_input(input_type, data, name):
+    """Check that data looks like an input of the given type, raising
+    NvJitLinkError if it does not.
+
+    This only checks the magic number of binary inputs, which catches
+    mistaken types and truncated or empty files before they reach nvJitLink.
+    """
+    data = memoryview(data).cast("B")
+    if not isinstance(input_type, InputType) or input_type is InputType.NONE:
+        raise NvJitLinkError(f"Invalid input type {input_type} for {name}")
+    if data.nbytes == 0:
+        raise NvJitLinkError(f"{name} is empty")
+    magic = _MAGIC.get(input_type)
+    if magic is not None and data[: len(magic)] != magic:
+        raise NvJitLinkError(f"{name} is not a valid {input_type.name} input")
+
+
+def _is_null_terminated(data):
+    # Bytes are always followed by a null byte, so a view of a whole bytes
+    # object is terminated, as is data that ends with one
+    if isinstance(data.obj, bytes) and data.nbytes == len(data.obj):
+        return True
+    return data.nbytes > 0 and data.cast("B")[-1] == 0
+
+
+class LibraryMember:
+    """An input of a LinkLibrary."""
+
+    def __init__(self, name, input_type, data, digest, arch=None):
+        self.name = name
+        self.input_type = input_type
+        self.data = data
+        self.digest = digest
+        self.arch = arch
+
+    def __repr__(self):
+        return (
+            f"<LibraryMember {self.name!r} {self.input_type.name} "
+            f"{self.data.nbytes} bytes>"
+        )
+
+
+class LinkLibrary:
+    """A set of link inputs that are loaded once and added to many links.
+
+    Files are memory-mapped rather than read, and each input is validated and
+    digested when it is added to the library. Adding the library to a linker
+    with NvJitLinker.add_link_library() passes the mapped data straight to
+    nvJitLink, and its fingerprint reuses the digests of the inputs instead of
+    hashing them again. The exception is PTX, which nvJitLink reads up to a
+    null byte rather than by its size, so PTX that isn't followed by one is
+    copied into the library once.
+
+    Inputs are kept in the order they were added, which is the order they are
+    added to links, and can be looked up by name. Inputs built for a specific
+    architecture can be tagged with its SM version, e.g. ``arch=80``, to
+    select them with members().
+
+    A library can be saved to and loaded from a single archive file with
+    write_archive() and from_archive(). Loading an archive maps it once and
+    reads only its index; the data of its inputs other than PTX is not read
+    or copied.
+    """
+
+    def __init__(self, paths=(), name=None):
+        self.name = name or "<unnamed-library>"
+        self._members = {}
+        for path in paths:
+            self.add_file(path)
+
+    @classmethod
+    def from_archive(cls, path, names=None, verify=False):
+        """Load a library from an archive file."""
+        library = cls(name=os.path.basename(path))
+        library.add_archive(path, names, verify)
+        return library
+
+    def add_file(self, path, input_type=None, name=None, arch=None):
+        """Map a file into the library.
+
+        The type of the input is guessed from the extension of the file if it
+        is not given, and its name defaults to the name of the file.
+        """
+        path = os.fspath(path)
+        if input_type is None:
+            input_type = guess_input_type(path)
+        name = name or os.path.basename(path)
+
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                # Empty files can't be mapped, but are rejected as invalid
+                if size == 0:
+                    data = memoryview(b"")
+                else:
+                    data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except OSError as e:
+            raise NvJitLinkError(f"Cannot load {path}: {e}")
+
+        return self._add(input_type, data, name, arch=arch)
+
+    def add_data(self, input_type, data, name, arch=None):
+        """Add an input from memory to the library."""
+        return self._add(input_type, memoryview(data).toreadonly(), name, arch=arch)
+
+    def add_archive(self, path, names=None, verify=False):
+        """Add the inputs of an archive file, or only those with the given
+        names.
+
+        The digests stored in the archive are trusted unless ``verify`` is
+        true, in which case the data of every input added is hashed again.
+        """
+        data, entries = read_archive_index(path)
+        if names is not None:
+            by_name = {entry.name: entry for entry in entries}
+            missing = [name for name in names if name not in by_name]
+            if missing:
+                raise NvJitLinkError(f"{path} does not contain {', '.join(missing)}")
+            entries = [by_name[name] for name in names]
+
+        for entry in entries:
+            end = entry.offset + entry.size
+            member_data = data[entry.offset : end]
+            digest = entry.digest
+            if verify and input_digest(member_data) != digest:
+                raise NvJitLinkError(f"{entry.name} in {path} is corrupt")
+            # PTX is followed by a null byte in archives, outside of its size
+            terminated = end < data.nbytes and data[end] == 0
+            self._add(
+                entry.input_type,
+                member_data,
+                entry.name,
+                digest,
+                entry.arch,
+                terminated,
+            )
+
+    def write_archive(self, path):
+        """Write the inputs of the library to an archive file."""
+        write_archive(path, self)
+
+    def _add(self, input_type, data, name, digest=None, arch=None, terminated=False):
+        if name in self._members:
+            raise NvJitLinkError(f"{self.name} already contains {name}")
+        validate_input(input_type, data, name)
+        terminated = terminated or _is_null_terminated(data)
+        if input_type is InputType.PTX and not terminated:
+            # Copied into bytes, which are followed by a null byte, so that
+            # nvJitLink doesn't read past the end of a mapping or a slice
+            data = memoryview(bytes(data))
+        if digest is None:
+            digest = input_digest(data)
+        member = LibraryMember(name, input_type, data, digest, arch)
+        self._members[name] = member
+        return member
+
+    def members(self, input_type=None, arch=None):
+        """Return the members of the library, optionally only those of one
+        type or for one architecture.
+
+        Inputs that are not tagged with an architecture are included for any
+        architecture.
+        """
+        return [
+            m
+            for m in self._members.values()
+            if (input_type is None or m.input_type is input_type)
+            and (arch is None or m.arch is None or m.arch == arch)
+        ]
+
+    @property
+    def digest(self):
+        """A digest of the types and contents of the inputs of the library."""
+        h = hashlib.sha256()
+        for member in self._members.values():
+            h.update(f"{member.input_type.value}:{member.data.nbytes}:".encode())
+            h.update(member.digest)
+        return h.hexdigest()
+
+    @property
+    def nbytes(self):
+        return sum(m.data.nbytes for m in self._members.values())
+
+    def __getitem__(self, name):
+        return self._members[name]
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def __iter__(self):
+        return iter(self._members.values())
+
+    def __len__(self):
+        return len(self._members)
+
+    def __repr__(self):
+        return f"<LinkLibrary {self.name!r} with {len(self)} inputs>"
@@ -0,0 +1,299 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Counters and histograms of the links run by this process, exported in the
+# Prometheus text format by generate_metrics() or an HTTP endpoint started
+# with start_metrics_server().
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pynvjitlink.cache import input_size
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Link durations in seconds, from small PTX links to large LTO links
+_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes the labels {', '.join(self.labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labels:
+            values[()] = self._initial()
+        for key, value in sorted(values.items()):
+            yield from self._format(key, value)
+
+    def _format(self, key, value):
+        yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+    def _initial(self):
+        return 0
+
+    def generate(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A count that only increases, such as the number of links run."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    """A value that goes up and down, such as the number of links running."""
+
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """The distribution of observed values, such as link durations, counted
+    in buckets of values up to each bound."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=_DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = (*sorted(buckets), float("inf"))
+
+    def _initial(self):
+        # Counts of each bucket, then the sum of the observed values
+        return [0] * len(self.buckets) + [0.0]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial()
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-1] += value
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-2] if state else 0
+
+    def _format(self, key, state):
+        for bound, count in zip(self.buckets, state):
+            labels = _format_labels(self.labels, key, [("le", _format_value(bound))])
+            yield f"{self.name}_bucket{labels} {count}"
+        labels = _format_labels(self.labels, key)
+        yield f"{self.name}_sum{labels} {_format_value(state[-1])}"
+        yield f"{self.name}_count{labels} {state[-2]}"
+
+
+links_started = Counter(
+    "pynvjitlink_links_started_total",
+    "Links started by nvJitLink, by target architecture and input types.",
+    ["arch", "input_types"],
+)
+links_completed = Counter(
+    "pynvjitlink_links_completed_total",
+    "Links that completed successfully.",
+    ["arch", "input_types"],
+)
+links_failed = Counter(
+    "pynvjitlink_links_failed_total",
+    "Links that failed, timed out or were cancelled.",
+    ["arch", "input_types"],
+)
+links_in_flight = Gauge(
+    "pynvjitlink_links_in_flight", "Links currently running in nvJitLink."
+)
+link_duration = Histogram(
+    "pynvjitlink_link_duration_seconds",
+    "Time taken to complete links, by target architecture.",
+    ["arch"],
+)
+link_input_bytes = Counter(
+    "pynvjitlink_link_input_bytes_total",
+    "Bytes of input linked, by input type.",
+    ["input_type"],
+)
+link_output_bytes = Counter(
+    "pynvjitlink_link_output_bytes_total",
+    "Bytes of linked output, by output type.",
+    ["output"],
+)
+link_cache_hits = Counter(
+    "pynvjitlink_link_cache_hits_total",
+    "Links whose result was read from the link result cache.",
+)
+link_cache_misses = Counter(
+    "pynvjitlink_link_cache_misses_total",
+    "Links that were run because their result was not in the link result cache.",
+)
+links_coalesced = Counter(
+    "pynvjitlink_links_coalesced_total",
+    "Links that shared the result of an identical link in flight.",
+)
+
+scheduler_queued = Gauge(
+    "pynvjitlink_scheduler_queued",
+    "Jobs waiting in a LinkScheduler, by priority class.",
+    ["priority"],
+)
+scheduler_running = Gauge(
+    "pynvjitlink_scheduler_running",
+    "Jobs running in a LinkScheduler, by priority class.",
+    ["priority"],
+)
+scheduler_jobs = Counter(
+    "pynvjitlink_scheduler_jobs_total",
+    "Jobs finished by a LinkScheduler, by priority class and outcome "
+    "(completed, failed or cancelled).",
+    ["priority", "outcome"],
+)
+scheduler_queue_time = Histogram(
+    "pynvjitlink_scheduler_queue_seconds",
+    "Time jobs waited in a LinkScheduler before starting, by priority class.",
+    ["priority"],
+)
+
+
+_metrics = [
+    links_started,
+    links_completed,
+    links_failed,
+    links_in_flight,
+    link_duration,
+    link_input_bytes,
+    link_output_bytes,
+    link_cache_hits,
+    link_cache_misses,
+    links_coalesced,
+    scheduler_queued,
+    scheduler_running,
+    scheduler_jobs,
+    scheduler_queue_time,
+]
+
+
+def _link_labels(options, inputs):
+    arch = "unknown"
+    for option in options:
+        if option.startswith("-arch="):
+            arch = option[len("-arch=") :]
+    input_types = ",".join(sorted({t.name.lower() for t, _, _ in inputs}))
+    return {"arch": arch, "input_types": input_types}
+
+
+@contextmanager
+def measure_link(options, inputs):
+    """Context manager that counts a link of the given options and inputs as
+    started, and as completed or failed when it exits. It yields a function
+    to call with the output type and outcome of the link, as returned by
+    _complete_link(); links that exit without calling it are counted as
+    failed."""
+    labels = _link_labels(options, inputs)
+    links_started.inc(**labels)
+    for input_type, data, _ in inputs:
+        link_input_bytes.inc(input_size(data), input_type=input_type.name.lower())
+
+    outcomes = []
+
+    def record(output, outcome):
+        outcomes.append((output, outcome))
+
+    links_in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        links_in_flight.dec()
+        link_duration.observe(time.perf_counter() - start, arch=labels["arch"])
+        if outcomes and outcomes[-1][1][2] is None:
+            output, (result, _, _) = outcomes[-1]
+            links_completed.inc(**labels)
+            link_output_bytes.inc(len(result), output=output)
+        else:
+            links_failed.inc(**labels)
+
+
+def generate_metrics():
+    """Return the link metrics of this process in the Prometheus text
+    format."""
+    return "\n".join(metric.generate() for metric in _metrics) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = generate_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=0, address="127.0.0.1"):
+    """Serve the link metrics at ``/metrics`` on a port (by default, any free
+    port) from a background thread, for Prometheus to scrape.
+
+    Returns the server, whose ``server_address`` is the address and port it
+    listens on and whose ``shutdown()`` method stops it. It only listens on
+    the local host unless another address is given.
+    """
+    server = ThreadingHTTPServer((address, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,189 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import os
+import re
+from collections import namedtuple
+
+from pynvjitlink.capabilities import get_capabilities
+
+_ARCH_RE = re.compile(r"^(sm|compute|lto)_\d+[af]?$")
+
+# default_split_compile() splits LTO links across at most this many threads
+_MAX_SPLIT_COMPILE_THREADS = 8
+
+# Options that only make links faster: the option probed to find out whether
+# nvJitLink supports each of them, and the value that leaves it out
+_SPEED_UP_OPTIONS = {
+    "split_compile": ("-split-compile=2", 1),
+    "kernels_used": ("-kernels-used=_", ()),
+    "variables_used": ("-variables-used=_", ()),
+}
+
+
+def _available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_split_compile():
+    """A number of threads to split an LTO link across, which PatchedLinker
+    uses for Numba's LTO links: half of the CPUs available to the process,
+    leaving the rest for other links, and at most 8."""
+    return max(1, min(_MAX_SPLIT_COMPILE_THREADS, _available_cpus() // 2))
+
+
+def _arch(arch):
+    # Accepts (8, 0), 80, "80", "sm_80", "compute_80" or "lto_80"
+    if isinstance(arch, (tuple, list)):
+        major, minor = arch
+        arch = f"sm_{major}{minor}"
+    arch = str(arch)
+    if arch.isdigit():
+        arch = f"sm_{arch}"
+    if not _ARCH_RE.match(arch):
+        raise ValueError(f"Invalid architecture {arch!r}")
+    return arch
+
+
+def _flag(name, value):
+    if value is not None and not isinstance(value, bool):
+        raise TypeError(f"{name} must be True, False or None")
+    return value
+
+
+def _names(names):
+    if isinstance(names, str):
+        return (names,)
+    return tuple(names)
+
+
+_FIELDS = [
+    "arch",
+    "lto",
+    "optimization_level",
+    "max_registers",
+    "lineinfo",
+    "debug",
+    "ftz",
+    "prec_div",
+    "prec_sqrt",
+    "fma",
+    "kernels_used",
+    "variables_used",
+    "split_compile",
+    "extra",
+]
+
+
+class LinkOptions(namedtuple("LinkOptions", _FIELDS)):
+    """The options of a link, validated when they are created.
+
+    ``arch`` may be given as a compute capability (``(8, 0)``), an SM version
+    (``80``) or a name (``"sm_80"``). ``ftz``, ``prec_div``, ``prec_sqrt`` and
+    ``fma`` are ``None`` for nvJitLink's defaults. ``split_compile`` is the
+    number of threads an LTO link may optimize and generate code with. It is
+    1 unless it is given, which doesn't split links, so that links running
+    concurrently don't oversubscribe the CPUs; 0 uses every CPU, and
+    default_split_compile() suits links that mostly run alone. ``extra`` holds any
+    further nvJitLink options.
+
+    LinkOptions are immutable and hashable, and equal options always produce
+    the same nvJitLink options, so they can be used in cache keys. They can
+    be passed to NvJitLinker in place of a list of option strings, which
+    leaves out those that nvJitLink doesn't support with supported().
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        arch,
+        *,
+        lto=False,
+        optimization_level=None,
+        max_registers=None,
+        lineinfo=False,
+        debug=False,
+        ftz=None,
+        prec_div=None,
+        prec_sqrt=None,
+        fma=None,
+        kernels_used=(),
+        variables_used=(),
+        split_compile=1,
+        extra=(),
+    ):
+        if optimization_level not in (None, 0, 1, 2, 3):
+            raise ValueError(f"Invalid optimization level {optimization_level!r}")
+        if max_registers is not None and max_registers < 0:
+            raise ValueError(f"Invalid maximum register count {max_registers}")
+        if split_compile < 0:
+            raise ValueError(f"Invalid split compile thread count {split_compile}")
+
+        return super().__new__(
+            cls,
+            _arch(arch),
+            bool(lto),
+            optimization_level,
+            max_registers or None,
+            bool(lineinfo),
+            bool(debug),
+            _flag("ftz", ftz),
+            _flag("prec_div", prec_div),
+            _flag("prec_sqrt", prec_sqrt),
+            _flag("fma", fma),
+            _names(kernels_used),
+            _names(variables_used),
+            split_compile,
+            tuple(extra),
+        )
+
+    def replace(self, **changes):
+        """Return a copy of these options with some fields changed."""
+        return type(self)(**dict(self._asdict(), **changes))
+
+    def supported(self, capabilities=None):
+        """Return these options without any options that only make links
+        faster (split compile, kernels and variables used) that nvJitLink
+        doesn't support, so that links still succeed with older versions of
+        nvJitLink."""
+        if capabilities is None:
+            capabilities = get_capabilities()
+        changes = {
+            field: disabled
+            for field, (probe, disabled) in _SPEED_UP_OPTIONS.items()
+            if getattr(self, field) != disabled
+            and not capabilities.supports_option(probe)
+        }
+        return self.replace(**changes) if changes else self
+
+    def as_options(self):
+        """Return the nvJitLink option strings for these options."""
+        options = [f"-arch={self.arch}"]
+        if self.lto:
+            options.append("-lto")
+        if self.optimization_level is not None:
+            options.append(f"-O{self.optimization_level}")
+        if self.max_registers:
+            options.append(f"-maxrregcount={self.max_registers}")
+        if self.lineinfo:
+            options.append("-lineinfo")
+        if self.debug:
+            options.append("-g")
+        for name, value in (
+            ("ftz", self.ftz),
+            ("prec-div", self.prec_div),
+            ("prec-sqrt", self.prec_sqrt),
+            ("fma", self.fma),
+        ):
+            # nvJitLink only accepts 0 and 1 for these
+            if value is not None:
+                options.append(f"-{name}={int(value)}")
+        options.extend(f"-kernels-used={name}" for name in self.kernels_used)
+        options.extend(f"-variables-used={name}" for name in self.variables_used)
+        if self.lto and self.split_compile != 1:
+            options.append(f"-split-compile={self.split_compile}")
+        options.extend(self.extra)
+        return tuple(options)
@@ -1,10 +1,19 @@
 # Copyright (c) 2023-2025, NVIDIA CORPORATION.
+import hashlib
 import os
 import pathlib
-from functools import partial
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 import importlib.util
 
-from pynvjitlink.api import NvJitLinker, NvJitLinkError
+from pynvjitlink.api import NvJitLinker, NvJitLinkError, nvjitlink_version
+from pynvjitlink.archive import ARCHIVE_EXTENSION
+from pynvjitlink.cache import input_chunks, input_size
+from pynvjitlink.costs import NVRTC, InputCost, LinkCost, LinkCostReport
+from pynvjitlink.library import LinkLibrary
+from pynvjitlink.options import LinkOptions, default_split_compile
 
 _numba_version_ok = False
 _numba_error = None
@@ -35,17 +44,19 @@ except ImportError as ie:
 if _numba_version_ok:
     from numba import cuda
     from numba.core import config
+    from numba.cuda.codegen import CUDACodeLibrary
     from numba.cuda.cudadrv import nvrtc
     from numba.cuda.cudadrv.driver import (
         FILE_EXTENSION_MAP,
         Linker,
         LinkerError,
-        driver,
     )
+    from numba.cuda.dispatcher import CUDACache, CUDADispatcher, _Kernel
 else:
     # Prevent the definition of PatchedLinker failing if we have no Numba
     # Linker - it won't be used anyway.
     Linker = object
+    CUDACache = object
 
 
 spec = importlib.util.find_spec("numba_cuda")
@@ -136,47 +147,68 @@ class PatchedLinker(Linker):
         cc=None,
         lto=False,
         additional_flags=None,
+        kernels_used=None,
+        kernel=None,
     ):
         if cc is None:
             raise RuntimeError("PatchedLinker requires CC to be specified")
         if not any(isinstance(cc, t) for t in [list, tuple]):
             raise TypeError("`cc` must be a list or tuple of length 2")
 
-        sm_ver = f"{cc[0] * 10 + cc[1]}"
-        arch = f"-arch=sm_{sm_ver}"
-        options = [arch]
-        if max_registers:
-            options.append(f"-maxrregcount={max_registers}")
-        if lineinfo:
-            options.append("-lineinfo")
-        if lto:
-            options.append("-lto")
-        if additional_flags is not None:
-            options.extend(additional_flags)
-
-        self._linker = NvJitLinker(*options)
+        link_options = _link_options(
+            tuple(cc), max_registers, lineinfo, lto, tuple(additional_flags or ())
+        )
+
+        # Only LTO links can drop code that is not used by the given kernels
+        if not lto:
+            kernels_used = None
+        self._linker = NvJitLinker(link_options, kernels_used=kernels_used or ())
+        self.cc = cc
         self.lto = lto
-        self.options = options
+        self.link_options = link_options
+        self.options = list(link_options.as_options())
+        # The time and bytes spent on each step of the link, attributed to the
+        # kernel being linked
+        self.cost = LinkCost(kernel, tuple(cc), lto)
+        # Once a CUDA source is being compiled, inputs are added when the link
+        # is completed, in the order they were given
+        self._pending = []
+
+    def _add(self, kind, fn, data, name):
+        if self._pending:
+            self._pending.append(partial(self._add, kind, fn, data, name))
+            return
+        start = time.perf_counter()
+        try:
+            fn(data, name)
+        finally:
+            self.cost.inputs.append(
+                InputCost(kind, name, input_size(data), time.perf_counter() - start)
+            )
 
     @property
     def info_log(self):
         return self._linker.info_log
 
+    @property
+    def resource_usage(self):
+        return self._linker.resource_usage
+
     @property
     def error_log(self):
         return self._linker.error_log
 
     def add_ptx(self, ptx, name="<cudapy-ptx>"):
-        self._linker.add_ptx(ptx, name)
+        self._add("ptx", self._linker.add_ptx, ptx, name)
 
     def add_fatbin(self, fatbin, name="<external-fatbin>"):
-        self._linker.add_fatbin(fatbin, name)
+        self._add("fatbin", self._linker.add_fatbin, fatbin, name)
 
     def add_ltoir(self, ltoir, name="<external-ltoir>"):
-        self._linker.add_ltoir(ltoir, name)
+        self._add("ltoir", self._linker.add_ltoir, ltoir, name)
 
     def add_object(self, obj, name="<external-object>"):
-        self._linker.add_object(obj, name)
+        self._add("object", self._linker.add_object, obj, name)
 
     def add_file_guess_ext(self, path_or_code):
         # Numba's add_file_guess_ext expects to always be passed a path to a
@@ -191,12 +223,18 @@ class PatchedLinker(Linker):
             extension = pathlib.Path(path_or_code).suffix
             if extension == ".ltoir":
                 self.add_file(path_or_code, "ltoir")
+            elif extension == ARCHIVE_EXTENSION:
+                self.add_archive(path_or_code)
             else:
                 # Use Numba's logic for non-LTOIR
                 super().add_file_guess_ext(path_or_code)
 
             return
 
+        if isinstance(path_or_code, LinkLibrary):
+            self.add_link_library(path_or_code)
+            return
+
         # Otherwise, we should have been given a LinkableCode object
         if not isinstance(path_or_code, LinkableCode):
             raise TypeError("Expected path to file or a LinkableCode object")
@@ -218,31 +256,58 @@ class PatchedLinker(Linker):
 
     def add_data(self, data, kind, name):
         if kind == FILE_EXTENSION_MAP["cubin"]:
-            fn = self._linker.add_cubin
+            fn, cost_kind = self._linker.add_cubin, "cubin"
         elif kind == FILE_EXTENSION_MAP["fatbin"]:
-            fn = self._linker.add_fatbin
+            fn, cost_kind = self._linker.add_fatbin, "fatbin"
         elif kind == FILE_EXTENSION_MAP["a"]:
-            fn = self._linker.add_library
+            fn, cost_kind = self._linker.add_library, "library"
         elif kind == FILE_EXTENSION_MAP["ptx"]:
             return self.add_ptx(data, name)
         elif kind == FILE_EXTENSION_MAP["o"]:
-            fn = self._linker.add_object
+            fn, cost_kind = self._linker.add_object, "object"
         elif kind == "ltoir":
-            fn = self._linker.add_ltoir
+            fn, cost_kind = self._linker.add_ltoir, "ltoir"
         else:
             raise LinkerError(f"Don't know how to link {kind}")
 
         try:
-            fn(data, name)
+            self._add(cost_kind, fn, data, name)
+        except NvJitLinkError as e:
+            raise LinkerError from e
+
+    def add_link_library(self, library, names=None):
+        # Unless members are chosen by name, only those for the target
+        # architecture (or for no particular architecture) are linked
+        if names is None:
+            members = library.members(arch=self.cc[0] * 10 + self.cc[1])
+        else:
+            members = [library[name] for name in names]
+        try:
+            for member in members:
+                add = partial(
+                    self._linker.add_data, member.input_type, digest=member.digest
+                )
+                self._add(member.input_type.name.lower(), add, member.data, member.name)
         except NvJitLinkError as e:
             raise LinkerError from e
 
+    def add_archive(self, path, names=None):
+        try:
+            library = LinkLibrary.from_archive(path, names)
+        except NvJitLinkError as e:
+            raise LinkerError from e
+        self.add_link_library(library, names)
+
     def add_cu(self, cu, name):
-        with driver.get_active_context() as ac:
-            dev = driver.get_device(ac.devnum)
-            cc = dev.compute_capability
+        # Sources are compiled concurrently by a pool of threads, so that a
+        # link of several sources waits for about as long as the slowest one.
+        # NVRTC doesn't hold the GIL while it compiles.
+        future = _nvrtc_executor().submit(_compile_cu, cu, name, self.cc)
+        self._pending.append(partial(self._add_compiled_cu, future, cu, name))
 
-        ptx, log = nvrtc.compile(cu, name, cc)
+    def _add_compiled_cu(self, future, cu, name):
+        ptx, compile_time = future.result()
+        self.cost.inputs.append(InputCost(NVRTC, name, input_size(cu), compile_time))
 
         if config.DUMP_ASSEMBLY:
             print((f"ASSEMBLY {name}").center(80, "-"))
@@ -251,15 +316,262 @@ class PatchedLinker(Linker):
 
         # Link the program's PTX using the normal linker mechanism
         ptx_name = os.path.splitext(name)[0] + ".ptx"
-        self.add_ptx(ptx.encode(), ptx_name)
+        self.add_ptx(ptx, ptx_name)
+
+    def _add_pending(self):
+        pending, self._pending = self._pending, []
+        for add in pending:
+            add()
 
     def complete(self):
         try:
-            cubin = self._linker.get_linked_cubin()
+            self._add_pending()
+            # Waiting for sources to compile is not part of completing the link
+            start = time.perf_counter()
+            try:
+                cubin = self._linker.get_linked_cubin()
+            finally:
+                self.cost.complete_time = time.perf_counter() - start
             self._linker._complete = True
+            self.cost.output_size = len(cubin)
             return cubin
         except NvJitLinkError as e:
+            self.cost.failed = True
             raise LinkerError from e
+        finally:
+            report = _link_cost_report
+            if report is not None:
+                report.record(self.cost)
+
+
+def _compile_cu(cu, name, cc):
+    # Compile for the target of the link rather than the current device,
+    # which may not be known in the thread doing the link
+    start = time.perf_counter()
+    ptx, log = nvrtc.compile(cu, name, cc)
+    return ptx, time.perf_counter() - start
+
+
+_nvrtc_pool = None
+_nvrtc_pool_lock = threading.Lock()
+
+
+def _nvrtc_executor():
+    global _nvrtc_pool
+    with _nvrtc_pool_lock:
+        if _nvrtc_pool is None:
+            _nvrtc_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count(), thread_name_prefix="pynvjitlink-nvrtc"
+            )
+        return _nvrtc_pool
+
+
+@lru_cache(maxsize=None)
+def _link_options(cc, max_registers, lineinfo, lto, additional_flags):
+    # Every kernel compiled with the same settings shares its LinkOptions. LTO
+    # links are split across a share of the CPUs, which doesn't change their
+    # fingerprints.
+    return LinkOptions(
+        cc,
+        lto=lto,
+        max_registers=max_registers,
+        lineinfo=lineinfo,
+        split_compile=default_split_compile() if lto else 1,
+        extra=additional_flags,
+    )
+
+
+def _link_digest(link, linker_kwargs, max_registers=None, lineinfo=False):
+    # Everything other than the kernel itself that affects the linked cubin:
+    # the contents of the linked files, the linker options and the version of
+    # nvJitLink.
+    h = hashlib.sha256()
+    h.update(repr(nvjitlink_version()).encode())
+    h.update(repr(sorted(linker_kwargs.items())).encode())
+    h.update(repr((max_registers, lineinfo)).encode())
+    for item in link or ():
+        if isinstance(item, LinkLibrary):
+            h.update(f"LinkLibrary:{item.digest}:".encode())
+            continue
+        if isinstance(item, str) and item.endswith(ARCHIVE_EXTENSION):
+            # The index of an archive has the digests of its inputs
+            try:
+                item = LinkLibrary.from_archive(item)
+            except NvJitLinkError:
+                pass
+            else:
+                h.update(f"LinkLibrary:{item.digest}:".encode())
+                continue
+        if isinstance(item, LinkableCode):
+            data = item.data
+            h.update(f"{type(item).__name__}:{item.name}:".encode())
+        else:
+            # A file that can't be read can't be linked, so a kernel linking it
+            # is never saved in the cache; its path still distinguishes it.
+            h.update(f"{os.fspath(item)}:".encode())
+            try:
+                with open(item, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = b""
+        h.update(f"{input_size(data)}:".encode())
+        for chunk in input_chunks(data):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PatchedCUDACache(CUDACache):
+    """A CUDACache for kernels linked by PatchedLinker.
+
+    The index keys of Numba's cache only cover the Python function, so they
+    also include a digest of the code linked into the kernel and the options
+    of the linker. Kernels are then reloaded from the cache only if they
+    would be linked from the same inputs.
+    """
+
+    def __init__(self, py_func, link=None, max_registers=None, lineinfo=False):
+        super().__init__(py_func)
+        self._link = list(link or ())
+        self._max_registers = max_registers
+        self._lineinfo = lineinfo
+
+    def _index_key(self, sig, codegen):
+        digest = _link_digest(
+            self._link, _linker_kwargs, self._max_registers, self._lineinfo
+        )
+        return super()._index_key(sig, codegen) + (digest,)
+
+
+def _enable_caching(self):
+    self._cache = PatchedCUDACache(
+        self.py_func,
+        link=self.targetoptions.get("link"),
+        max_registers=self.targetoptions.get("max_registers"),
+        lineinfo=self.targetoptions.get("lineinfo", False),
+    )
+
+
+def _reduce_states(self):
+    # Numba refuses to pickle code libraries with linking files, because the
+    # files are not pickled with them. Once the cubin is linked the files are
+    # no longer needed, so the library can be pickled without them.
+    for cc in list(getattr(self, "_pending_links", ())):
+        _wait_for_link(self, cc)
+    if not self._linking_files or not self._cubin_cache:
+        return _original_reduce_states(self)
+    linking_files = self._linking_files
+    self._linking_files = set()
+    try:
+        return _original_reduce_states(self)
+    finally:
+        self._linking_files = linking_files
+
+
+def _start_background_link(library, cc):
+    # The kernel's code is generated in this thread, because Numba does not
+    # use NVVM concurrently; only the link runs in the background. The
+    # background link creates its linker in the worker thread, because a link
+    # must be completed in the thread that created it.
+    if _linker_kwargs.get("lto"):
+        library.get_ltoir(cc=cc)
+    else:
+        library.get_asm_str(cc=cc)
+    with _background_lock:
+        if not hasattr(library, "_pending_links"):
+            library._pending_links = {}
+        if cc in library._cubin_cache or cc in library._pending_links:
+            return
+        future = _link_executor.submit(_link_cubin, library, cc)
+        library._pending_links[cc] = future
+
+
+def _wait_for_link(library, cc):
+    # Errors from a background link are raised here, and the next request for
+    # the cubin links again.
+    with _background_lock:
+        future = getattr(library, "_pending_links", {}).get(cc)
+    if future is None:
+        return
+    try:
+        future.result()
+    finally:
+        with _background_lock:
+            if library._pending_links.get(cc) is future:
+                del library._pending_links[cc]
+
+
+def _link_cubin(library, cc):
+    # The linker is created by Numba, which doesn't tell it which kernel it
+    # links, so the kernel is recorded for new_patched_linker() to find.
+    previous = (
+        getattr(_link_context, "kernels_used", None),
+        getattr(_link_context, "kernel", None),
+    )
+    entry_name = getattr(library, "_entry_name", None)
+    _link_context.kernels_used = [entry_name] if entry_name else None
+    # Numba names the library of a kernel after the function's qualified name
+    name = getattr(library, "name", None)
+    _link_context.kernel = name.removesuffix("_kernel_") if name else None
+    try:
+        return _original_get_cubin(library, cc)
+    finally:
+        _link_context.kernels_used, _link_context.kernel = previous
+
+
+def _get_cubin(self, cc=None):
+    cc = self._ensure_cc(cc)
+    _wait_for_link(self, cc)
+    return _link_cubin(self, cc)
+
+
+def _get_linkerinfo(self, cc):
+    _wait_for_link(self, cc)
+    return _original_get_linkerinfo(self, cc)
+
+
+def _bind(self):
+    # In background mode, binding a kernel only starts linking it. The cubin
+    # is waited for when the kernel is first loaded or launched.
+    if _link_executor is None:
+        return _original_bind(self)
+    library = self._codelibrary
+    _start_background_link(library, library._ensure_cc(None))
+
+
+# The keyword arguments of PatchedLinker set by patch_numba_linker(), which
+# are part of the cache keys of kernels
+_linker_kwargs = {}
+
+# The kernels of the code library being linked in each thread
+_link_context = threading.local()
+
+# The costs of the kernels linked, if enabled by patch_numba_linker()
+_link_cost_report = None
+
+# The executor running background links, if enabled by patch_numba_linker()
+_link_executor = None
+_background_lock = threading.Lock()
+
+_original_reduce_states = None
+_original_get_cubin = None
+_original_get_linkerinfo = None
+_original_bind = None
+
+
+def _install_patches():
+    global _original_reduce_states, _original_get_cubin
+    global _original_get_linkerinfo, _original_bind
+    if _original_reduce_states is not None:
+        return
+
+    _original_reduce_states = CUDACodeLibrary._reduce_states
+    _original_get_cubin = CUDACodeLibrary.get_cubin
+    _original_get_linkerinfo = CUDACodeLibrary.get_linkerinfo
+    _original_bind = _Kernel.bind
+    CUDACodeLibrary._reduce_states = _reduce_states
+    CUDACodeLibrary.get_cubin = _get_cubin
+    CUDACodeLibrary.get_linkerinfo = _get_linkerinfo
+    _Kernel.bind = _bind
 
 
 def new_patched_linker(
@@ -271,10 +583,30 @@ def new_patched_linker(
         cc=cc,
         lto=lto,
         additional_flags=additional_flags,
+        kernels_used=getattr(_link_context, "kernels_used", None),
+        kernel=getattr(_link_context, "kernel", None),
     )
 
 
-def patch_numba_linker(*, lto=False):
+def get_link_cost_report():
+    """Return the LinkCostReport of the kernels linked since Numba was
+    patched with ``cost_report=True``, or ``None`` if it wasn't."""
+    return _link_cost_report
+
+
+def patch_numba_linker(*, lto=False, background=False, cost_report=False):
+    """Patch Numba to link with nvJitLink.
+
+    If ``background`` is true, kernels are linked by a pool of worker threads
+    (``os.cpu_count()`` of them, or ``background`` if it is an int), so that
+    compiling further kernels overlaps with linking. A kernel's cubin is
+    waited for when it is first loaded or launched, and link errors are
+    raised then rather than when the kernel is compiled.
+
+    If ``cost_report`` is true, the time spent compiling CUDA C/C++ sources
+    with NVRTC, adding each input, and completing the link of each kernel is
+    collected in a LinkCostReport, returned by get_link_cost_report().
+    """
     if not _numba_version_ok:
         msg = f"Cannot patch Numba: {_numba_error}"
         raise RuntimeError(msg)
@@ -286,6 +618,28 @@ def patch_numba_linker(*, lto=False):
     # Replace the built-in linker that uses the Driver API with our linker that
     # uses nvJitLink
     Linker.new = partial(new_patched_linker, lto=lto)
+    _linker_kwargs.clear()
+    _linker_kwargs.update(lto=lto)
+
+    # Allow kernels with linked code to be saved in the on-disk cache, keyed
+    # by the linked code as well as the kernel, and link in the background if
+    # requested
+    _install_patches()
+    CUDADispatcher.enable_caching = _enable_caching
+
+    global _link_cost_report
+    _link_cost_report = LinkCostReport() if cost_report else None
+
+    global _link_executor
+    if _link_executor is not None:
+        _link_executor.shutdown(wait=False)
+        _link_executor = None
+    if background:
+        if background is True:
+            background = os.cpu_count()
+        _link_executor = ThreadPoolExecutor(
+            max_workers=background, thread_name_prefix="pynvjitlink-link"
+        )
 
     # Add linkable code objects to Numba's top-level API
     cuda.Archive = Archive
@@ -0,0 +1,213 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from pynvjitlink import metrics
+from pynvjitlink.api import NvJitLinker
+from pynvjitlink.options import LinkOptions
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class _Job:
+    def __init__(self, fn, args, kwargs, priority):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class LinkScheduler:
+    """Runs links in a pool of worker threads, by priority.
+
+    Each job is submitted with a priority class. ``classes`` maps the names
+    of the classes to the most jobs of that class that may run at once
+    (``None`` for no limit other than the number of workers), highest
+    priority first. By default there are two classes: ``"interactive"``,
+    which may use every worker, and ``"background"``, which may use half of
+    them, so that interactive links always have workers to run on.
+
+    A free worker runs the oldest job of the highest priority class that is
+    under its limit. Jobs are not interrupted once they start, so an
+    interactive job waits at most for a running job to finish, never for
+    queued background jobs.
+
+    Each job runs in one worker thread, so a link created by a job can be
+    completed by it, as nvJitLink requires.
+    """
+
+    def __init__(self, workers=None, classes=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"Invalid worker count {workers}")
+        if classes is None:
+            classes = {INTERACTIVE: None, BACKGROUND: max(1, workers // 2)}
+        if not classes:
+            raise ValueError("A scheduler needs at least one priority class")
+        for name, limit in classes.items():
+            if limit is not None and limit < 1:
+                raise ValueError(f"Invalid concurrency limit {limit} for {name}")
+
+        self.workers = workers
+        self.classes = dict(classes)
+        self._cv = threading.Condition()
+        self._queues = {name: deque() for name in self.classes}
+        self._running = dict.fromkeys(self.classes, 0)
+        self._completed = dict.fromkeys(self.classes, 0)
+        self._cancelled = dict.fromkeys(self.classes, 0)
+        self._total_wait_time = dict.fromkeys(self.classes, 0.0)
+        self._max_wait_time = dict.fromkeys(self.classes, 0.0)
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(
+                target=self._work, name=f"pynvjitlink-scheduler-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _next_job(self):
+        # Called with the lock held
+        for name, limit in self.classes.items():
+            queue = self._queues[name]
+            if queue and (limit is None or self._running[name] < limit):
+                return queue.popleft()
+        return None
+
+    def _work(self):
+        while True:
+            with self._cv:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown and not any(self._queues.values()):
+                        return
+                    self._cv.wait()
+                    job = self._next_job()
+                # Jobs cancelled while they were queued are dropped
+                run = job.future.set_running_or_notify_cancel()
+                if run:
+                    self._running[job.priority] += 1
+                    wait_time = time.perf_counter() - job.submitted
+                    self._total_wait_time[job.priority] += wait_time
+                    self._max_wait_time[job.priority] = max(
+                        self._max_wait_time[job.priority], wait_time
+                    )
+                else:
+                    self._cancelled[job.priority] += 1
+            metrics.scheduler_queued.dec(priority=job.priority)
+            if not run:
+                metrics.scheduler_jobs.inc(priority=job.priority, outcome="cancelled")
+                continue
+            metrics.scheduler_queue_time.observe(wait_time, priority=job.priority)
+
+            metrics.scheduler_running.inc(priority=job.priority)
+            try:
+                result, error = job.fn(*job.args, **job.kwargs), None
+            except BaseException as e:
+                result, error = None, e
+            metrics.scheduler_running.dec(priority=job.priority)
+            metrics.scheduler_jobs.inc(
+                priority=job.priority,
+                outcome="completed" if error is None else "failed",
+            )
+
+            # The job is counted as completed before its result is available
+            with self._cv:
+                self._running[job.priority] -= 1
+                self._completed[job.priority] += 1
+                # A job of a class that was at its limit may be able to run
+                self._cv.notify_all()
+
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    def submit(self, fn, *args, priority=None, **kwargs):
+        """Schedule ``fn(*args, **kwargs)`` to run with a priority class (by
+        default, the highest), returning a Future of its result."""
+        if priority is None:
+            priority = next(iter(self.classes))
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority class {priority!r}")
+        job = _Job(fn, args, kwargs, priority)
+        with self._cv:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit jobs after shutdown")
+            self._queues[priority].append(job)
+            self._cv.notify()
+        metrics.scheduler_queued.inc(priority=priority)
+        return job.future
+
+    def submit_link(self, options, inputs, output="cubin", priority=None):
+        """Schedule a link of ``(input_type, data, name)`` inputs with a
+        LinkOptions or a list of options, returning a Future of the linked
+        ``"cubin"`` or ``"ptx"``."""
+        if isinstance(options, LinkOptions):
+            options = [options]
+        inputs = list(inputs)
+
+        def link():
+            linker = NvJitLinker(*options)
+            for input_type, data, name in inputs:
+                linker.add_data(input_type, data, name)
+            if output == "ptx":
+                return linker.get_linked_ptx()
+            return linker.get_linked_cubin()
+
+        return self.submit(link, priority=priority)
+
+    def map(self, fn, iterable, priority=None):
+        """Schedule ``fn`` for each item of ``iterable`` with a priority
+        class, and return a list of their results in order, raising the
+        first exception raised by any of them."""
+        futures = [self.submit(fn, item, priority=priority) for item in iterable]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """Return a dict of statistics about the jobs of each priority
+        class. Jobs that ran are counted as completed, whether they raised an
+        exception or not, and jobs cancelled before they started as
+        cancelled."""
+        with self._cv:
+            return {
+                name: {
+                    "limit": limit,
+                    "queued": len(self._queues[name]),
+                    "running": self._running[name],
+                    "completed": self._completed[name],
+                    "cancelled": self._cancelled[name],
+                    "total_wait_time": self._total_wait_time[name],
+                    "max_wait_time": self._max_wait_time[name],
+                }
+                for name, limit in self.classes.items()
+            }
+
+    def shutdown(self, wait=True, cancel_queued=False):
+        """Stop accepting jobs. Queued jobs still run unless
+        ``cancel_queued`` is true, in which case they are cancelled."""
+        with self._cv:
+            self._shutdown = True
+            if cancel_queued:
+                for queue in self._queues.values():
+                    for job in queue:
+                        job.future.cancel()
+            self._cv.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
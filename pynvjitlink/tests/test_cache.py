@@ -0,0 +1,594 @@
+# Copyright (c) 2025, NVIDIA CORPORATION. All rights reserved.
+
+import contextlib
+import hashlib
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch as mock_patch
+
+import pytest
+from pynvjitlink import NvJitLinker, NvJitLinkError, api
+from pynvjitlink import cache as cache_module
+from pynvjitlink.api import NvJitLinkTimeoutError
+from pynvjitlink.cache import (
+    CacheServer,
+    DirectoryBackend,
+    HTTPBackend,
+    LinkResultCache,
+    MemoryBackend,
+    NegativeCache,
+    SharedDirectoryBackend,
+    SingleFlight,
+    input_digest,
+)
+
+
+def test_single_flight_sequential_calls_not_coalesced():
+    group = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(None)
+        return len(calls)
+
+    assert group.do("key", fn) == (1, True)
+    assert group.do("key", fn) == (2, True)
+    assert group.in_flight() == 0
+
+
+def test_single_flight_concurrent_calls_coalesced():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(None)
+        release.wait()
+        return "result"
+
+    def call():
+        results.append(group.do("key", fn))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while group.in_flight() == 0:
+        time.sleep(0.01)
+    # Give the other threads a chance to join the in-flight call
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(leader for _, leader in results) == [False, False, False, True]
+    assert all(result == "result" for result, _ in results)
+
+
+@pytest.mark.parametrize("data", ["ptx " * 10, "\u00e9\u20ac\U0001f600" * 10])
+def test_input_digest_str(monkeypatch, data):
+    # A str is hashed in chunks, which give the digest of its UTF-8 encoding
+    monkeypatch.setattr(cache_module, "_STR_CHUNK_SIZE", 7)
+    expected = hashlib.sha256(data.encode()).digest()
+    assert input_digest(data) == expected
+    assert input_digest(data.encode()) == expected
+
+
+def test_fingerprint(device_functions_cubin, gpu_arch_flag):
+    name, cubin = device_functions_cubin
+
+    nvjitlinker_1 = NvJitLinker(gpu_arch_flag)
+    nvjitlinker_1.add_cubin(cubin, name)
+    nvjitlinker_2 = NvJitLinker(gpu_arch_flag)
+    nvjitlinker_2.add_cubin(cubin, "another-name")
+    nvjitlinker_3 = NvJitLinker(gpu_arch_flag, "-lineinfo")
+    nvjitlinker_3.add_cubin(cubin, name)
+
+    # Names don't affect the result of the link, but options do
+    assert nvjitlinker_1.fingerprint() == nvjitlinker_2.fingerprint()
+    assert nvjitlinker_1.fingerprint() != nvjitlinker_3.fingerprint()
+    assert nvjitlinker_1.fingerprint() != nvjitlinker_1.fingerprint("ptx")
+
+
+def test_link_not_fingerprinted_when_unused(
+    device_functions_cubin, gpu_arch_flag, monkeypatch
+):
+    # Without a cache, a negative cache or coalescing, nothing uses the
+    # fingerprint of a link, so its inputs are not hashed
+    monkeypatch.setattr(api, "_link_cache", None)
+    fingerprints = []
+    monkeypatch.setattr(
+        api, "link_fingerprint", lambda *args: fingerprints.append(args)
+    )
+    name, cubin = device_functions_cubin
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_cubin(cubin, name)
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
+    assert fingerprints == []
+
+    # Its inputs are released once the link is done
+    with pytest.raises(NvJitLinkError, match="already-completed"):
+        nvjitlinker.fingerprint()
+
+
+@pytest.fixture
+def coalescing_enabled():
+    api.set_link_coalescing(True)
+    yield
+    api.set_link_coalescing(False)
+
+
+def _link_concurrently(n_threads, options, cubin, name):
+    # nvJitLink requires a link to be completed on the thread that created it,
+    # so each thread creates its own linker, then all the links are started
+    # at the same time so that they are all in flight together.
+    barrier = threading.Barrier(n_threads)
+    results = []
+    nvjitlinkers = []
+
+    def link():
+        nvjitlinker = NvJitLinker(*options)
+        nvjitlinker.add_cubin(cubin, name)
+        nvjitlinkers.append(nvjitlinker)
+        barrier.wait()
+        try:
+            results.append(nvjitlinker.get_linked_cubin())
+        except NvJitLinkError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=link) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return nvjitlinkers, results
+
+
+def test_concurrent_identical_links_coalesced(
+    device_functions_cubin, gpu_arch_flag, coalescing_enabled
+):
+    name, cubin = device_functions_cubin
+    complete = api._nvjitlinklib.complete
+    completed = []
+
+    def slow_complete(handle):
+        # Keep the link in flight long enough for all threads to join it
+        time.sleep(0.5)
+        completed.append(handle)
+        complete(handle)
+
+    with mock_patch.object(api._nvjitlinklib, "complete", slow_complete):
+        _, results = _link_concurrently(4, (gpu_arch_flag,), cubin, name)
+
+    assert len(completed) == 1
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+
+
+def test_concurrent_identical_links_share_error(
+    device_functions_cubin, gpu_arch_flag, coalescing_enabled
+):
+    name, cubin = device_functions_cubin
+    completed = []
+
+    def failing_complete(handle):
+        time.sleep(0.5)
+        completed.append(handle)
+        raise RuntimeError("NVJITLINK_ERROR_INTERNAL error")
+
+    with mock_patch.object(api._nvjitlinklib, "complete", failing_complete):
+        nvjitlinkers, results = _link_concurrently(4, (gpu_arch_flag,), cubin, name)
+
+    assert len(completed) == 1
+    for result in results:
+        assert isinstance(result, NvJitLinkError)
+        assert "NVJITLINK_ERROR_INTERNAL error" in str(result)
+    for nvjitlinker in nvjitlinkers:
+        assert nvjitlinker.error_log is not None
+
+
+def test_negative_cache():
+    cache = NegativeCache(ttl=60)
+    assert cache.get("key") is None
+    cache.put("key", "failure")
+    assert cache.get("key") == "failure"
+    assert len(cache) == 1
+
+
+def test_negative_cache_disabled():
+    cache = NegativeCache(ttl=0)
+    cache.put("key", "failure")
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_negative_cache_expiry():
+    cache = NegativeCache(ttl=0.1)
+    cache.put("key", "failure")
+    time.sleep(0.2)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_negative_cache_evicts_least_recently_used():
+    cache = NegativeCache(ttl=60, maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.fixture
+def negative_cache_enabled():
+    api.set_negative_cache_ttl(60)
+    yield
+    api.set_negative_cache_ttl(0)
+
+
+def test_repeated_link_failure_cached(
+    undefined_extern_cubin, gpu_arch_flag, negative_cache_enabled
+):
+    name, cubin = undefined_extern_cubin
+    complete = api._nvjitlinklib.complete
+    completed = []
+
+    def counting_complete(handle):
+        completed.append(handle)
+        complete(handle)
+
+    with mock_patch.object(api._nvjitlinklib, "complete", counting_complete):
+        for _ in range(3):
+            nvjitlinker = NvJitLinker(gpu_arch_flag)
+            nvjitlinker.add_cubin(cubin, name)
+            with pytest.raises(NvJitLinkError, match="NVJITLINK_ERROR_INTERNAL error"):
+                nvjitlinker.get_linked_cubin()
+            assert "Undefined reference to '_Z5undefff'" in nvjitlinker.error_log
+
+    # Only the first attempt should have run the link
+    assert len(completed) == 1
+
+
+@pytest.mark.parametrize(
+    "log", ["error   : Out of memory\n", "error   : Thread pool failure\n"]
+)
+def test_transient_link_failure_not_cached(
+    device_functions_cubin, gpu_arch_flag, negative_cache_enabled, log
+):
+    name, cubin = device_functions_cubin
+    completed = []
+
+    def failing_complete(handle):
+        completed.append(handle)
+        raise RuntimeError("NVJITLINK_ERROR_INTERNAL error")
+
+    with (
+        mock_patch.object(api._nvjitlinklib, "complete", failing_complete),
+        mock_patch.object(api._nvjitlinklib, "get_error_log", lambda handle: log),
+    ):
+        for _ in range(2):
+            nvjitlinker = NvJitLinker(gpu_arch_flag)
+            nvjitlinker.add_cubin(cubin, name)
+            with pytest.raises(NvJitLinkError, match="NVJITLINK_ERROR_INTERNAL"):
+                nvjitlinker.get_linked_cubin()
+
+    # An internal error that isn't a symbol error may not happen again
+    assert len(completed) == 2
+
+
+def test_link_failure_not_cached_when_disabled(undefined_extern_cubin, gpu_arch_flag):
+    name, cubin = undefined_extern_cubin
+    complete = api._nvjitlinklib.complete
+    completed = []
+
+    def counting_complete(handle):
+        completed.append(handle)
+        complete(handle)
+
+    with mock_patch.object(api._nvjitlinklib, "complete", counting_complete):
+        for _ in range(2):
+            nvjitlinker = NvJitLinker(gpu_arch_flag)
+            nvjitlinker.add_cubin(cubin, name)
+            with pytest.raises(NvJitLinkError):
+                nvjitlinker.get_linked_cubin()
+
+    assert len(completed) == 2
+
+
+@pytest.fixture
+def cache_server():
+    with CacheServer() as server:
+        yield server
+
+
+@pytest.fixture(params=["memory", "directory", "shared_directory", "http"])
+def cache_backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    elif request.param == "directory":
+        return DirectoryBackend(tmp_path)
+    elif request.param == "shared_directory":
+        return SharedDirectoryBackend(tmp_path)
+    else:
+        server = request.getfixturevalue("cache_server")
+        return HTTPBackend(server.url)
+
+
+KEY = "0123456789abcdef" * 4
+
+
+def test_cache_backend_round_trip(cache_backend):
+    assert cache_backend.get(KEY) is None
+    assert not cache_backend.contains(KEY)
+    cache_backend.put(KEY, b"value")
+    assert cache_backend.get(KEY) == b"value"
+    assert cache_backend.contains(KEY)
+    cache_backend.put(KEY, b"new value")
+    assert cache_backend.get(KEY) == b"new value"
+    with cache_backend.lock(KEY):
+        pass
+
+
+@contextlib.contextmanager
+def lock_held_by_another_process(backend, key):
+    # lockf() locks are held by processes, so another one has to hold the lock
+    # for this one to wait for it
+    lock_path = backend._path(key) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    script = (
+        "import fcntl, sys\n"
+        f"f = open({lock_path!r}, 'a+b')\n"
+        "fcntl.lockf(f, fcntl.LOCK_EX)\n"
+        "print('locked', flush=True)\n"
+        "sys.stdin.read()\n"
+    )
+    with subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    ) as holder:
+        assert holder.stdout.readline() == "locked\n"
+        try:
+            yield
+        finally:
+            holder.stdin.close()
+
+
+def test_shared_directory_backend_lock_timeout(tmp_path):
+    backend = SharedDirectoryBackend(tmp_path)
+    with lock_held_by_another_process(backend, KEY):
+        with pytest.raises(TimeoutError):
+            with backend.lock(KEY, timeout=0.2):
+                pass
+    with backend.lock(KEY, timeout=10):
+        pass
+
+
+def test_shared_directory_backend_lock_threads(tmp_path):
+    backend = SharedDirectoryBackend(tmp_path)
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with backend.lock(KEY):
+            locked.set()
+            release.wait()
+
+    t = threading.Thread(target=hold_lock)
+    t.start()
+    try:
+        locked.wait()
+        # Threads of the same process exclude each other too
+        with pytest.raises(TimeoutError):
+            with backend.lock(KEY, timeout=0.2):
+                pass
+        with backend.lock("f" * 64, timeout=0.2):
+            pass
+    finally:
+        release.set()
+        t.join()
+    with backend.lock(KEY, timeout=10):
+        pass
+    assert backend._thread_locks == {}
+
+
+def test_link_timeout_waiting_for_cache_lock(
+    device_functions_cubin, gpu_arch_flag, tmp_path
+):
+    name, cubin = device_functions_cubin
+    backend = SharedDirectoryBackend(tmp_path)
+    api.set_link_cache(LinkResultCache(backend))
+    try:
+        nvjitlinker = NvJitLinker(gpu_arch_flag)
+        nvjitlinker.add_cubin(cubin, name)
+        key = nvjitlinker.fingerprint()
+        # The timeout covers waiting for another host linking the same inputs
+        with lock_held_by_another_process(backend, key):
+            with pytest.raises(NvJitLinkTimeoutError, match="within 0.2s"):
+                nvjitlinker.get_linked_cubin(timeout=0.2)
+        assert nvjitlinker.get_linked_cubin(timeout=60)[:4] == b"\x7fELF"
+    finally:
+        api.set_link_cache(None)
+
+
+@pytest.mark.parametrize("key", ["../../etc/passwd", "ABC", ""])
+def test_cache_backend_invalid_key(key, tmp_path):
+    with pytest.raises(ValueError, match="Invalid cache key"):
+        DirectoryBackend(tmp_path).get(key)
+
+
+def test_cache_server_shares_backend(cache_server):
+    client_1 = HTTPBackend(cache_server.url)
+    client_2 = HTTPBackend(cache_server.url)
+    client_1.put(KEY, b"value")
+    assert client_2.get(KEY) == b"value"
+    assert cache_server.backend.get(KEY) == b"value"
+
+
+def test_http_backend_unreachable_is_miss():
+    backend = HTTPBackend("http://127.0.0.1:9", timeout=1)
+    assert backend.get(KEY) is None
+    backend.put(KEY, b"value")
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\ntruncated",
+        b"not an HTTP response\r\n\r\n",
+    ],
+    ids=["truncated", "invalid"],
+)
+def test_http_backend_bad_response_is_miss(response):
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        for _ in range(2):
+            conn, _ = server.accept()
+            with conn:
+                conn.recv(65536)
+                conn.sendall(response)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    host, port = server.getsockname()
+    backend = HTTPBackend(f"http://{host}:{port}", timeout=5)
+    try:
+        assert backend.get(KEY) is None
+        backend.put(KEY, b"value")
+    finally:
+        thread.join(timeout=5)
+        server.close()
+
+
+def test_link_result_cache(cache_backend):
+    cache = LinkResultCache(cache_backend)
+    assert cache.get(KEY) is None
+    cache.put(KEY, b"\x7fELF", "info")
+    assert cache.get(KEY) == (b"\x7fELF", "info")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_link_result_cache_corrupt_entry_is_miss():
+    backend = MemoryBackend()
+    backend.put(KEY, b"not a cache entry")
+    assert LinkResultCache(backend).get(KEY) is None
+
+    # An info log that isn't UTF-8
+    cache = LinkResultCache(backend, codec="none")
+    backend.put(KEY, cache._pack(b"cubin", "log")[:-3] + b"\xff\xfe\xfd")
+    assert cache.get(KEY) is None
+
+
+@pytest.mark.parametrize(
+    "codec",
+    [
+        "none",
+        "zlib",
+        pytest.param(
+            "zstd",
+            marks=pytest.mark.skipif(
+                cache_module.zstandard is None, reason="Requires zstandard"
+            ),
+        ),
+    ],
+)
+def test_link_result_cache_compression(codec):
+    backend = MemoryBackend()
+    cache = LinkResultCache(backend, codec=codec, level=1)
+    output = b"\x7fELF" + bytes(4096)
+    cache.put(KEY, output, "info")
+    assert cache.get(KEY) == (output, "info")
+
+    stats = cache.stats()
+    assert stats["stored_bytes"] == len(output) + len("info")
+    assert stats["decode_time"] > 0
+    if codec == "none":
+        assert stats["compression_ratio"] == 1.0
+    else:
+        assert stats["compression_ratio"] > 10
+        assert len(backend.get(KEY)) < len(output)
+
+    # Entries can be read whatever codec the reader writes with
+    assert LinkResultCache(backend, codec="none").get(KEY) == (output, "info")
+
+
+def test_link_result_cache_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown compression codec 'lz4'"):
+        LinkResultCache(MemoryBackend(), codec="lz4")
+
+
+def test_link_result_cache_zstd_unavailable():
+    with mock_patch.object(cache_module, "zstandard", None):
+        with pytest.raises(ValueError, match="requires the zstandard package"):
+            LinkResultCache(MemoryBackend(), codec="zstd")
+
+
+@pytest.fixture
+def link_cache():
+    cache = LinkResultCache(MemoryBackend())
+    api.set_link_cache(cache)
+    yield cache
+    api.set_link_cache(None)
+
+
+def test_link_result_reused(device_functions_cubin, gpu_arch_flag, link_cache):
+    name, cubin = device_functions_cubin
+    complete = api._nvjitlinklib.complete
+    completed = []
+
+    def counting_complete(handle):
+        completed.append(handle)
+        complete(handle)
+
+    results = []
+    with mock_patch.object(api._nvjitlinklib, "complete", counting_complete):
+        for _ in range(3):
+            nvjitlinker = NvJitLinker(gpu_arch_flag)
+            nvjitlinker.add_cubin(cubin, name)
+            results.append(nvjitlinker.get_linked_cubin())
+
+    assert len(completed) == 1
+    assert all(result == results[0] for result in results)
+    stats = link_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_link_result_shared_between_caches(
+    device_functions_cubin, gpu_arch_flag, cache_server
+):
+    # Two caches using the same server stand in for processes on different
+    # nodes
+    name, cubin = device_functions_cubin
+    node_1 = LinkResultCache(HTTPBackend(cache_server.url))
+    node_2 = LinkResultCache(HTTPBackend(cache_server.url))
+
+    try:
+        api.set_link_cache(node_1)
+        nvjitlinker = NvJitLinker(gpu_arch_flag)
+        nvjitlinker.add_cubin(cubin, name)
+        linked_cubin = nvjitlinker.get_linked_cubin()
+
+        api.set_link_cache(node_2)
+        nvjitlinker = NvJitLinker(gpu_arch_flag)
+        nvjitlinker.add_cubin(cubin, name)
+        assert nvjitlinker.get_linked_cubin() == linked_cubin
+    finally:
+        api.set_link_cache(None)
+
+    stats = node_2.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 0)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main())
@@ -0,0 +1,79 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import json
+
+import pytest
+
+from pynvjitlink import _nvjitlinklib, capabilities
+from pynvjitlink.capabilities import Capabilities, get_capabilities
+from pynvjitlink.options import LinkOptions
+
+
+@pytest.fixture
+def version():
+    return _nvjitlinklib.nvjitlink_version()
+
+
+def test_supports_option(version):
+    caps = Capabilities(version)
+    assert caps.supports_option("-lto")
+    assert not caps.supports_option("-bogus")
+
+
+def test_supports_arch(version):
+    assert Capabilities(version).supports_arch("sm_80")
+    assert "sm_80" in Capabilities(version).supported_archs()
+
+
+def test_probe_memoized(version, monkeypatch):
+    caps = Capabilities(version)
+    assert caps.supports_option("-lto")
+
+    def probe(*options):
+        raise AssertionError("probed again")
+
+    monkeypatch.setattr(capabilities, "_probe", probe)
+    assert caps.supports_option("-lto")
+
+
+def test_saved(version, tmp_path):
+    path = tmp_path / "capabilities.json"
+    caps = Capabilities.load(path, version)
+    assert caps.supports_option("-lto")
+    assert not caps.supports_option("-bogus")
+
+    loaded = Capabilities.load(path, version)
+    assert loaded._options == {"-lto": True, "-bogus": False}
+
+
+def test_saved_other_version(tmp_path):
+    path = tmp_path / "capabilities.json"
+    path.write_text(json.dumps({"version": [1, 0], "options": {"-lto": False}}))
+    assert Capabilities.load(path, (1, 1))._options == {}
+    # Unreadable files are ignored
+    path.write_text("not json")
+    assert Capabilities.load(path, (1, 0))._options == {}
+
+
+def test_get_capabilities(tmp_path, monkeypatch):
+    path = tmp_path / "capabilities.json"
+    monkeypatch.setattr(capabilities, "_capabilities", None)
+    monkeypatch.setenv("PYNVJITLINK_CAPABILITIES_FILE", str(path))
+    caps = get_capabilities()
+    assert get_capabilities() is caps
+    assert caps.path == str(path)
+
+
+class NoCapabilities:
+    def supports_option(self, option):
+        return False
+
+
+def test_link_options_supported():
+    options = LinkOptions("sm_80", lto=True, split_compile=4, kernels_used="k")
+    assert options.supported(NoCapabilities()) == options.replace(
+        split_compile=1, kernels_used=()
+    )
+    options = LinkOptions("sm_80", split_compile=1)
+    assert options.supported(NoCapabilities()) is options
+    assert options.supported() is options
@@ -0,0 +1,67 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import os
+
+import pytest
+
+from pynvjitlink import NvJitLinker, NvJitLinkError, api, nvjitlink_version
+from pynvjitlink.api import InputType
+from pynvjitlink.capture import LinkRecorder, load_captures
+from pynvjitlink.cli import main
+from pynvjitlink.driver import replay_captures
+
+
+@pytest.fixture
+def capture_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "_link_cache", None)
+    api.set_link_recorder(LinkRecorder(tmp_path))
+    yield tmp_path
+    api.set_link_recorder(None)
+
+
+def link(gpu_arch_flag, *inputs):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    for name, data in inputs:
+        nvjitlinker.add_cubin(data, name)
+    return nvjitlinker.get_linked_cubin()
+
+
+def test_capture(capture_dir, gpu_arch_flag, device_functions_cubin):
+    link(gpu_arch_flag, device_functions_cubin)
+    link(gpu_arch_flag, device_functions_cubin)
+
+    first, second = load_captures(capture_dir)
+    assert first.version == nvjitlink_version()
+    assert first.options == [gpu_arch_flag]
+    assert first.output == "cubin"
+    assert first.error is None
+    assert first.link_time > 0
+    ((input_type, path, name),) = first.inputs
+    assert InputType(input_type) is InputType.CUBIN
+    assert name == device_functions_cubin[0]
+    with open(path, "rb") as f:
+        assert f.read() == device_functions_cubin[1]
+    # Inputs shared by several links are stored once
+    assert second.inputs == first.inputs
+    assert len(os.listdir(capture_dir / "inputs")) == 1
+
+
+def test_capture_failed_link(capture_dir, gpu_arch_flag, undefined_extern_cubin):
+    with pytest.raises(NvJitLinkError):
+        link(gpu_arch_flag, undefined_extern_cubin)
+    (capture,) = load_captures(capture_dir)
+    assert "ERROR" in capture.error
+
+
+def test_replay(capture_dir, gpu_arch_flag, device_functions_cubin, capsys):
+    link(gpu_arch_flag, device_functions_cubin)
+
+    (result,) = replay_captures(capture_dir, repeat=2)
+    assert result.error is None
+    assert result.link_time > 0
+    assert result.capture.options == [gpu_arch_flag]
+
+    assert main(["replay", str(capture_dir)]) == 0
+    assert "1 links:" in capsys.readouterr().out
+    # Replayed links are not captured again
+    assert len(load_captures(capture_dir)) == 1
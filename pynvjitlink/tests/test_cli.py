@@ -0,0 +1,169 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from pynvjitlink import NvJitLinkError, api
+from pynvjitlink.cli import main
+from pynvjitlink.cache import LinkResultCache, MemoryBackend
+from pynvjitlink.driver import LinkSpec, load_manifest, warm_link_cache
+
+
+@pytest.fixture
+def input_files(tmp_path, device_functions_cubin, device_functions_ptx):
+    paths = {}
+    for name, data in (device_functions_cubin, device_functions_ptx):
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths[path.suffix] = path
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def no_link_cache(monkeypatch):
+    # --cache-dir replaces the process-wide cache, which is restored afterwards
+    monkeypatch.setattr(api, "_link_cache", None)
+
+
+def test_link_spec_output_type():
+    assert LinkSpec([], ["a.ptx"], "a.cubin").output_type == "cubin"
+    assert LinkSpec([], ["a.ltoir"], "a.ptx").output_type == "ptx"
+    assert LinkSpec([], ["a.ltoir"]).output_type == "cubin"
+
+
+def test_load_manifest(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    jobs = [
+        {"inputs": ["a.ltoir"], "options": ["-lto"], "arch": 80, "output": "a.ptx"},
+        {"inputs": ["/abs/b.cubin"], "arch": "sm_90"},
+    ]
+    manifest.write_text(json.dumps({"jobs": jobs}))
+
+    a, b = load_manifest(manifest)
+    assert a.options == ["-arch=sm_80", "-lto"]
+    assert a.inputs == [str(tmp_path / "a.ltoir")]
+    assert a.output == str(tmp_path / "a.ptx")
+    assert a.output_type == "ptx"
+    assert b.options == ["-arch=sm_90"]
+    assert b.inputs == ["/abs/b.cubin"]
+    assert b.output is None
+
+
+def test_load_manifest_archs(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    job = {"inputs": ["a.ltoir"], "archs": [80, "sm_90"], "output": "{arch}.cubin"}
+    manifest.write_text(json.dumps([job]))
+
+    sm80, sm90 = load_manifest(manifest)
+    assert sm80.options == ["-arch=sm_80"]
+    assert sm80.output == str(tmp_path / "sm_80.cubin")
+    assert sm90.options == ["-arch=sm_90"]
+    assert sm90.output == str(tmp_path / "sm_90.cubin")
+
+    job["output"] = "a.cubin"
+    manifest.write_text(json.dumps([job]))
+    with pytest.raises(ValueError, match="must contain {arch}"):
+        load_manifest(manifest)
+
+
+def test_cli_link(tmp_path, input_files, gpu_compute_capability):
+    output = tmp_path / "out" / "linked.cubin"
+    arch = "sm_%d%d" % gpu_compute_capability
+    argv = ["link", "--arch", arch, "-o", str(output), str(input_files[".ptx"])]
+    assert main(argv) == 0
+    assert output.read_bytes()[:4] == b"\x7fELF"
+
+
+def test_cli_link_manifest(tmp_path, input_files, gpu_compute_capability):
+    arch = "sm_%d%d" % gpu_compute_capability
+    jobs = [
+        {"inputs": [input_files[".ptx"].name], "arch": arch, "output": f"{i}.cubin"}
+        for i in range(4)
+    ]
+    jobs.append({"inputs": ["missing.ptx"], "arch": arch, "output": "missing.cubin"})
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(jobs))
+
+    cache_dir = tmp_path / "cache"
+    argv = ["link", "--manifest", str(manifest), "-j", "2"]
+    assert main(argv + ["--cache-dir", str(cache_dir)]) == 1
+    for i in range(4):
+        assert (tmp_path / f"{i}.cubin").read_bytes()[:4] == b"\x7fELF"
+    assert not (tmp_path / "missing.cubin").exists()
+    assert api.get_link_cache().stats()["misses"] >= 1
+    assert any(cache_dir.iterdir())
+
+
+def test_cli_usage_errors(tmp_path, input_files):
+    assert main(["link", str(input_files[".ptx"])]) == 2
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text("[]")
+    argv = ["link", "--manifest", str(manifest), "-o", str(tmp_path / "a.cubin")]
+    assert main(argv) == 2
+
+
+@pytest.mark.parametrize("command", ["link", "warm"])
+@pytest.mark.parametrize(
+    "content", ["not json", "{}", '[{"arch": "sm_80"}]', "[1]", '[{"inputs": 1}]']
+)
+def test_cli_invalid_manifest(tmp_path, capsys, command, content):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(content)
+    argv = [command, str(manifest), "--cache-dir", str(tmp_path / "cache")]
+    if command == "link":
+        argv.insert(1, "--manifest")
+    assert main(argv) == 1
+    assert capsys.readouterr().err.startswith(f"pynvjitlink: error: {manifest}: ")
+
+
+def test_cli_missing_manifest(tmp_path, capsys):
+    assert main(["link", "--manifest", str(tmp_path / "missing.json")]) == 1
+    assert "pynvjitlink: error:" in capsys.readouterr().err
+
+
+def test_cli_module(tmp_path, input_files, gpu_compute_capability):
+    output = tmp_path / "linked.cubin"
+    arch = "sm_%d%d" % gpu_compute_capability
+    cmd = [sys.executable, "-m", "pynvjitlink", "link", "--arch", arch]
+    cmd += ["-o", str(output), str(input_files[".ptx"])]
+    subprocess.run(cmd, check=True)
+    assert output.read_bytes()[:4] == b"\x7fELF"
+
+    # Errors are reported with a nonzero exit code
+    cmd[-1] = str(tmp_path / "missing.ptx")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "pynvjitlink: error: " in result.stderr
+
+
+def test_warm_link_cache(input_files, gpu_arch_flag):
+    specs = [LinkSpec([gpu_arch_flag], [input_files[".ptx"]])]
+    specs.append(LinkSpec([gpu_arch_flag], [input_files[".cubin"]]))
+    with pytest.raises(NvJitLinkError, match="No link result cache"):
+        warm_link_cache(specs)
+
+    api.set_link_cache(LinkResultCache(MemoryBackend()))
+    assert warm_link_cache(specs[:1]) == [("linked", None)]
+    results = warm_link_cache(specs, jobs=2)
+    assert results == [("present", None), ("linked", None)]
+
+
+def test_cli_warm(tmp_path, input_files, gpu_compute_capability, capsys):
+    arch = "sm_%d%d" % gpu_compute_capability
+    jobs = [
+        {"inputs": [input_files[".ptx"].name], "arch": arch},
+        {"inputs": ["missing.ptx"], "arch": arch},
+    ]
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(jobs))
+
+    assert main(["warm", str(manifest)]) == 2
+
+    argv = ["warm", str(manifest), "--cache-dir", str(tmp_path / "cache")]
+    assert main(argv) == 1
+    assert "2 links: 0 already cached, 1 linked, 1 failed" in capsys.readouterr().out
+    assert main(argv) == 1
+    assert "2 links: 1 already cached, 0 linked, 1 failed" in capsys.readouterr().out
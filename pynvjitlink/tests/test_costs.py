@@ -0,0 +1,48 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+from pynvjitlink.costs import InputCost, LinkCost, LinkCostReport
+
+
+def make_cost(kernel, complete_time, *inputs):
+    cost = LinkCost(kernel, (8, 0), False)
+    cost.inputs.extend(InputCost(*i) for i in inputs)
+    cost.complete_time = complete_time
+    return cost
+
+
+def test_link_cost():
+    cost = make_cost(
+        "k", 0.5, ("cu", "lib.cu", 100, 2.0), ("ptx", "lib.ptx", 1000, 0.25)
+    )
+    assert cost.nvrtc_time == 2.0
+    assert cost.add_time == 0.25
+    assert cost.total_time == 2.75
+    # The size of CUDA sources is not counted as linked input
+    assert cost.input_size == 1000
+
+
+def test_link_cost_report():
+    report = LinkCostReport(maxlen=3)
+    report.record(make_cost("dropped", 100.0))
+    report.record(make_cost("a", 1.0, ("ptx", "<cudapy-ptx>", 10, 0.5)))
+    report.record(make_cost("b", 3.0, ("ptx", "<cudapy-ptx>", 20, 0.5)))
+    report.record(
+        make_cost("c", 2.0, ("cu", "lib.cu", 5, 4.0), ("ptx", "lib.ptx", 100, 0.0))
+    )
+
+    # Only the most recent links are kept
+    assert [c.kernel for c in report.slowest()] == ["c", "b", "a"]
+    assert [c.kernel for c in report.slowest(1)] == ["c"]
+
+    largest = report.largest_inputs()
+    assert largest[0] == ("ptx", "lib.ptx", 1, 100, 0.0)
+    assert largest[1] == ("ptx", "<cudapy-ptx>", 2, 30, 1.0)
+    assert report.slowest_inputs(1)[0].name == "lib.cu"
+
+    assert report.split() == {"nvrtc": 4.0, "add": 1.0, "complete": 6.0}
+    text = report.format()
+    assert "3 links" in text
+    assert "lib.ptx" in text
+
+    report.clear()
+    assert report.links == []
@@ -0,0 +1,124 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import struct
+
+import pytest
+
+from pynvjitlink import NvJitLinker, NvJitLinkError
+from pynvjitlink.cubin import read_cubin
+
+KERNEL_PTX = b"""
+.version 7.0
+.target sm_52
+.address_size 64
+
+.visible .func (.param .b32 retval) twice(.param .b32 x)
+{
+    .reg .b32 %r<3>;
+    ld.param.b32 %r1, [x];
+    add.s32 %r2, %r1, %r1;
+    st.param.b32 [retval], %r2;
+    ret;
+}
+
+.visible .entry scale(.param .u64 out, .param .u32 k) .maxntid 256, 1, 1
+{
+    .shared .align 4 .b8 buf[512];
+    .reg .b32 %r<6>;
+    .reg .b64 %rd<5>;
+    ld.param.u64 %rd1, [out];
+    ld.param.u32 %r1, [k];
+    mov.u32 %r2, %tid.x;
+    mul.wide.u32 %rd2, %r2, 4;
+    mov.u64 %rd3, buf;
+    add.s64 %rd4, %rd3, %rd2;
+    st.shared.u32 [%rd4], %r2;
+    bar.sync 0;
+    ld.shared.u32 %r3, [buf];
+    add.s32 %r4, %r3, %r1;
+    {
+    .param .b32 p;
+    .param .b32 r;
+    st.param.b32 [p], %r4;
+    call.uni (r), twice, (p);
+    ld.param.b32 %r5, [r];
+    }
+    cvta.to.global.u64 %rd1, %rd1;
+    st.global.u32 [%rd1], %r5;
+    ret;
+}
+"""
+
+
+@pytest.fixture
+def kernel_cubin(gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_ptx(KERNEL_PTX, "kernel.ptx")
+    return nvjitlinker.get_linked_cubin()
+
+
+def test_read_cubin(kernel_cubin, gpu_compute_capability):
+    info = read_cubin(kernel_cubin)
+    major, minor = gpu_compute_capability
+    assert info.arch == major * 10 + minor
+    assert [f.name for f in info.kernels] == ["scale"]
+    assert [f.name for f in info.device_functions] == ["twice"]
+
+    scale = info["scale"]
+    assert scale.kernel
+    assert scale.size > 0
+    assert 0 < scale.registers <= 255
+    assert scale.shared_memory >= 512
+    assert scale.local_memory == 0
+    assert scale.param_size == 12
+    assert scale.max_threads == 256
+
+    twice = info["twice"]
+    assert not twice.kernel
+    assert twice.shared_memory == 0
+    assert twice.param_size is None
+    assert twice.max_threads is None
+
+    with pytest.raises(KeyError):
+        info["missing"]
+
+
+def test_read_cubin_device_functions(device_functions_cubin):
+    _, cubin = device_functions_cubin
+    info = read_cubin(cubin)
+    add_from_numba = info["add_from_numba"]
+    assert not add_from_numba.kernel
+    assert add_from_numba.registers > 0
+
+
+def test_read_cubin_invalid(device_functions_ptx, kernel_cubin):
+    _, ptx = device_functions_ptx
+    with pytest.raises(NvJitLinkError, match="not an ELF file"):
+        read_cubin(ptx)
+    with pytest.raises(NvJitLinkError, match="Truncated cubin"):
+        read_cubin(kernel_cubin[: len(kernel_cubin) // 2])
+
+
+def test_read_cubin_corrupt(kernel_cubin):
+    header = struct.Struct("<16sHHIQQQIHHHHHH")
+    *_, shoff, _, _, _, _, _, shnum, shstrndx = header.unpack_from(kernel_cubin)
+
+    # A section name table index beyond the section headers
+    corrupt = bytearray(kernel_cubin)
+    struct.pack_into("<H", corrupt, header.size - 2, shnum)
+    with pytest.raises(NvJitLinkError, match="invalid section index"):
+        read_cubin(corrupt)
+
+    # A section name beyond the end of the section name table
+    corrupt = bytearray(kernel_cubin)
+    struct.pack_into("<I", corrupt, shoff + 64, 0xFFFFFF)
+    with pytest.raises(NvJitLinkError, match="name out of bounds"):
+        read_cubin(corrupt)
+
+    # A section name that isn't UTF-8
+    corrupt = bytearray(kernel_cubin)
+    (names_offset,) = struct.unpack_from("<Q", corrupt, shoff + shstrndx * 64 + 24)
+    (name,) = struct.unpack_from("<I", corrupt, shoff + 64)
+    corrupt[names_offset + name] = 0xFF
+    with pytest.raises(NvJitLinkError, match="name is not UTF-8"):
+        read_cubin(corrupt)
@@ -0,0 +1,67 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import pytest
+
+from pynvjitlink import NvJitLinker, NvJitLinkError
+from pynvjitlink.fatbin import make_fatbin, read_fatbin, write_fatbin
+
+
+def test_fatbin_round_trip(
+    gpu_compute_capability, device_functions_cubin, device_functions_ptx
+):
+    _, cubin = device_functions_cubin
+    _, ptx = device_functions_ptx
+    fatbin = make_fatbin({gpu_compute_capability: cubin}, ptx={"compute_70": ptx})
+
+    cubin_entry, ptx_entry = read_fatbin(fatbin)
+    assert cubin_entry.kind == "cubin"
+    assert (
+        cubin_entry.arch == gpu_compute_capability[0] * 10 + gpu_compute_capability[1]
+    )
+    assert cubin_entry.data == cubin
+    assert not cubin_entry.compressed
+    assert ptx_entry.kind == "ptx"
+    assert ptx_entry.arch == 70
+    assert ptx_entry.data == ptx.rstrip(b"\0")
+
+
+def test_link_fatbin(gpu_arch_flag, device_functions_cubin, device_functions_ptx):
+    name, cubin = device_functions_cubin
+    _, ptx = device_functions_ptx
+    arch = gpu_arch_flag.split("=")[1]
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_fatbin(make_fatbin({arch: cubin}, ptx={70: ptx}), name)
+    assert nvjitlinker.get_linked_cubin()
+
+
+def test_link_fatbin_ptx(tmp_path, gpu_arch_flag, device_functions_ptx):
+    # Devices without a cubin in the fatbin use its PTX
+    _, ptx = device_functions_ptx
+    path = tmp_path / "device_functions.fatbin"
+    write_fatbin(path, {}, ptx={70: ptx})
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_fatbin(path.read_bytes(), path.name)
+    assert nvjitlinker.get_linked_cubin()
+
+
+def test_make_fatbin_invalid(device_functions_ptx):
+    _, ptx = device_functions_ptx
+    with pytest.raises(NvJitLinkError, match="at least one cubin or PTX"):
+        make_fatbin({})
+    with pytest.raises(NvJitLinkError, match="Cubin for sm_80 is not an ELF file"):
+        make_fatbin({"sm_80": ptx})
+    with pytest.raises(NvJitLinkError, match="Invalid architecture"):
+        make_fatbin({}, ptx={"sm_xy": ptx})
+    with pytest.raises(NvJitLinkError, match="no .version directive"):
+        make_fatbin({}, ptx={80: b"// empty"})
+
+
+def test_read_fatbin_invalid(device_functions_cubin):
+    _, cubin = device_functions_cubin
+    with pytest.raises(NvJitLinkError, match="bad magic number"):
+        read_fatbin(cubin)
+    fatbin = make_fatbin({80: cubin})
+    with pytest.raises(NvJitLinkError, match="Truncated fatbin"):
+        read_fatbin(fatbin[:-8])
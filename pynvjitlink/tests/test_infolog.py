@@ -0,0 +1,73 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+from pynvjitlink.infolog import parse_info_log
+
+PTXAS_INFO_LOG = """\
+ptxas info    : 0 bytes gmem
+ptxas info    : Function properties for helper
+ptxas         .     0 bytes stack frame, 0 bytes spill stores, 0 bytes spill loads
+ptxas info    : Compile time = 1.490 ms
+ptxas info    : Compiling entry function 'spill' for 'sm_75'
+ptxas info    : Function properties for spill
+ptxas         .     352 bytes stack frame, 112 bytes spill stores, 124 bytes spill loads
+ptxas info    : Used 64 registers, used 0 barriers, 372 bytes cmem[0]
+ptxas info    : Compile time = 24.589 ms
+ptxas info    : Compiling entry function 'k' for 'sm_75'
+ptxas info    : Function properties for k
+ptxas         .     0 bytes stack frame, 0 bytes spill stores, 0 bytes spill loads
+ptxas info    : Used 8 registers, used 1 barriers, 256 bytes smem, 368 bytes cmem[0], 8 bytes cmem[2]
+ptxas info    : Compile time = 1.640 ms
+info    : 0 bytes gmem
+info    : Function properties for 'spill':
+info    : used 64 registers, used 0 barriers, 352 stack, 0 bytes smem, 372 bytes cmem[0], 0 bytes lmem
+\0"""
+
+LINKER_INFO_LOG = """\
+info    : 0 bytes gmem
+info    : Function properties for 'k':
+info    : used 8 registers, used 1 barriers, 16 stack, 256 bytes smem, 368 bytes cmem[0], 0 bytes lmem
+"""
+
+
+def test_parse_ptxas_info_log():
+    usage = parse_info_log(PTXAS_INFO_LOG)
+    assert list(usage) == ["helper", "spill", "k"]
+
+    helper = usage["helper"]
+    assert not helper.kernel
+    assert helper.arch is None
+    assert helper.registers is None
+    assert helper.stack_frame == 0
+    assert helper.compile_time == 0.00149
+
+    spill = usage["spill"]
+    assert spill.kernel
+    assert spill.arch == "sm_75"
+    assert spill.registers == 64
+    assert spill.barriers == 0
+    assert (spill.stack_frame, spill.spill_stores, spill.spill_loads) == (352, 112, 124)
+    assert spill.shared_memory == 0
+    assert spill.local_memory == 0
+    assert spill.constant_memory == {0: 372}
+
+    k = usage["k"]
+    assert k.registers == 8
+    assert k.barriers == 1
+    assert k.shared_memory == 256
+    assert k.constant_memory == {0: 368, 2: 8}
+    assert k.local_memory is None
+
+
+def test_parse_linker_info_log():
+    (k,) = parse_info_log(LINKER_INFO_LOG).values()
+    assert k.name == "k"
+    assert k.kernel
+    assert k.registers == 8
+    assert k.stack_frame == 16
+    assert k.spill_stores is None
+    assert k.shared_memory == 256
+
+
+def test_parse_empty_info_log():
+    assert parse_info_log("") == {}
+    assert parse_info_log("ptxas info    : 0 bytes gmem\n") == {}
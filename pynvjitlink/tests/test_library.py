@@ -0,0 +1,251 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import mmap
+
+import pytest
+
+from pynvjitlink import NvJitLinker, NvJitLinkError, _nvjitlinklib
+from pynvjitlink.api import InputType
+from pynvjitlink.archive import read_archive_index
+from pynvjitlink.library import LinkLibrary, guess_input_type
+from pynvjitlink.patch import PatchedLinker
+
+
+@pytest.fixture
+def device_functions_library(tmp_path, device_functions_cubin, device_functions_ptx):
+    paths = []
+    for name, data in (device_functions_cubin, device_functions_ptx):
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(path)
+    return LinkLibrary(paths, name="device_functions")
+
+
+def test_guess_input_type():
+    assert guess_input_type("a/b.cubin") is InputType.CUBIN
+    assert guess_input_type("b.LTOIR") is InputType.LTOIR
+    assert guess_input_type("b.a") is InputType.LIBRARY
+    with pytest.raises(NvJitLinkError, match="Don't know how to link b.txt"):
+        guess_input_type("b.txt")
+
+
+def test_library_members(
+    device_functions_library, device_functions_cubin, device_functions_ptx
+):
+    library = device_functions_library
+    cubin_name, cubin = device_functions_cubin
+    ptx_name, ptx = device_functions_ptx
+
+    assert len(library) == 2
+    assert [m.name for m in library] == [cubin_name, ptx_name]
+    assert cubin_name in library
+    assert library[cubin_name].input_type is InputType.CUBIN
+    assert library[cubin_name].data == cubin
+    assert library[ptx_name].input_type is InputType.PTX
+    assert library.members(InputType.PTX) == [library[ptx_name]]
+    assert library.nbytes == len(cubin) + len(ptx)
+
+
+def test_library_digest(device_functions_library, device_functions_cubin):
+    name, cubin = device_functions_cubin
+    library = LinkLibrary()
+    library.add_data(InputType.CUBIN, cubin, name)
+    assert library.digest != device_functions_library.digest
+
+    other = LinkLibrary()
+    other.add_data(InputType.CUBIN, cubin, "renamed.cubin")
+    assert library.digest == other.digest
+
+
+def test_library_invalid_input(tmp_path, device_functions_ptx):
+    name, ptx = device_functions_ptx
+    library = LinkLibrary()
+    with pytest.raises(NvJitLinkError, match="is not a valid CUBIN input"):
+        library.add_data(InputType.CUBIN, ptx, name)
+
+    empty = tmp_path / "empty.ltoir"
+    empty.write_bytes(b"")
+    with pytest.raises(NvJitLinkError, match="empty.ltoir is empty"):
+        library.add_file(empty)
+
+    with pytest.raises(NvJitLinkError, match="Cannot load"):
+        library.add_file(tmp_path / "missing.cubin")
+
+    library.add_data(InputType.PTX, ptx, name)
+    with pytest.raises(NvJitLinkError, match="already contains"):
+        library.add_data(InputType.PTX, ptx, name)
+
+
+def test_library_ptx_null_terminated(gpu_arch_flag, device_functions_ptx):
+    name, ptx = device_functions_ptx
+    library = LinkLibrary()
+    # PTX followed by more text, which nvJitLink must not read
+    member = library.add_data(InputType.PTX, memoryview(ptx + b"}")[:-1], name)
+    assert member.data == ptx
+    assert isinstance(member.data.obj, bytes)
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_link_library(library)
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
+
+
+def test_link_library(gpu_arch_flag, device_functions_library):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_link_library(device_functions_library)
+    assert nvjitlinker.get_linked_cubin()
+
+
+def test_link_library_fingerprint(
+    gpu_arch_flag, device_functions_library, device_functions_cubin
+):
+    name, cubin = device_functions_cubin
+
+    from_library = NvJitLinker(gpu_arch_flag)
+    from_library.add_link_library(device_functions_library, names=[name])
+
+    from_memory = NvJitLinker(gpu_arch_flag)
+    from_memory.add_cubin(cubin, name)
+
+    assert from_library.fingerprint() == from_memory.fingerprint()
+
+
+def test_link_library_patched_linker(gpu_compute_capability, device_functions_library):
+    patched_linker = PatchedLinker(cc=gpu_compute_capability)
+    patched_linker.add_file_guess_ext(device_functions_library)
+    assert patched_linker.complete()
+
+
+@pytest.fixture
+def device_functions_archive_file(tmp_path, device_functions_library):
+    path = tmp_path / "device_functions.pnjl"
+    device_functions_library.write_archive(path)
+    return path
+
+
+def test_archive_round_trip(
+    device_functions_library, device_functions_archive_file, gpu_arch_flag
+):
+    library = LinkLibrary.from_archive(device_functions_archive_file, verify=True)
+
+    assert [m.name for m in library] == [m.name for m in device_functions_library]
+    assert library.digest == device_functions_library.digest
+    for member in library:
+        original = device_functions_library[member.name]
+        assert member.input_type is original.input_type
+        assert member.data == original.data
+
+    # Inputs are mapped from the archive and start at page boundaries. PTX is
+    # followed by a null byte, so it is passed to nvJitLink in place too.
+    data, entries = read_archive_index(device_functions_archive_file)
+    assert all(entry.offset % 4096 == 0 for entry in entries)
+    for member, entry in zip(library, entries):
+        assert isinstance(member.data.obj, mmap.mmap)
+        if member.input_type is InputType.PTX:
+            assert data[entry.offset + entry.size] == 0
+            handle = _nvjitlinklib.create(gpu_arch_flag)
+            ptx_type = InputType.PTX.value
+            copied = _nvjitlinklib.add_data(handle, ptx_type, member.data, entry.name)
+            _nvjitlinklib.destroy(handle)
+            assert not copied
+
+
+def test_archive_chosen_members(device_functions_archive_file, device_functions_ptx):
+    name, _ = device_functions_ptx
+    library = LinkLibrary.from_archive(device_functions_archive_file, names=[name])
+    assert [m.name for m in library] == [name]
+
+    with pytest.raises(NvJitLinkError, match="does not contain missing.ptx"):
+        LinkLibrary.from_archive(device_functions_archive_file, names=["missing.ptx"])
+
+
+def test_archive_arch(tmp_path, device_functions_cubin, device_functions_ptx):
+    cubin_name, cubin = device_functions_cubin
+    ptx_name, ptx = device_functions_ptx
+    library = LinkLibrary()
+    library.add_data(InputType.CUBIN, cubin, cubin_name, arch=75)
+    library.add_data(InputType.PTX, ptx, ptx_name)
+    path = tmp_path / "arch.pnjl"
+    library.write_archive(path)
+
+    library = LinkLibrary.from_archive(path)
+    assert library[cubin_name].arch == 75
+    assert library[ptx_name].arch is None
+    assert [m.name for m in library.members(arch=75)] == [cubin_name, ptx_name]
+    assert [m.name for m in library.members(arch=80)] == [ptx_name]
+
+
+def test_link_archive_ptx_not_null_terminated(
+    tmp_path, gpu_arch_flag, device_functions_cubin, device_functions_ptx
+):
+    # Archives written before PTX was null-terminated have PTX that fills its
+    # pages exactly followed by the next input
+    cubin_name, cubin = device_functions_cubin
+    name, ptx = device_functions_ptx
+    ptx += b" " * (-len(ptx) % 4096)
+    library = LinkLibrary()
+    library.add_data(InputType.PTX, ptx, name)
+    library.add_data(InputType.CUBIN, cubin, cubin_name)
+    path = tmp_path / "unterminated.pnjl"
+    library.write_archive(path)
+    _, (entry, _) = read_archive_index(path)
+    data = bytearray(path.read_bytes())
+    data[entry.offset + entry.size] = ord("\n")
+    path.write_bytes(data)
+
+    library = LinkLibrary.from_archive(path, names=[name])
+    assert library[name].data == ptx
+    assert not isinstance(library[name].data.obj, mmap.mmap)
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_link_library(library)
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
+
+
+def test_archive_invalid(tmp_path, device_functions_archive_file):
+    path = tmp_path / "invalid.pnjl"
+    path.write_bytes(b"not an archive" * 4)
+    with pytest.raises(NvJitLinkError, match="bad magic number"):
+        LinkLibrary.from_archive(path)
+
+    # Corrupt the last byte of data of the first input
+    data = bytearray(device_functions_archive_file.read_bytes())
+    entry = read_archive_index(device_functions_archive_file)[1][0]
+    data[entry.offset + entry.size - 1] ^= 0xFF
+    path.write_bytes(data)
+    LinkLibrary.from_archive(path)
+    with pytest.raises(NvJitLinkError, match="is corrupt"):
+        LinkLibrary.from_archive(path, verify=True)
+
+    # Truncate the file to end within the first input
+    path.write_bytes(data[: entry.offset + 1])
+    with pytest.raises(NvJitLinkError, match="is out of bounds"):
+        LinkLibrary.from_archive(path)
+
+    # Corrupt the name of the first input
+    data = bytearray(device_functions_archive_file.read_bytes())
+    data[data.index(entry.name.encode())] = 0xFF
+    path.write_bytes(data)
+    with pytest.raises(NvJitLinkError, match="input name is not UTF-8"):
+        LinkLibrary.from_archive(path)
+
+
+def test_link_archive(
+    gpu_arch_flag, device_functions_archive_file, device_functions_ptx
+):
+    name, ptx = device_functions_ptx
+    library = LinkLibrary.from_archive(device_functions_archive_file)
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_link_library(library, names=[name])
+
+    from_memory = NvJitLinker(gpu_arch_flag)
+    from_memory.add_ptx(ptx, name)
+    assert nvjitlinker.fingerprint() == from_memory.fingerprint()
+    assert nvjitlinker.get_linked_cubin()
+
+
+def test_link_archive_patched_linker(
+    gpu_compute_capability, device_functions_archive_file
+):
+    patched_linker = PatchedLinker(cc=gpu_compute_capability)
+    patched_linker.add_file_guess_ext(str(device_functions_archive_file))
+    assert patched_linker.complete()
@@ -0,0 +1,101 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import threading
+
+import pytest
+
+from pynvjitlink import metrics
+from pynvjitlink.api import InputType
+from pynvjitlink.cubin import read_cubin
+from pynvjitlink.scheduler import BACKGROUND, INTERACTIVE, LinkScheduler
+
+
+def blocker(scheduler, priority=INTERACTIVE):
+    # Occupies a worker until the returned event is set
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(timeout=10)
+
+    future = scheduler.submit(block, priority=priority)
+    assert started.wait(timeout=10)
+    return release, future
+
+
+def test_priority():
+    order = []
+    with LinkScheduler(workers=1) as scheduler:
+        release, _ = blocker(scheduler)
+        futures = [
+            scheduler.submit(order.append, "background 1", priority=BACKGROUND),
+            scheduler.submit(order.append, "background 2", priority=BACKGROUND),
+            scheduler.submit(order.append, "interactive 1"),
+            scheduler.submit(order.append, "interactive 2", priority=INTERACTIVE),
+        ]
+        release.set()
+        for future in futures:
+            future.result(timeout=10)
+
+    # Interactive jobs don't wait behind queued background jobs
+    assert order == ["interactive 1", "interactive 2", "background 1", "background 2"]
+
+
+def test_class_limit():
+    with LinkScheduler(workers=3, classes={"a": None, "b": 1}) as scheduler:
+        release, first = blocker(scheduler, "b")
+        second = scheduler.submit(lambda: "b", priority="b")
+        # Other classes still run while "b" is at its limit
+        assert scheduler.submit(lambda: "a", priority="a").result(timeout=10) == "a"
+        stats = scheduler.stats()
+        assert stats["b"]["running"] == 1
+        assert stats["b"]["queued"] == 1
+        assert stats["a"]["completed"] == 1
+        release.set()
+        assert second.result(timeout=10) == "b"
+
+
+def test_queue_time_metrics():
+    queued = metrics.scheduler_queue_time.count(priority=BACKGROUND)
+    with LinkScheduler(workers=1) as scheduler:
+        scheduler.map(str, range(3), BACKGROUND)
+        assert scheduler.stats()[BACKGROUND]["completed"] == 3
+    assert metrics.scheduler_queue_time.count(priority=BACKGROUND) == queued + 3
+    assert metrics.scheduler_queued.value(priority=BACKGROUND) == 0
+
+
+def test_errors():
+    with pytest.raises(ValueError, match="Invalid concurrency limit"):
+        LinkScheduler(classes={"a": 0})
+
+    scheduler = LinkScheduler(workers=1)
+    with pytest.raises(ValueError, match="Unknown priority class"):
+        scheduler.submit(print, priority="urgent")
+    with pytest.raises(ZeroDivisionError):
+        scheduler.submit(lambda: 1 / 0).result(timeout=10)
+
+    release, _ = blocker(scheduler)
+    queued = scheduler.submit(print)
+    cancelled = metrics.scheduler_jobs.value(priority=INTERACTIVE, outcome="cancelled")
+    release.set()
+    scheduler.shutdown(cancel_queued=True)
+    assert queued.cancelled()
+    # Cancelled jobs are not counted as completed
+    stats = scheduler.stats()[INTERACTIVE]
+    assert (stats["completed"], stats["cancelled"]) == (2, 1)
+    assert (
+        metrics.scheduler_jobs.value(priority=INTERACTIVE, outcome="cancelled")
+        == cancelled + 1
+    )
+    with pytest.raises(RuntimeError):
+        scheduler.submit(print)
+
+
+def test_submit_link(gpu_arch_flag, device_functions_ptx):
+    name, ptx = device_functions_ptx
+    with LinkScheduler(workers=2) as scheduler:
+        future = scheduler.submit_link(
+            [gpu_arch_flag], [(InputType.PTX, ptx, name)], priority=BACKGROUND
+        )
+        assert read_cubin(future.result(timeout=60)).functions
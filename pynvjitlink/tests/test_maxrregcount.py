@@ -0,0 +1,111 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import pytest
+
+from pynvjitlink.api import InputType
+from pynvjitlink.cli import main
+from pynvjitlink.cubin import read_cubin
+from pynvjitlink.library import LinkLibrary
+from pynvjitlink.options import LinkOptions
+from pynvjitlink.tuning import occupancy, tune_max_registers
+
+KERNEL_PTX = b"""
+.version 7.0
+.target sm_52
+.address_size 64
+
+.visible .entry scale(.param .u64 out, .param .u32 k) .maxntid 256, 1, 1
+{
+    .reg .b32 %r<4>;
+    .reg .b64 %rd<4>;
+    ld.param.u64 %rd1, [out];
+    ld.param.u32 %r1, [k];
+    mov.u32 %r2, %tid.x;
+    mul.lo.s32 %r3, %r2, %r1;
+    cvta.to.global.u64 %rd2, %rd1;
+    mul.wide.u32 %rd3, %r2, 4;
+    add.s64 %rd2, %rd2, %rd3;
+    st.global.u32 [%rd2], %r3;
+    ret;
+}
+"""
+
+
+@pytest.mark.parametrize(
+    "sm, registers, block_size, shared_memory, expected",
+    [
+        (80, 32, 256, 0, 1.0),
+        (80, 128, 256, 0, 0.25),
+        (80, 255, 128, 0, 0.125),
+        (80, 32, 256, 48 * 1024, 0.375),
+        # sm_90 cubins already include the 1KB reserved by the system
+        (90, 32, 256, 57 * 1024, 0.5),
+        (75, 64, 256, 0, 1.0),
+        (75, 65, 256, 0, 0.75),
+        # Unknown SM versions use the limits of the closest earlier one
+        (81, 32, 256, 0, 1.0),
+        (80, 32, 2048, 0, 0.0),
+    ],
+)
+def test_occupancy(sm, registers, block_size, shared_memory, expected):
+    assert occupancy(sm, registers, block_size, shared_memory) == expected
+
+
+@pytest.mark.parametrize("jobs", [1, None])
+def test_tune_max_registers(gpu_arch_flag, jobs):
+    arch = gpu_arch_flag.partition("=")[2]
+    inputs = [(InputType.PTX, KERNEL_PTX, "kernel.ptx")]
+    report = tune_max_registers(
+        LinkOptions(arch), inputs, max_registers=(None, 16, 64), jobs=jobs
+    )
+
+    assert report.kernel == "scale"
+    # The block size of kernels with launch bounds is their maximum
+    assert report.block_size == 256
+    assert sorted(r.max_registers or 0 for r in report.results) == [0, 16, 64]
+    assert all(r.registers <= 16 for r in report.results if r.max_registers == 16)
+    assert all(r.spill_stores is not None for r in report.results)
+    occupancies = [r.occupancy for r in report.results]
+    assert occupancies == sorted(occupancies, reverse=True)
+    assert read_cubin(report.cubin)["scale"].registers == report.best.registers
+    assert "maxrregcount" in report.table()
+
+
+def test_tune_max_registers_library(gpu_arch_flag):
+    library = LinkLibrary()
+    library.add_data(InputType.PTX, KERNEL_PTX, "kernel.ptx")
+    report = tune_max_registers(
+        gpu_arch_flag.partition("=")[2],
+        library,
+        "scale",
+        max_registers=(32,),
+        optimization_levels=(0, 3),
+        block_size=128,
+    )
+    assert report.block_size == 128
+    assert sorted(r.optimization_level for r in report.results) == [0, 3]
+
+    with pytest.raises(KeyError):
+        tune_max_registers(gpu_arch_flag.partition("=")[2], library, "missing")
+
+
+def test_tune_command(tmp_path, gpu_arch_flag, capsys):
+    ptx = tmp_path / "kernel.ptx"
+    ptx.write_bytes(KERNEL_PTX)
+    output = tmp_path / "best.cubin"
+    argv = ["tune", str(ptx), "--arch", gpu_arch_flag.partition("=")[2]]
+    argv += ["--max-registers=-,32", "-o", str(output)]
+    assert main(argv) == 0
+    assert "scale" in capsys.readouterr().out
+    assert read_cubin(output.read_bytes())["scale"].kernel
+
+
+def test_tune_command_errors(tmp_path, gpu_arch_flag, capsys):
+    arch = gpu_arch_flag.partition("=")[2]
+    # Inputs and architectures that can't be used are reported, not raised
+    assert main(["tune", str(tmp_path / "missing.ptx"), "--arch", arch]) == 1
+    assert "pynvjitlink: error:" in capsys.readouterr().err
+    ptx = tmp_path / "kernel.ptx"
+    ptx.write_bytes(KERNEL_PTX)
+    assert main(["tune", str(ptx), "--arch", "invalid"]) == 1
+    assert "Invalid architecture" in capsys.readouterr().err
@@ -0,0 +1,112 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from pynvjitlink import NvJitLinker, NvJitLinkError, api, metrics
+from pynvjitlink.cache import LinkResultCache, MemoryBackend
+
+
+@pytest.fixture(autouse=True)
+def no_link_cache(monkeypatch):
+    monkeypatch.setattr(api, "_link_cache", None)
+
+
+def test_counter():
+    counter = metrics.Counter("test_total", "A test.", ["kind"])
+    counter.inc(kind="a")
+    counter.inc(2, kind='"b"')
+    assert counter.value(kind="a") == 1
+    assert counter.generate() == (
+        "# HELP test_total A test.\n"
+        "# TYPE test_total counter\n"
+        'test_total{kind="\\"b\\""} 2\n'
+        'test_total{kind="a"} 1'
+    )
+    with pytest.raises(ValueError):
+        counter.inc(other="a")
+
+
+def test_histogram():
+    histogram = metrics.Histogram("test_seconds", "A test.", buckets=(0.1, 1))
+    histogram.observe(0.5)
+    histogram.observe(2)
+    assert histogram.count() == 2
+    assert histogram.generate().splitlines()[2:] == [
+        'test_seconds_bucket{le="0.1"} 0',
+        'test_seconds_bucket{le="1"} 1',
+        'test_seconds_bucket{le="+Inf"} 2',
+        "test_seconds_sum 2.5",
+        "test_seconds_count 2",
+    ]
+
+
+def test_link_metrics(device_functions_cubin, device_functions_ptx, gpu_arch_flag):
+    arch = gpu_arch_flag.partition("=")[2]
+    labels = {"arch": arch, "input_types": "cubin,ptx"}
+    started = metrics.links_started.value(**labels)
+    completed = metrics.links_completed.value(**labels)
+    durations = metrics.link_duration.count(arch=arch)
+    input_bytes = metrics.link_input_bytes.value(input_type="ptx")
+    output_bytes = metrics.link_output_bytes.value(output="cubin")
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_cubin(device_functions_cubin[1], device_functions_cubin[0])
+    nvjitlinker.add_ptx(device_functions_ptx[1], device_functions_ptx[0])
+    cubin = nvjitlinker.get_linked_cubin()
+
+    assert metrics.links_started.value(**labels) == started + 1
+    assert metrics.links_completed.value(**labels) == completed + 1
+    assert metrics.link_duration.count(arch=arch) == durations + 1
+    assert metrics.link_input_bytes.value(input_type="ptx") == input_bytes + len(
+        device_functions_ptx[1]
+    )
+    assert metrics.link_output_bytes.value(output="cubin") == output_bytes + len(cubin)
+    assert metrics.links_in_flight.value() == 0
+
+
+def test_failed_link_metrics(undefined_extern_cubin, gpu_arch_flag):
+    arch = gpu_arch_flag.partition("=")[2]
+    labels = {"arch": arch, "input_types": "cubin"}
+    failed = metrics.links_failed.value(**labels)
+
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_cubin(undefined_extern_cubin[1], undefined_extern_cubin[0])
+    with pytest.raises(NvJitLinkError):
+        nvjitlinker.get_linked_cubin()
+
+    assert metrics.links_failed.value(**labels) == failed + 1
+
+
+def test_cache_metrics(device_functions_cubin, gpu_arch_flag, monkeypatch):
+    monkeypatch.setattr(api, "_link_cache", LinkResultCache(MemoryBackend()))
+    hits = metrics.link_cache_hits.value()
+    misses = metrics.link_cache_misses.value()
+
+    for _ in range(2):
+        nvjitlinker = NvJitLinker(gpu_arch_flag)
+        nvjitlinker.add_cubin(device_functions_cubin[1], device_functions_cubin[0])
+        nvjitlinker.get_linked_cubin()
+
+    assert metrics.link_cache_misses.value() == misses + 1
+    assert metrics.link_cache_hits.value() == hits + 1
+
+
+def test_metrics_server():
+    server = metrics.start_metrics_server()
+    try:
+        host, port = server.server_address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            text = response.read().decode()
+        assert text == metrics.generate_metrics()
+        assert "# TYPE pynvjitlink_links_started_total counter" in text
+        assert "pynvjitlink_links_in_flight 0" in text
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
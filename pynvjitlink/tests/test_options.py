@@ -0,0 +1,115 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+import os
+
+import pytest
+
+from pynvjitlink import NvJitLinker
+from pynvjitlink import options as options_module
+from pynvjitlink.options import LinkOptions, default_split_compile
+
+
+@pytest.mark.parametrize("arch", ((8, 0), [8, 0], 80, "80", "sm_80"))
+def test_arch(arch):
+    assert LinkOptions(arch).arch == "sm_80"
+
+
+def test_as_options():
+    options = LinkOptions(
+        "sm_90a",
+        lto=True,
+        optimization_level=3,
+        max_registers=64,
+        lineinfo=True,
+        ftz=True,
+        prec_div=False,
+        kernels_used=["kernel"],
+        variables_used="variable",
+        split_compile=4,
+        extra=["-time"],
+    )
+    assert options.as_options() == (
+        "-arch=sm_90a",
+        "-lto",
+        "-O3",
+        "-maxrregcount=64",
+        "-lineinfo",
+        "-ftz=1",
+        "-prec-div=0",
+        "-kernels-used=kernel",
+        "-variables-used=variable",
+        "-split-compile=4",
+        "-time",
+    )
+
+
+def test_split_compile():
+    # Links are only split when it is asked for, and only LTO links
+    assert LinkOptions(80, lto=True).as_options() == ("-arch=sm_80", "-lto")
+    assert LinkOptions(80, split_compile=4).as_options() == ("-arch=sm_80",)
+    assert LinkOptions(80, lto=True, split_compile=4).as_options() == (
+        "-arch=sm_80",
+        "-lto",
+        "-split-compile=4",
+    )
+    assert 1 <= default_split_compile() <= max(1, os.cpu_count())
+
+
+def test_fingerprint_independent_of_cpus(
+    monkeypatch, device_functions_ltoir, gpu_compute_capability
+):
+    # The same link on hosts with different numbers of CPUs has the same
+    # fingerprint, so they share cache entries
+    name, ltoir = device_functions_ltoir
+    fingerprints = set()
+    for cpus in (2, 32):
+        monkeypatch.setattr(options_module, "_available_cpus", lambda: cpus)
+        for split_compile in (1, default_split_compile()):
+            options = LinkOptions(
+                gpu_compute_capability, lto=True, split_compile=split_compile
+            )
+            nvjitlinker = NvJitLinker(options)
+            nvjitlinker.add_ltoir(ltoir, name)
+            fingerprints.add(nvjitlinker.fingerprint())
+    assert len(fingerprints) == 1
+
+
+def test_hashable():
+    a = LinkOptions(80, lto=True, kernels_used=["kernel"], split_compile=2)
+    b = LinkOptions("sm_80", lto=1, kernels_used=("kernel",), split_compile=2)
+    assert a == b
+    assert hash(a) == hash(b)
+    assert len({a, b}) == 1
+
+    c = a.replace(max_registers=32)
+    assert c != a
+    assert c.max_registers == 32
+    assert c.kernels_used == ("kernel",)
+
+
+def test_invalid():
+    with pytest.raises(ValueError, match="Invalid architecture"):
+        LinkOptions("ampere")
+    with pytest.raises(ValueError, match="Invalid optimization level"):
+        LinkOptions(80, optimization_level=4)
+    with pytest.raises(ValueError, match="Invalid maximum register count"):
+        LinkOptions(80, max_registers=-1)
+    with pytest.raises(ValueError, match="Invalid split compile thread count"):
+        LinkOptions(80, split_compile=-1)
+    with pytest.raises(TypeError, match="ftz must be"):
+        LinkOptions(80, ftz="true")
+    with pytest.raises(ValueError, match="Invalid optimization level"):
+        LinkOptions(80).replace(optimization_level=5)
+
+
+def test_link_with_options(gpu_compute_capability, device_functions_ltoir):
+    options = LinkOptions(
+        gpu_compute_capability, lto=True, ftz=True, fma=False, split_compile=2
+    )
+    name, ltoir = device_functions_ltoir
+    nvjitlinker = NvJitLinker(options)
+    nvjitlinker.add_ltoir(ltoir, name)
+    from_strings = NvJitLinker(*options.as_options())
+    from_strings.add_ltoir(ltoir, name)
+    assert nvjitlinker.fingerprint() == from_strings.fingerprint()
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
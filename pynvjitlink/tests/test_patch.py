@@ -1,13 +1,19 @@
-# Copyright (c) 2023-2024, NVIDIA CORPORATION.
+# Copyright (c) 2023-2025, NVIDIA CORPORATION.
 
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from unittest.mock import patch as mock_patch
 
 import pytest
 from numba import cuda
 from pynvjitlink import NvJitLinkError, patch
+from pynvjitlink import options as options_module
+from pynvjitlink.costs import LinkCostReport
 from pynvjitlink.patch import (
     PatchedLinker,
+    _link_digest,
     _numba_version_ok,
     new_patched_linker,
     patch_numba_linker,
@@ -93,6 +99,107 @@ def test_ptx_compile_options(max_registers, lineinfo, lto, additional_flags):
             assert flag in patched_linker.options
 
 
+@pytest.mark.parametrize("lto", (False, True))
+def test_split_compile(lto, monkeypatch):
+    monkeypatch.setattr(options_module, "_available_cpus", lambda: 8)
+    patch._link_options.cache_clear()
+    try:
+        patched_linker = PatchedLinker(cc=(7, 5), lto=lto)
+    finally:
+        patch._link_options.cache_clear()
+    # Only LTO links are split, across half of the CPUs
+    assert ("-split-compile=4" in patched_linker.options) == lto
+    assert patched_linker.link_options.split_compile == (4 if lto else 1)
+
+
+@pytest.mark.parametrize("lto", (False, True))
+def test_kernels_used(lto):
+    patched_linker = PatchedLinker(cc=(7, 5), lto=lto, kernels_used=["_Z6kernelv"])
+    # Only LTO links are trimmed to the kernels used
+    assert ("-kernels-used=_Z6kernelv" in patched_linker._linker._options) == lto
+
+
+def test_link_library_kernels_used():
+    library, _, _ = fake_library()
+    library._entry_name = "_Z6kernelv"
+    library.name = "kernel_kernel_"
+    linkers = []
+
+    def get_cubin(library, cc):
+        linkers.append(patch.new_patched_linker(cc=cc, lto=True))
+        return b"cubin"
+
+    with mock_patch.object(patch, "_original_get_cubin", get_cubin):
+        assert patch._get_cubin(library, (7, 5)) == b"cubin"
+
+    # The linker for the library's link keeps only its kernel, and linkers
+    # created outside of a library's link keep everything
+    assert "-kernels-used=_Z6kernelv" in linkers[0]._linker._options
+    assert linkers[0].cost.kernel == "kernel"
+    linker = patch.new_patched_linker(cc=(7, 5), lto=True)
+    assert not any(o.startswith("-kernels-used") for o in linker._linker._options)
+    assert linker.cost.kernel is None
+
+
+def test_link_cost(linkable_code_ptx, gpu_compute_capability, monkeypatch):
+    report = LinkCostReport()
+    monkeypatch.setattr(patch, "_link_cost_report", report)
+    patched_linker = PatchedLinker(cc=gpu_compute_capability, kernel="kernel")
+    patched_linker.add_file_guess_ext(linkable_code_ptx)
+    cubin = patched_linker.complete()
+
+    (cost,) = report.links
+    assert cost is patched_linker.cost
+    assert cost.kernel == "kernel"
+    assert [(i.kind, i.name, i.size) for i in cost.inputs] == [
+        ("ptx", linkable_code_ptx.name, len(linkable_code_ptx.data))
+    ]
+    assert cost.complete_time > 0
+    assert cost.output_size == len(cubin)
+    assert not cost.failed
+
+
+EMPTY_PTX = ".version 7.0\n.target sm_52\n.address_size 64\n"
+
+
+def test_add_cu_concurrently(linkable_code_ptx, gpu_compute_capability, monkeypatch):
+    running = []
+    overlapped = threading.Event()
+
+    def compile(cu, name, cc):
+        # Each compile waits for the others to start, so they only finish if
+        # they run concurrently
+        running.append(name)
+        if len(running) == 3:
+            overlapped.set()
+        overlapped.wait(timeout=10)
+        return EMPTY_PTX, ""
+
+    monkeypatch.setattr(patch.nvrtc, "compile", compile)
+    monkeypatch.setattr(patch, "_nvrtc_pool", ThreadPoolExecutor(max_workers=3))
+    patched_linker = PatchedLinker(cc=gpu_compute_capability)
+    patched_linker.add_cu("a", "a.cu")
+    patched_linker.add_file_guess_ext(linkable_code_ptx)
+    patched_linker.add_cu("b", "b.cu")
+    patched_linker.add_cu("c", "c.cu")
+    patched_linker.complete()
+
+    patch._nvrtc_pool.shutdown()
+    assert overlapped.is_set()
+    # Inputs are added in the order they were given
+    names = [i.name for i in patched_linker.cost.inputs if i.kind == "ptx"]
+    assert names == ["a.ptx", linkable_code_ptx.name, "b.ptx", "c.ptx"]
+    assert [i.kind for i in patched_linker.cost.inputs] == [
+        "cu",
+        "ptx",
+        "ptx",
+        "cu",
+        "ptx",
+        "cu",
+        "ptx",
+    ]
+
+
 @pytest.mark.parametrize(
     "file",
     (
@@ -193,5 +300,144 @@ def test_jit_with_invalid_linkable_code(device_functions_cubin):
             pass
 
 
+def test_link_digest(tmp_path, device_functions_ptx):
+    name, ptx_data = device_functions_ptx
+    path = tmp_path / name
+    path.write_bytes(ptx_data)
+    ptx = patch.PTXSource(ptx_data, name=name)
+
+    digest = _link_digest([str(path)], {"lto": False})
+    assert digest == _link_digest([str(path)], {"lto": False})
+    assert digest != _link_digest([str(path)], {"lto": True})
+    assert digest != _link_digest([str(path)], {"lto": False}, max_registers=32)
+    assert digest != _link_digest([ptx], {"lto": False})
+    assert digest != _link_digest([], {"lto": False})
+
+    # The digest covers the contents of linked files, not only their paths
+    path.write_bytes(ptx_data + b"\n")
+    assert digest != _link_digest([str(path)], {"lto": False})
+
+
+@pytest.mark.skipif(
+    not _numba_version_ok,
+    reason=f"Requires Numba == {required_numba_ver[0]}.{required_numba_ver[1]}",
+)
+def test_jit_with_linkable_code_cached(tmp_path, monkeypatch, device_functions_ptx):
+    from numba.core import config
+
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    patch_numba_linker()
+    _, ptx_data = device_functions_ptx
+    sig = "uint32(uint32, uint32)"
+    add_from_numba = cuda.declare_device("add_from_numba", sig)
+
+    def make_kernel(ptx):
+        @cuda.jit(cache=True, link=[patch.PTXSource(ptx)])
+        def kernel(result):
+            result[0] = add_from_numba(1, 2)
+
+        return kernel
+
+    for ptx, hits in ((ptx_data, 0), (ptx_data, 1)):
+        kernel = make_kernel(ptx)
+        result = cuda.device_array(1)
+        kernel[1, 1](result)
+        assert result[0] == 3
+        assert sum(kernel.stats.cache_hits.values()) == hits
+
+    # Changing the linked code invalidates the cached kernel
+    kernel = make_kernel(ptx_data + b"\n")
+    kernel[1, 1](result)
+    assert sum(kernel.stats.cache_hits.values()) == 0
+
+
+@pytest.fixture
+def numba_linking_in_background():
+    """
+    Patch the linker to link in the background for the duration of the test.
+    """
+    from numba.cuda.cudadrv.driver import Linker
+
+    old_new = Linker.new
+    patch_numba_linker(background=2)
+    yield
+    patch_numba_linker()
+    Linker.new = old_new
+
+
+def fake_library():
+    # Stands in for a CUDACodeLibrary, with a link that records its thread
+    threads = []
+
+    def get_cubin(library, cc):
+        if cc not in library._cubin_cache:
+            threads.append(threading.current_thread())
+            if library.fail:
+                raise RuntimeError("Link failed")
+            library._cubin_cache[cc] = b"cubin"
+        return library._cubin_cache[cc]
+
+    library = SimpleNamespace(
+        _cubin_cache={},
+        fail=False,
+        get_asm_str=lambda cc: "ptx",
+        _ensure_cc=lambda cc: cc,
+    )
+    return library, threads, get_cubin
+
+
+def test_background_link(numba_linking_in_background):
+    library, threads, get_cubin = fake_library()
+    with mock_patch.object(patch, "_original_get_cubin", get_cubin):
+        patch._start_background_link(library, (7, 5))
+        # Starting a link that is already running does nothing
+        patch._start_background_link(library, (7, 5))
+        assert patch._get_cubin(library, (7, 5)) == b"cubin"
+
+    assert len(threads) == 1
+    assert threads[0] is not threading.current_thread()
+    assert library._pending_links == {}
+
+
+def test_background_link_error(numba_linking_in_background):
+    library, threads, get_cubin = fake_library()
+    library.fail = True
+    with mock_patch.object(patch, "_original_get_cubin", get_cubin):
+        patch._start_background_link(library, (7, 5))
+        with pytest.raises(RuntimeError, match="Link failed"):
+            patch._get_cubin(library, (7, 5))
+
+        # The next request for the cubin links again
+        library.fail = False
+        assert patch._get_cubin(library, (7, 5)) == b"cubin"
+
+    assert len(threads) == 2
+
+
+@pytest.mark.skipif(
+    not _numba_version_ok,
+    reason=f"Requires Numba == {required_numba_ver[0]}.{required_numba_ver[1]}",
+)
+def test_jit_with_linkable_code_background(
+    linkable_code_ptx, numba_linking_in_background
+):
+    sig = "uint32(uint32, uint32)"
+    add_from_numba = cuda.declare_device("add_from_numba", sig)
+
+    @cuda.jit(link=[linkable_code_ptx])
+    def kernel(result, x):
+        result[0] = add_from_numba(x, 2)
+
+    # Compile several specializations, which are linked in the background
+    sigs = ("void(float32[:], int32)", "void(float64[:], int32)")
+    for sig in sigs:
+        kernel.compile(sig)
+
+    for dtype in ("float32", "float64"):
+        result = cuda.device_array(1, dtype=dtype)
+        kernel[1, 1](result, 1)
+        assert result[0] == 3
+
+
 if __name__ == "__main__":
     sys.exit(pytest.main())
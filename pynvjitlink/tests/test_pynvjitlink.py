@@ -58,6 +58,22 @@ def test_add_file(input_file, input_type, gpu_arch_flag, request):
     _nvjitlinklib.destroy(handle)
 
 
+def test_add_ptx_in_place(device_functions_ptx, gpu_arch_flag):
+    filename, ptx = device_functions_ptx
+
+    def add_ptx(data):
+        handle = _nvjitlinklib.create(gpu_arch_flag)
+        copied = _nvjitlinklib.add_data(handle, InputType.PTX.value, data, filename)
+        _nvjitlinklib.destroy(handle)
+        return copied
+
+    # PTX followed by a null byte is used in place
+    for data in (ptx, bytearray(ptx), memoryview(ptx), ptx.decode()):
+        assert not add_ptx(data)
+    # Other PTX is copied to terminate it
+    assert add_ptx(memoryview(ptx + b"\n")[:-1])
+
+
 # We test the LTO input case separately as it requires the `-lto` flag. The
 # OBJECT input type is used because the LTO-IR container is packaged in an ELF
 # object when produced by NVCC.
@@ -1,9 +1,20 @@
 # Copyright (c) 2023-2025, NVIDIA CORPORATION. All rights reserved.
 
+import array
+import mmap
 import sys
+import threading
+import time
 
 import pytest
-from pynvjitlink import NvJitLinker, NvJitLinkError
+from pynvjitlink import NvJitLinker, NvJitLinkError, api
+from pynvjitlink.api import (
+    LinkMemoryLimiter,
+    NvJitLinkTimeoutError,
+    add_link_listener,
+    estimate_link_memory,
+    remove_link_listener,
+)
 
 
 def test_create_no_arch_error():
@@ -112,6 +123,67 @@ def test_get_linked_cubin(device_functions_cubin, gpu_arch_flag):
     assert cubin[:4] == b"\x7fELF"
 
 
+@pytest.mark.parametrize(
+    "convert",
+    [
+        bytes.decode,
+        bytearray,
+        memoryview,
+        lambda ptx: array.array("B", ptx),
+        # PTX that isn't followed by a null byte
+        lambda ptx: memoryview(ptx + b"}")[:-1],
+    ],
+    ids=["str", "bytearray", "memoryview", "array", "slice"],
+)
+def test_add_ptx_buffer(device_functions_ptx, gpu_arch_flag, convert):
+    name, ptx = device_functions_ptx
+    data = convert(ptx)
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_ptx(data, name)
+    assert len(nvjitlinker.fingerprint()) == 64
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
+
+    # Links in worker processes are sent copies of the inputs
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_ptx(data, name)
+    assert nvjitlinker.get_linked_cubin(timeout=60)[:4] == b"\x7fELF"
+
+
+def test_add_ptx_buffer_changed(device_functions_ptx, gpu_arch_flag, tmp_path):
+    name, ptx = device_functions_ptx
+
+    # Writable buffers are linked from a copy, so changing them after they are
+    # added changes neither the fingerprint nor the inputs linked in a worker
+    data = bytearray(ptx)
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_ptx(data, name)
+    fingerprint = nvjitlinker.fingerprint()
+    data[:] = b"garbage"
+    assert nvjitlinker.fingerprint() == fingerprint
+    assert nvjitlinker.get_linked_cubin(timeout=60)[:4] == b"\x7fELF"
+
+    # Read-only buffers are kept until the link is complete
+    path = tmp_path / "device_functions.ptx"
+    path.write_bytes(ptx)
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    nvjitlinker.add_ptx(data, name)
+    with pytest.raises(BufferError):
+        data.close()
+    assert nvjitlinker.get_linked_cubin()[:4] == b"\x7fELF"
+    data.close()
+
+
+def test_add_non_contiguous_buffer_error(device_functions_ptx, gpu_arch_flag):
+    name, ptx = device_functions_ptx
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    with pytest.raises(BufferError):
+        nvjitlinker.add_ptx(memoryview(ptx)[::2], name)
+    with pytest.raises(TypeError):
+        nvjitlinker.add_ptx(1, name)
+
+
 def test_get_error_log(undefined_extern_cubin, gpu_arch_flag):
     nvjitlinker = NvJitLinker(gpu_arch_flag)
     name, cubin = undefined_extern_cubin
@@ -136,5 +208,186 @@ def test_get_info_log(device_functions_cubin, gpu_arch_flag, gpu_compute_capabil
     assert "" == info_log
 
 
+def test_resource_usage(device_functions_ptx, gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag, "-verbose")
+    name, ptx = device_functions_ptx
+    nvjitlinker.add_ptx(ptx, name)
+
+    calls = []
+
+    def listener(linker, usage):
+        calls.append((linker, usage))
+
+    add_link_listener(listener)
+    try:
+        nvjitlinker.get_linked_cubin()
+    finally:
+        remove_link_listener(listener)
+
+    usage = nvjitlinker.resource_usage
+    assert calls == [(nvjitlinker, usage)]
+    add_from_numba = usage["add_from_numba"]
+    assert add_from_numba.spill_stores == 0
+    assert add_from_numba.stack_frame == 0
+
+
+def test_kernels_used(device_functions_ltoir, gpu_arch_flag):
+    name, ltoir = device_functions_ltoir
+    nvjitlinker = NvJitLinker(gpu_arch_flag, "-lto")
+    nvjitlinker.add_ltoir(ltoir, name)
+
+    trimmed = NvJitLinker(
+        gpu_arch_flag, "-lto", kernels_used=["kernel"], variables_used=["variable"]
+    )
+    trimmed.add_ltoir(ltoir, name)
+    assert trimmed.fingerprint() != nvjitlinker.fingerprint()
+    assert trimmed.get_linked_cubin()[:4] == b"\x7fELF"
+
+
+def test_get_linked_cubin_with_timeout(device_functions_cubin, gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    name, cubin = device_functions_cubin
+    nvjitlinker.add_cubin(cubin, name)
+    cubin = nvjitlinker.get_linked_cubin(timeout=60)
+
+    assert cubin[:4] == b"\x7fELF"
+    assert nvjitlinker.info_log is not None
+
+
+def test_get_linked_cubin_timeout_expired(device_functions_cubin, gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    name, cubin = device_functions_cubin
+    nvjitlinker.add_cubin(cubin, name)
+    # Even starting the worker takes longer than this
+    with pytest.raises(NvJitLinkTimeoutError, match="did not complete within"):
+        nvjitlinker.get_linked_cubin(timeout=0.001)
+
+
+def test_get_linked_cubin_timeout_waiting_for_admission(
+    device_functions_cubin, gpu_arch_flag, monkeypatch
+):
+    limiter = LinkMemoryLimiter(budget=1)
+    monkeypatch.setattr(api, "link_memory_limiter", limiter)
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    name, cubin = device_functions_cubin
+    nvjitlinker.add_cubin(cubin, name)
+
+    # The timeout covers waiting for another link to leave room for this one
+    with limiter.admit(1):
+        start = time.monotonic()
+        with pytest.raises(NvJitLinkTimeoutError, match="within 0.2s"):
+            nvjitlinker.get_linked_cubin(timeout=0.2)
+        assert time.monotonic() - start < 30
+    assert limiter.stats()["waiting"] == 0
+
+    # The link keeps its inputs, so it can be retried
+    assert nvjitlinker.get_linked_cubin(timeout=60)[:4] == b"\x7fELF"
+
+
+def test_get_linked_cubin_with_timeout_error(undefined_extern_cubin, gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    name, cubin = undefined_extern_cubin
+    nvjitlinker.add_cubin(cubin, name)
+    with pytest.raises(NvJitLinkError, match="NVJITLINK_ERROR_INTERNAL error"):
+        nvjitlinker.get_linked_cubin(timeout=60)
+    assert "Undefined reference to '_Z5undefff'" in nvjitlinker.error_log
+
+
+def test_link_job_cancel(device_functions_cubin, gpu_arch_flag):
+    nvjitlinker = NvJitLinker(gpu_arch_flag)
+    name, cubin = device_functions_cubin
+    nvjitlinker.add_cubin(cubin, name)
+    job = nvjitlinker.submit()
+    job.cancel()
+    with pytest.raises(NvJitLinkError, match="Link was cancelled"):
+        job.result(timeout=60)
+    assert job.done()
+
+
+def test_estimate_link_memory():
+    size = 1024**2
+    assert estimate_link_memory(("-arch=sm_75", "-lto"), size) > estimate_link_memory(
+        ("-arch=sm_75",), size
+    )
+    assert estimate_link_memory(("-arch=sm_75",), 2 * size) > estimate_link_memory(
+        ("-arch=sm_75",), size
+    )
+
+
+def test_link_memory_limiter_queues_over_budget():
+    limiter = LinkMemoryLimiter(budget=100)
+    admitted = threading.Event()
+
+    def second_link():
+        with limiter.admit(60):
+            admitted.set()
+
+    with limiter.admit(60):
+        t = threading.Thread(target=second_link)
+        t.start()
+        # The second link doesn't fit alongside the first one
+        assert not admitted.wait(0.2)
+        assert limiter.stats()["waiting"] == 1
+
+    t.join()
+    assert admitted.is_set()
+
+    stats = limiter.stats()
+    assert stats["admitted"] == 2
+    assert stats["queued"] == 1
+    assert stats["in_use"] == 0
+    assert stats["max_wait_time"] >= 0.2
+
+
+def test_link_memory_limiter_admits_within_budget():
+    limiter = LinkMemoryLimiter(budget=100)
+    with limiter.admit(40):
+        with limiter.admit(60):
+            assert limiter.stats()["in_use"] == 100
+    assert limiter.stats()["queued"] == 0
+
+
+def test_link_memory_limiter_admits_oversized_link_alone():
+    limiter = LinkMemoryLimiter(budget=100)
+    with limiter.admit(1000):
+        assert limiter.stats()["running"] == 1
+
+
+def test_link_memory_limiter_timeout():
+    limiter = LinkMemoryLimiter(budget=100)
+    with limiter.admit(100):
+        with pytest.raises(TimeoutError):
+            with limiter.admit(10, timeout=0.1):
+                pass
+        assert limiter.stats()["waiting"] == 0
+    # A link that timed out doesn't hold up those queued behind it
+    with limiter.admit(10, timeout=0):
+        assert limiter.stats()["admitted"] == 2
+
+
+def test_link_memory_limiter_first_come_first_served():
+    limiter = LinkMemoryLimiter(budget=100)
+    order = []
+
+    def link(cost, name):
+        with limiter.admit(cost):
+            order.append(name)
+
+    with limiter.admit(100):
+        big = threading.Thread(target=link, args=(80, "big"))
+        big.start()
+        while limiter.stats()["waiting"] < 1:
+            time.sleep(0.01)
+        small = threading.Thread(target=link, args=(10, "small"))
+        small.start()
+        while limiter.stats()["waiting"] < 2:
+            time.sleep(0.01)
+
+    big.join()
+    small.join()
+    # The small link is not allowed to overtake the big one
+    assert order == ["big", "small"]
+
+
 if __name__ == "__main__":
     sys.exit(pytest.main())
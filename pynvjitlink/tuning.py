@@ -0,0 +1,258 @@
+# Copyright (c) 2025, NVIDIA CORPORATION.
+
+# Choosing the maximum register count of a kernel by linking it with several
+# limits, and ranking the results by their spills and the occupancy they
+# would achieve. Fewer registers per thread let more warps run on each SM,
+# but a limit that is too low makes ptxas spill registers to local memory.
+
+import itertools
+from collections import namedtuple
+
+from pynvjitlink.api import NvJitLinker
+from pynvjitlink.cubin import read_cubin
+from pynvjitlink.driver import run_concurrently
+from pynvjitlink.library import LibraryMember
+from pynvjitlink.options import LinkOptions
+
+# The maximum threads, blocks and shared memory per SM of each SM version,
+# from the CUDA occupancy calculator. SM versions that are not listed use the
+# limits of the closest earlier one.
+_SM_LIMITS = {
+    50: (2048, 32, 64 * 1024),
+    52: (2048, 32, 96 * 1024),
+    53: (2048, 32, 64 * 1024),
+    60: (2048, 32, 64 * 1024),
+    61: (2048, 32, 96 * 1024),
+    62: (2048, 32, 64 * 1024),
+    70: (2048, 32, 96 * 1024),
+    72: (2048, 32, 96 * 1024),
+    75: (1024, 16, 64 * 1024),
+    80: (2048, 32, 164 * 1024),
+    86: (1536, 16, 100 * 1024),
+    87: (1536, 16, 164 * 1024),
+    89: (1536, 24, 100 * 1024),
+    90: (2048, 32, 228 * 1024),
+    100: (2048, 32, 228 * 1024),
+    120: (1536, 32, 100 * 1024),
+}
+
+# Every SM has 64K registers, split between four partitions, which allocate
+# registers to each warp in units of 256
+_REGISTERS_PER_PARTITION = 16 * 1024
+_PARTITIONS = 4
+_REGISTER_UNIT = 256
+_SHARED_MEMORY_UNIT = 128
+_MAX_BLOCK_SIZE = 1024
+
+# Kernels launched without a block size of their own are assumed to use this
+_DEFAULT_BLOCK_SIZE = 256
+
+# The register limits tried by default. None leaves the count to ptxas.
+DEFAULT_MAX_REGISTERS = (None, 32, 40, 48, 64, 80, 96, 128, 168, 255)
+
+TuningResult = namedtuple(
+    "TuningResult",
+    [
+        "max_registers",
+        "optimization_level",
+        "registers",
+        "spill_stores",
+        "spill_loads",
+        "local_memory",
+        "shared_memory",
+        "occupancy",
+        "cubin",
+    ],
+)
+
+
+def _round_up(value, unit):
+    return -(-value // unit) * unit
+
+
+def _sm_limits(sm):
+    known = [version for version in _SM_LIMITS if version <= sm]
+    return _SM_LIMITS[max(known) if known else min(_SM_LIMITS)]
+
+
+def occupancy(sm, registers, block_size, shared_memory=0):
+    """Estimate the occupancy of a kernel: the fraction of the warps an SM
+    can run at once that it runs, when launched with blocks of
+    ``block_size`` threads on an SM version such as ``80``.
+
+    ``shared_memory`` is the static and dynamic shared memory per block, as
+    reported by read_cubin(). From sm_80 on, the system reserves 1KB of
+    shared memory per block. Cubins for sm_90 and later already include it in
+    their shared memory, so it is only added here for sm_80 to sm_89.
+    """
+    max_threads, max_blocks, shared_memory_per_sm = _sm_limits(sm)
+    max_warps = max_threads // 32
+    warps = -(-block_size // 32)
+    if not 0 < block_size <= _MAX_BLOCK_SIZE or warps > max_warps:
+        return 0.0
+
+    blocks = min(max_blocks, max_warps // warps)
+    if registers:
+        per_warp = _round_up(registers * 32, _REGISTER_UNIT)
+        warps_by_registers = _REGISTERS_PER_PARTITION // per_warp * _PARTITIONS
+        blocks = min(blocks, warps_by_registers // warps)
+    if 80 <= sm < 90:
+        # Reserved by the system, but not included in the cubin
+        shared_memory += 1024
+    if shared_memory:
+        per_block = _round_up(shared_memory, _SHARED_MEMORY_UNIT)
+        blocks = min(blocks, shared_memory_per_sm // per_block)
+    return blocks * warps / max_warps
+
+
+def _cell(value):
+    return "-" if value is None else str(value)
+
+
+def _rank(result):
+    # Spilling is avoided first, then variants are ranked by occupancy, and
+    # then by how few registers they use
+    spills = (result.spill_stores or 0) + (result.spill_loads or 0)
+    return (
+        spills > 0,
+        -result.occupancy,
+        spills,
+        result.local_memory,
+        result.registers,
+    )
+
+
+class TuningReport:
+    """The variants of a kernel linked by tune_max_registers(), ranked best
+    first."""
+
+    def __init__(self, kernel, arch, block_size, results):
+        self.kernel = kernel
+        self.arch = arch
+        self.block_size = block_size
+        self.results = sorted(results, key=_rank)
+
+    @property
+    def best(self):
+        return self.results[0]
+
+    @property
+    def cubin(self):
+        """The cubin of the best variant."""
+        return self.best.cubin
+
+    def table(self):
+        """Return the ranked variants as a table of text."""
+        rows = [
+            ("maxrregcount", "-O", "registers", "spills", "lmem", "smem", "occupancy")
+        ]
+        for result in self.results:
+            rows.append(
+                (
+                    _cell(result.max_registers),
+                    _cell(result.optimization_level),
+                    str(result.registers),
+                    f"{result.spill_stores or 0}/{result.spill_loads or 0}",
+                    str(result.local_memory),
+                    str(result.shared_memory),
+                    f"{result.occupancy:.0%}",
+                )
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+            for row in rows
+        )
+
+    def __repr__(self):
+        return (
+            f"<TuningReport {self.kernel} sm_{self.arch}: best maxrregcount "
+            f"{self.best.max_registers} of {len(self.results)} variants>"
+        )
+
+
+def _input(item):
+    if isinstance(item, LibraryMember):
+        return item.input_type, item.data, item.name
+    return tuple(item)
+
+
+def tune_max_registers(
+    options,
+    inputs,
+    kernel=None,
+    max_registers=DEFAULT_MAX_REGISTERS,
+    optimization_levels=(None,),
+    block_size=None,
+    jobs=None,
+):
+    """Link a kernel with each combination of register limits and
+    optimization levels, in up to ``jobs`` threads, and rank the results.
+
+    ``options`` is a LinkOptions (or an architecture) giving the other
+    options of the links, and ``inputs`` a LinkLibrary or a list of
+    ``(input_type, data, name)`` tuples. ``kernel`` is the name of the kernel
+    to rank the variants by, which may be omitted if the link has only one.
+    Occupancy is estimated for blocks of ``block_size`` threads, which by
+    default is the kernel's maximum block size if it has launch bounds, or
+    256 threads.
+
+    Returns a TuningReport, whose ``results`` are TuningResult tuples with
+    the registers, spills (in bytes, when the inputs are compiled by the
+    link), local and shared memory, and occupancy of each variant, ranked
+    from best to worst: variants that don't spill first, then by occupancy.
+    Only inputs compiled by the link (PTX and LTO-IR) are affected by the
+    register limit. The links don't need a GPU.
+    """
+    if not isinstance(options, LinkOptions):
+        options = LinkOptions(options)
+    if "-verbose" not in options.extra:
+        # Spills are only reported in the info log of verbose links
+        options = options.replace(extra=(*options.extra, "-verbose"))
+    inputs = [_input(item) for item in inputs]
+    variants = list(itertools.product(max_registers, optimization_levels))
+    if not variants:
+        raise ValueError("No register limits or optimization levels to try")
+
+    def link(variant):
+        limit, level = variant
+        linker = NvJitLinker(
+            options.replace(max_registers=limit, optimization_level=level)
+        )
+        for input_type, data, name in inputs:
+            linker.add_data(input_type, data, name)
+        cubin = linker.get_linked_cubin()
+        return cubin, read_cubin(cubin), linker.resource_usage
+
+    linked = run_concurrently(link, variants, jobs)
+
+    info = linked[0][1]
+    if kernel is None:
+        if len(info.kernels) != 1:
+            raise ValueError(
+                f"The link has {len(info.kernels)} kernels: choose one to tune"
+            )
+        kernel = info.kernels[0].name
+    if block_size is None:
+        block_size = info[kernel].max_threads or _DEFAULT_BLOCK_SIZE
+
+    results = []
+    for (limit, level), (cubin, info, usage) in zip(variants, linked):
+        function = info[kernel]
+        spills = usage.get(kernel)
+        results.append(
+            TuningResult(
+                limit,
+                level,
+                function.registers,
+                spills.spill_stores if spills else None,
+                spills.spill_loads if spills else None,
+                function.local_memory,
+                function.shared_memory,
+                occupancy(
+                    info.arch, function.registers, block_size, function.shared_memory
+                ),
+                cubin,
+            )
+        )
+    return TuningReport(kernel, info.arch, block_size, results)